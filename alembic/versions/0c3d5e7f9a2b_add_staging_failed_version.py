@@ -0,0 +1,26 @@
+"""add staging failed_version
+
+Revision ID: 0c3d5e7f9a2b
+Revises: f2b8d4e6a1c7
+Create Date: 2026-10-20 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0c3d5e7f9a2b'
+down_revision = 'f2b8d4e6a1c7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Version of the blob the ETL failed to transform; claims skip the row
+    # until a re-crawl brings a new version
+    op.add_column('staging_raw_offers', sa.Column('failed_version', sa.BigInteger(), nullable=True))
+
+
+def downgrade():
+    op.drop_column('staging_raw_offers', 'failed_version')
@@ -0,0 +1,36 @@
+"""add product_matches
+
+Revision ID: 4c1e7a9b2d30
+Revises: 1b2c3d4e5f6a
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4c1e7a9b2d30'
+down_revision = '1b2c3d4e5f6a'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('product_matches',
+    sa.Column('product_id', sa.Text(), nullable=False),
+    sa.Column('canonical_product_id', sa.Text(), nullable=False),
+    sa.Column('brand_key', sa.Text(), server_default='', nullable=False),
+    sa.Column('similarity', sa.Float(), nullable=True),
+    sa.Column('matched_ts', sa.TIMESTAMP(), server_default=sa.text('now()'), nullable=True),
+    sa.ForeignKeyConstraint(['canonical_product_id'], ['products.product_id'], ),
+    sa.PrimaryKeyConstraint('product_id')
+    )
+    op.create_index('idx_product_matches_brand_key', 'product_matches', ['brand_key'])
+    op.create_index('idx_product_matches_canonical', 'product_matches', ['canonical_product_id'])
+
+
+def downgrade():
+    op.drop_index('idx_product_matches_canonical', table_name='product_matches')
+    op.drop_index('idx_product_matches_brand_key', table_name='product_matches')
+    op.drop_table('product_matches')
@@ -0,0 +1,32 @@
+"""add product_ingredients
+
+Revision ID: 5d2f8b0c3e41
+Revises: 4c1e7a9b2d30
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5d2f8b0c3e41'
+down_revision = '4c1e7a9b2d30'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('product_ingredients',
+    sa.Column('product_id', sa.Text(), nullable=False),
+    sa.Column('ingredient', sa.Text(), nullable=False),
+    sa.ForeignKeyConstraint(['product_id'], ['products.product_id'], ),
+    sa.PrimaryKeyConstraint('product_id', 'ingredient')
+    )
+    # Lookups go ingredient -> products; the primary key covers product -> ingredients
+    op.create_index('idx_product_ingredients_ingredient', 'product_ingredients', ['ingredient'])
+
+
+def downgrade():
+    op.drop_index('idx_product_ingredients_ingredient', table_name='product_ingredients')
+    op.drop_table('product_ingredients')
@@ -0,0 +1,37 @@
+"""add product search indexes
+
+Revision ID: 6e3a9c1d4f52
+Revises: 5d2f8b0c3e41
+Create Date: 2026-10-19 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '6e3a9c1d4f52'
+down_revision = '5d2f8b0c3e41'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm;")
+
+    # Expressions must match api/server.py exactly for the planner to use these indexes
+    op.execute("""
+    CREATE INDEX idx_products_search_tsv ON products USING GIN (
+        to_tsvector('simple', coalesce(brand, '') || ' ' || coalesce(name, '') || ' ' || coalesce(product_type, ''))
+    );
+    """)
+    op.execute("""
+    CREATE INDEX idx_products_search_trgm ON products USING GIN (
+        (coalesce(brand, '') || ' ' || coalesce(name, '')) gin_trgm_ops
+    );
+    """)
+
+
+def downgrade():
+    op.execute("DROP INDEX idx_products_search_trgm;")
+    op.execute("DROP INDEX idx_products_search_tsv;")
@@ -0,0 +1,54 @@
+"""add price rollups
+
+Revision ID: 7f4b0d2e5a63
+Revises: 6e3a9c1d4f52
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7f4b0d2e5a63'
+down_revision = '6e3a9c1d4f52'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('price_rollups_offer',
+    sa.Column('offer_id', sa.Text(), nullable=False),
+    sa.Column('resolution', sa.Text(), nullable=False),
+    sa.Column('bucket_start', sa.TIMESTAMP(), nullable=False),
+    sa.Column('min_price', sa.Numeric(precision=10, scale=2), nullable=True),
+    sa.Column('max_price', sa.Numeric(precision=10, scale=2), nullable=True),
+    sa.Column('last_price', sa.Numeric(precision=10, scale=2), nullable=True),
+    sa.Column('last_ts', sa.TIMESTAMP(), nullable=True),
+    sa.ForeignKeyConstraint(['offer_id'], ['offers.offer_id'], ),
+    sa.PrimaryKeyConstraint('offer_id', 'resolution', 'bucket_start')
+    )
+    op.create_table('price_rollups_product',
+    sa.Column('product_id', sa.Text(), nullable=False),
+    sa.Column('resolution', sa.Text(), nullable=False),
+    sa.Column('bucket_start', sa.TIMESTAMP(), nullable=False),
+    sa.Column('min_price', sa.Numeric(precision=10, scale=2), nullable=True),
+    sa.Column('max_price', sa.Numeric(precision=10, scale=2), nullable=True),
+    sa.Column('last_price', sa.Numeric(precision=10, scale=2), nullable=True),
+    sa.Column('last_ts', sa.TIMESTAMP(), nullable=True),
+    sa.Column('offer_count', sa.Integer(), nullable=True),
+    sa.ForeignKeyConstraint(['product_id'], ['products.product_id'], ),
+    sa.PrimaryKeyConstraint('product_id', 'resolution', 'bucket_start')
+    )
+    # Rollups are appended in time order, so BRIN indexes stay tiny
+    op.execute("CREATE INDEX idx_price_rollups_offer_bucket ON price_rollups_offer USING BRIN (bucket_start);")
+    op.execute("CREATE INDEX idx_price_rollups_product_bucket ON price_rollups_product USING BRIN (bucket_start);")
+    op.execute("CREATE INDEX idx_price_history_ts ON price_history USING BRIN (ts);")
+
+
+def downgrade():
+    op.execute("DROP INDEX idx_price_history_ts;")
+    op.execute("DROP INDEX idx_price_rollups_product_bucket;")
+    op.execute("DROP INDEX idx_price_rollups_offer_bucket;")
+    op.drop_table('price_rollups_product')
+    op.drop_table('price_rollups_offer')
@@ -0,0 +1,80 @@
+"""partition price_history by month
+
+Revision ID: 8a5c1e3f6b74
+Revises: 7f4b0d2e5a63
+Create Date: 2026-10-19 13:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8a5c1e3f6b74'
+down_revision = '7f4b0d2e5a63'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Step 1: Move the existing table out of the way
+    op.execute("DROP INDEX idx_price_history_ts;")
+    op.execute("ALTER TABLE price_history RENAME TO price_history_unpartitioned;")
+    op.execute("ALTER TABLE price_history_unpartitioned RENAME CONSTRAINT price_history_pkey TO price_history_unpartitioned_pkey;")
+
+    # Step 2: Create the partitioned parent. The default partition only catches
+    # rows outside the monthly partitions created by etl/maintenance.py.
+    op.execute("""
+    CREATE TABLE price_history (
+        offer_id TEXT NOT NULL REFERENCES offers(offer_id),
+        ts TIMESTAMP NOT NULL,
+        price NUMERIC(10, 2),
+        PRIMARY KEY (offer_id, ts)
+    ) PARTITION BY RANGE (ts);
+    """)
+    op.execute("CREATE TABLE price_history_default PARTITION OF price_history DEFAULT;")
+
+    # Step 3: One partition per month of existing data, plus the next three months
+    op.execute("""
+    DO $$
+    DECLARE
+        month_start DATE;
+    BEGIN
+        FOR month_start IN
+            SELECT generate_series(
+                date_trunc('month', COALESCE(MIN(ts), now())),
+                date_trunc('month', now()) + interval '3 months',
+                interval '1 month'
+            )::date
+            FROM price_history_unpartitioned
+        LOOP
+            EXECUTE format(
+                'CREATE TABLE %I PARTITION OF price_history FOR VALUES FROM (%L) TO (%L)',
+                'price_history_' || to_char(month_start, 'YYYYMM'),
+                month_start,
+                (month_start + interval '1 month')::date
+            );
+        END LOOP;
+    END $$;
+    """)
+
+    # Step 4: Copy the data and drop the old table
+    op.execute("INSERT INTO price_history (offer_id, ts, price) SELECT offer_id, ts, price FROM price_history_unpartitioned;")
+    op.execute("DROP TABLE price_history_unpartitioned;")
+    op.execute("CREATE INDEX idx_price_history_ts ON price_history USING BRIN (ts);")
+
+
+def downgrade():
+    op.execute("DROP INDEX idx_price_history_ts;")
+    op.execute("ALTER TABLE price_history RENAME TO price_history_partitioned;")
+    op.execute("ALTER TABLE price_history_partitioned RENAME CONSTRAINT price_history_pkey TO price_history_partitioned_pkey;")
+    op.create_table('price_history',
+    sa.Column('offer_id', sa.Text(), nullable=False),
+    sa.Column('ts', sa.TIMESTAMP(), nullable=False),
+    sa.Column('price', sa.Numeric(precision=10, scale=2), nullable=True),
+    sa.ForeignKeyConstraint(['offer_id'], ['offers.offer_id'], ),
+    sa.PrimaryKeyConstraint('offer_id', 'ts')
+    )
+    op.execute("INSERT INTO price_history (offer_id, ts, price) SELECT offer_id, ts, price FROM price_history_partitioned;")
+    op.execute("DROP TABLE price_history_partitioned;")
+    op.execute("CREATE INDEX idx_price_history_ts ON price_history USING BRIN (ts);")
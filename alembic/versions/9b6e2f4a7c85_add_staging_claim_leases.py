@@ -0,0 +1,29 @@
+"""add staging claim leases
+
+Revision ID: 9b6e2f4a7c85
+Revises: 8a5c1e3f6b74
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9b6e2f4a7c85'
+down_revision = '8a5c1e3f6b74'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # ETL workers lease the staging rows they claim; expired leases can be claimed again
+    op.add_column('staging_raw_offers', sa.Column('claimed_by', sa.Text(), nullable=True))
+    op.add_column('staging_raw_offers', sa.Column('claim_expires_ts', sa.TIMESTAMP(), nullable=True))
+    op.execute("CREATE INDEX idx_staging_unsynced ON staging_raw_offers(last_seen_ts) WHERE etl_sync_ts IS NULL;")
+
+
+def downgrade():
+    op.execute("DROP INDEX idx_staging_unsynced;")
+    op.drop_column('staging_raw_offers', 'claim_expires_ts')
+    op.drop_column('staging_raw_offers', 'claimed_by')
@@ -0,0 +1,25 @@
+"""add staging version
+
+Revision ID: ac7f3a5b8d96
+Revises: 9b6e2f4a7c85
+Create Date: 2026-10-19 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'ac7f3a5b8d96'
+down_revision = '9b6e2f4a7c85'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Incremented by the staging upsert whenever a re-crawl changes json_blob
+    op.add_column('staging_raw_offers', sa.Column('version', sa.BigInteger(), nullable=False, server_default='1'))
+
+
+def downgrade():
+    op.drop_column('staging_raw_offers', 'version')
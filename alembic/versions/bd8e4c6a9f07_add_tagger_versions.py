@@ -0,0 +1,32 @@
+"""add product descriptions and tagger versions
+
+Revision ID: bd8e4c6a9f07
+Revises: ac7f3a5b8d96
+Create Date: 2026-10-19 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'bd8e4c6a9f07'
+down_revision = 'ac7f3a5b8d96'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # The text condition tags are computed from, so they can be recomputed without a re-ETL
+    op.add_column('products', sa.Column('description', sa.Text(), nullable=True))
+    op.create_table('tagger_versions',
+    sa.Column('version', sa.Text(), nullable=False),
+    sa.Column('applied_ts', sa.TIMESTAMP(), server_default=sa.text('now()'), nullable=True),
+    sa.Column('products_changed', sa.Integer(), nullable=True),
+    sa.PrimaryKeyConstraint('version')
+    )
+
+
+def downgrade():
+    op.drop_table('tagger_versions')
+    op.drop_column('products', 'description')
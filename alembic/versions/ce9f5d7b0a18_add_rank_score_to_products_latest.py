@@ -0,0 +1,107 @@
+"""add rank_score to products_latest
+
+Revision ID: ce9f5d7b0a18
+Revises: bd8e4c6a9f07
+Create Date: 2026-10-19 17:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'ce9f5d7b0a18'
+down_revision = 'bd8e4c6a9f07'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute("DROP MATERIALIZED VIEW products_latest;")
+
+    # rank_score blends, in [0, 1]:
+    #   60% Bayesian-smoothed rating: each product's ratings are pulled towards
+    #       the catalog mean with the weight of 3 rated offers, so a lone 5.0
+    #       no longer beats many offers at 4.7
+    #   15% share of offers in stock
+    #   15% log-scaled offer count relative to the most widely sold product
+    #   10% price value: 1 - percentile of min_price within the product type
+    op.execute("""
+    CREATE MATERIALIZED VIEW products_latest AS
+    WITH offer_stats AS (
+        SELECT
+            p.product_id,
+            p.brand,
+            p.name,
+            p.variant,
+            p.ingredients,
+            p.product_type,
+            MIN(o.price) as min_price,
+            MAX(o.price) as max_price,
+            AVG(o.price) as avg_price,
+            AVG(o.rating) as avg_rating,
+            COUNT(o.rating) as rating_count,
+            COUNT(o.offer_id) as offer_count,
+            COUNT(o.offer_id) FILTER (WHERE o.availability = 'in_stock') as in_stock_count,
+            MAX(o.last_seen_ts) as last_seen_ts
+        FROM products p
+        LEFT JOIN offers o ON p.product_id = o.product_id
+        GROUP BY p.product_id, p.brand, p.name, p.variant, p.ingredients, p.product_type
+    ),
+    prior AS (
+        SELECT
+            (SELECT AVG(rating) FROM offers) as mean_rating,
+            (SELECT MAX(offer_count) FROM offer_stats) as max_offers
+    )
+    SELECT
+        s.product_id,
+        s.brand,
+        s.name,
+        s.variant,
+        s.ingredients,
+        s.min_price,
+        s.max_price,
+        s.avg_price,
+        s.avg_rating,
+        s.offer_count,
+        s.last_seen_ts,
+        (
+            0.60 * COALESCE((3 * pr.mean_rating + s.rating_count * COALESCE(s.avg_rating, 0)) / (3 + s.rating_count) / 5, 0)
+          + 0.15 * COALESCE(s.in_stock_count::numeric / NULLIF(s.offer_count, 0), 0)
+          + 0.15 * COALESCE(LN(1 + s.offer_count) / NULLIF(LN(1 + pr.max_offers), 0), 0)
+          + 0.10 * CASE WHEN s.min_price IS NULL THEN 0
+                        ELSE 1 - PERCENT_RANK() OVER (PARTITION BY s.product_type, s.min_price IS NULL ORDER BY s.min_price)
+                   END
+        )::float8 as rank_score
+    FROM offer_stats s
+    CROSS JOIN prior pr;
+    """)
+
+    op.execute("CREATE INDEX idx_products_latest_min_price ON products_latest(min_price);")
+    op.execute("CREATE INDEX idx_products_latest_avg_rating ON products_latest(avg_rating);")
+    # Lets sort=score walk the index and stop after LIMIT rows
+    op.execute("CREATE INDEX idx_products_latest_rank_score ON products_latest(rank_score DESC, product_id);")
+
+
+def downgrade():
+    op.execute("DROP MATERIALIZED VIEW products_latest;")
+    op.execute("""
+    CREATE MATERIALIZED VIEW products_latest AS
+    SELECT 
+        p.product_id,
+        p.brand,
+        p.name,
+        p.variant,
+        p.ingredients,
+        MIN(o.price) as min_price,
+        MAX(o.price) as max_price,
+        AVG(o.price) as avg_price,
+        AVG(o.rating) as avg_rating,
+        COUNT(o.offer_id) as offer_count,
+        MAX(o.last_seen_ts) as last_seen_ts
+    FROM products p
+    LEFT JOIN offers o ON p.product_id = o.product_id
+    GROUP BY p.product_id, p.brand, p.name, p.variant, p.ingredients;
+    """)
+    op.execute("CREATE INDEX idx_products_latest_min_price ON products_latest(min_price);")
+    op.execute("CREATE INDEX idx_products_latest_avg_rating ON products_latest(avg_rating);")
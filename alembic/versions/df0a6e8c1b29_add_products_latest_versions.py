@@ -0,0 +1,35 @@
+"""add products_latest_versions
+
+Revision ID: df0a6e8c1b29
+Revises: ce9f5d7b0a18
+Create Date: 2026-10-19 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'df0a6e8c1b29'
+down_revision = 'ce9f5d7b0a18'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # One row per build of products_latest; the API keys its response cache on the active version
+    op.create_table('products_latest_versions',
+    sa.Column('version', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('mode', sa.Text(), nullable=False),
+    sa.Column('state', sa.Text(), nullable=False),
+    sa.Column('row_count', sa.BigInteger(), nullable=True),
+    sa.Column('build_seconds', sa.Float(), nullable=True),
+    sa.Column('built_ts', sa.TIMESTAMP(), server_default=sa.text('now()'), nullable=True),
+    sa.PrimaryKeyConstraint('version')
+    )
+    op.create_index('idx_products_latest_versions_state', 'products_latest_versions', ['state'])
+
+
+def downgrade():
+    op.drop_index('idx_products_latest_versions_state', table_name='products_latest_versions')
+    op.drop_table('products_latest_versions')
@@ -0,0 +1,30 @@
+"""add detection_condition_counts
+
+Revision ID: e1a7b9d2c4f3
+Revises: df0a6e8c1b29
+Create Date: 2026-10-19 19:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e1a7b9d2c4f3'
+down_revision = 'df0a6e8c1b29'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Daily detections per condition, maintained by the API's ingest flusher
+    op.create_table('detection_condition_counts',
+    sa.Column('condition', sa.Text(), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('count', sa.BigInteger(), nullable=False),
+    sa.PrimaryKeyConstraint('condition', 'day')
+    )
+
+
+def downgrade():
+    op.drop_table('detection_condition_counts')
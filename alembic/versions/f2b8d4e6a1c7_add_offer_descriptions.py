@@ -0,0 +1,33 @@
+"""add offer descriptions
+
+Revision ID: f2b8d4e6a1c7
+Revises: e1a7b9d2c4f3
+Create Date: 2026-10-20 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f2b8d4e6a1c7'
+down_revision = 'e1a7b9d2c4f3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Each retailer describes a product differently; products.description is
+    # the union of its offers' descriptions, so tags don't depend on which
+    # retailer was loaded last
+    op.add_column('offers', sa.Column('description', sa.Text(), nullable=True))
+    # Until they are re-crawled, existing offers keep the text their product was tagged from
+    op.execute("""
+    UPDATE offers o SET description = p.description
+    FROM products p
+    WHERE o.product_id = p.product_id AND p.description IS NOT NULL;
+    """)
+
+
+def downgrade():
+    op.drop_column('offers', 'description')
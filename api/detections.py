@@ -0,0 +1,129 @@
+import asyncio
+import csv
+import io
+import logging
+import threading
+from collections import Counter
+from datetime import datetime
+from typing import Optional
+
+from pydantic import BaseModel
+from sqlalchemy import text
+
+from core.metrics import DETECTIONS_DROPPED, DETECTIONS_WRITTEN
+
+logger = logging.getLogger("api.detections")
+
+COUNTS_UPSERT_SQL = """
+INSERT INTO detection_condition_counts (condition, day, count)
+SELECT * FROM unnest(CAST(:conditions AS text[]), CAST(:days AS date[]), CAST(:counts AS bigint[]))
+ON CONFLICT (condition, day) DO UPDATE SET count = detection_condition_counts.count + EXCLUDED.count
+"""
+
+
+class DetectionEvent(BaseModel):
+    condition: str
+    area: Optional[str] = None
+    ts: Optional[datetime] = None
+
+
+class DetectionBuffer:
+    """
+    Bounded in-memory queue of accepted detection events.
+
+    `add` is all-or-nothing: a batch that doesn't fit is refused, so callers
+    can tell clients to back off instead of silently losing events. Anything
+    accepted but not yet flushed is lost if the process dies, which bounds the
+    loss to `capacity` events.
+    """
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.events = []
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.events)
+
+    def add(self, events):
+        with self.lock:
+            if len(self.events) + len(events) > self.capacity:
+                return False
+            self.events.extend(events)
+            return True
+
+    def take(self, limit):
+        """Remove and return up to `limit` of the oldest events."""
+        with self.lock:
+            taken, self.events = self.events[:limit], self.events[limit:]
+            return taken
+
+    def requeue(self, events):
+        """Put back events whose write failed, dropping whatever no longer fits."""
+        with self.lock:
+            room = max(self.capacity - len(self.events), 0)
+            self.events[:0] = events[:room]
+            return len(events) - min(room, len(events))
+
+
+def write_detections(engine, events):
+    """COPY a batch into detection_logs and add it to the daily per-condition counts."""
+    rows = io.StringIO()
+    writer = csv.writer(rows)
+    counts = Counter()
+    for event in events:
+        writer.writerow([event.condition, event.area if event.area is not None else r'\N', event.ts.isoformat()])
+        counts[(event.condition, event.ts.date())] += 1
+    rows.seek(0)
+    keys = sorted(counts)
+
+    with engine.begin() as connection:
+        # COPY through the DBAPI cursor so it shares the counts upsert's transaction
+        cursor = connection.connection.cursor()
+        cursor.copy_expert(r"COPY detection_logs (condition, area, ts) FROM STDIN WITH (FORMAT csv, NULL '\N')", rows)
+        connection.execute(text(COUNTS_UPSERT_SQL), {
+            'conditions': [condition for condition, _ in keys],
+            'days': [day for _, day in keys],
+            'counts': [counts[key] for key in keys],
+        })
+
+
+class DetectionFlusher:
+    """Background task that drains the buffer into the database in batches."""
+
+    def __init__(self, buffer, engine, interval=1.0, batch_size=5000):
+        self.buffer = buffer
+        self.engine = engine
+        self.interval = interval
+        self.batch_size = batch_size
+        self.task = None
+
+    def start(self):
+        self.task = asyncio.get_running_loop().create_task(self.run())
+
+    async def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+        # Write out whatever was accepted before shutdown
+        await self.flush()
+
+    async def run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.flush()
+
+    async def flush(self):
+        while len(self.buffer):
+            batch = self.buffer.take(self.batch_size)
+            try:
+                await asyncio.to_thread(write_detections, self.engine, batch)
+            except Exception as e:
+                dropped = self.buffer.requeue(batch)
+                DETECTIONS_DROPPED.inc(dropped)
+                logger.error(f"Failed to write {len(batch)} detections ({dropped} dropped): {e}")
+                return
+            DETECTIONS_WRITTEN.inc(len(batch))
@@ -0,0 +1,95 @@
+import threading
+import time
+from collections import OrderedDict
+from decimal import Decimal
+
+import orjson
+from fastapi import Response
+
+
+def _default(value):
+    # Queries cast numerics to float8; this only catches columns that weren't
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def rows_to_json(rows):
+    """
+    Serialize result rows straight to JSON bytes, one object per row keyed by
+    column name. orjson writes NaN and Infinity as null, so no per-value checks
+    are needed.
+    """
+    if not rows:
+        return b"[]"
+    keys = rows[0]._fields
+    return orjson.dumps([dict(zip(keys, row)) for row in rows], default=_default)
+
+
+def to_json(content):
+    """Encode a response body that isn't made of result rows."""
+    return orjson.dumps(content, default=_default)
+
+
+def group_rows_to_json(rows, indexes):
+    """
+    Split batched rows, whose first two columns are the request index and
+    position, into one encoded JSON array per index in `indexes`.
+    """
+    groups = {i: [] for i in indexes}
+    if rows:
+        keys = rows[0]._fields[2:]
+        for row in rows:
+            groups[row[0]].append(dict(zip(keys, row[2:])))
+    return {i: orjson.dumps(group, default=_default) for i, group in groups.items()}
+
+
+def json_response(body, headers=None, status_code=200):
+    """Return pre-encoded JSON bytes as they are; FastAPI neither validates nor re-encodes a Response."""
+    return Response(content=body, status_code=status_code, media_type="application/json", headers=headers)
+
+
+def cache_key(*parts):
+    """A stable key for a request: its route plus its parameters with sorted keys."""
+    return orjson.dumps(parts, option=orjson.OPT_SORT_KEYS)
+
+
+class ResponseCache:
+    """Thread-safe LRU of encoded responses that expire `ttl` seconds after being stored."""
+
+    def __init__(self, ttl, max_entries=1024):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return self.ttl > 0
+
+    def get(self, key):
+        if not self.enabled:
+            return None
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            expires, body = entry
+            if expires < time.monotonic():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return body
+
+    def put(self, key, body):
+        if not self.enabled:
+            return
+        with self.lock:
+            self.entries[key] = (time.monotonic() + self.ttl, body)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
@@ -1,17 +1,57 @@
 import sys
-import math
+import re
+import time
+from contextlib import asynccontextmanager
 from pathlib import Path
-from fastapi import FastAPI, HTTPException
+from datetime import datetime, timedelta
+from fastapi import FastAPI, HTTPException, Request, Response
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import List, Literal, Optional, Union
 from sqlalchemy import text
 
 # Add project root to sys.path
 sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
 
-from core.database import SessionLocal
+import config
+from api.detections import DetectionBuffer, DetectionEvent, DetectionFlusher
+from api.serialization import ResponseCache, cache_key, group_rows_to_json, json_response, rows_to_json, to_json
+from api.tracing import LatencyWindow, RequestTrace, acquire, current_trace, instrument_engine, server_timing, span
+from core.database import engine, read_engine, read_session
+from core.ingredients import expand_ingredient_query
+from core.metrics import CONTENT_TYPE_LATEST, DETECTIONS_REJECTED, REQUEST_SECONDS, latest
 
-app = FastAPI()
+# Detections are acknowledged once buffered and written to detection_logs in the background
+detection_buffer = DetectionBuffer(config.DETECTION_BUFFER_SIZE)
+detection_flusher = DetectionFlusher(detection_buffer, engine, config.DETECTION_FLUSH_INTERVAL, config.DETECTION_FLUSH_BATCH)
+
+@asynccontextmanager
+async def lifespan(app):
+    detection_flusher.start()
+    yield
+    await detection_flusher.stop()
+
+app = FastAPI(lifespan=lifespan)
+
+# Reads go to read_engine; engine serves them while the replica is too stale
+for traced_engine in (engine, read_engine):
+    instrument_engine(traced_engine, config.SLOW_QUERY_MS, config.SLOW_QUERY_EXPLAIN)
+latency_window = LatencyWindow(config.LATENCY_WINDOW_SIZE)
+response_cache = ResponseCache(config.RESPONSE_CACHE_TTL, config.RESPONSE_CACHE_SIZE)
+
+# Cached responses are keyed on the active products_latest build, so a view swap
+# or refresh invalidates them without waiting for the TTL
+VIEW_VERSION_SQL = "SELECT max(version) FROM products_latest_versions WHERE state = 'active'"
+view_version = {"value": None, "checked": None}
+
+# Must match the expressions indexed in the product search migration
+SEARCH_TSV = "to_tsvector('simple', coalesce(pr.brand, '') || ' ' || coalesce(pr.name, '') || ' ' || coalesce(pr.product_type, ''))"
+SEARCH_TEXT = "(coalesce(pr.brand, '') || ' ' || coalesce(pr.name, ''))"
+
+# ProductRecommendation fields, cast in SQL so rows serialize without Python-side conversion
+# (nothing validates them against the model; see encoded_json)
+RECOMMENDATION_COLUMNS = """p.product_id, coalesce(p.brand, '') AS brand, coalesce(p.name, '') AS name,
+        p.min_price::float8 AS min_price, p.avg_rating::float8 AS avg_rating, p.offer_count"""
 
 class RecommendationRequest(BaseModel):
     conditions: List[str]
@@ -19,6 +59,8 @@ class RecommendationRequest(BaseModel):
     budget_min: Optional[float] = None
     sort: str = "rating"
     limit: int = 10
+    include_ingredients: Optional[List[str]] = None
+    exclude_ingredients: Optional[List[str]] = None
 
 class ProductRecommendation(BaseModel):
     product_id: str
@@ -28,84 +70,349 @@ class ProductRecommendation(BaseModel):
     avg_rating: Optional[float]
     offer_count: int
 
+class PricePoint(BaseModel):
+    bucket_start: datetime
+    min_price: Optional[float]
+    max_price: Optional[float]
+    last_price: Optional[float]
+
+def encoded_json(model, description="Successful Response"):
+    """
+    OpenAPI `responses` for a route that returns pre-encoded JSON bytes. The
+    model only documents the body: unlike response_model, nothing validates
+    it, so the SQL must select exactly its fields.
+    """
+    return {200: {"model": model, "description": description}}
+
+# API resolution names -> date_trunc fields stored in the rollup tables
+PRICE_RESOLUTIONS = {"daily": "day", "weekly": "week"}
+
+def current_view_version():
+    """The active products_latest version, re-read at most every VIEW_VERSION_TTL seconds."""
+    now = time.monotonic()
+    if view_version["checked"] is None or now - view_version["checked"] >= config.VIEW_VERSION_TTL:
+        view_version["checked"] = now
+        try:
+            with read_engine.connect() as connection:
+                view_version["value"] = connection.execute(text(VIEW_VERSION_SQL)).scalar()
+        except Exception:
+            view_version["value"] = None
+    return view_version["value"]
+
+def build_prefix_tsquery(q):
+    """Turn free text into a tsquery where every word matches as a prefix."""
+    words = re.findall(r"\w+", q.lower())
+    return " & ".join(f"{word}:*" for word in words)
+
+# ORDER BY clauses for RecommendationRequest.sort; unknown values sort by rating
+RECOMMEND_ORDER = {
+    "rating": "p.avg_rating DESC NULLS LAST, p.min_price ASC",
+    "price_low": "p.min_price ASC, p.avg_rating DESC NULLS LAST",
+    "price_high": "p.min_price DESC, p.avg_rating DESC NULLS LAST",
+    "brand": "p.brand ASC, p.avg_rating DESC NULLS LAST",
+    # Precomputed during view refresh; matches idx_products_latest_rank_score
+    "score": "p.rank_score DESC, p.product_id",
+}
+
+# Upper bound on requests accepted by /recommend/batch
+MAX_BATCH_REQUESTS = 20
+
+def build_recommend_query(request, batch_index=None):
+    """
+    SQL and parameters for one recommendation request. With `batch_index`, the
+    parameter names are suffixed so several requests can share one statement,
+    and each row carries its request index and position within the result.
+    """
+    suffix = "" if batch_index is None else f"_{batch_index}"
+    order_by = RECOMMEND_ORDER.get(request.sort, RECOMMEND_ORDER["rating"])
+    columns = RECOMMENDATION_COLUMNS
+    if batch_index is not None:
+        columns = f"{batch_index} AS request_index, row_number() OVER (ORDER BY {order_by}) AS position, {columns}"
+
+    # Base query with condition filtering; EXISTS instead of a join, so
+    # products matching several conditions need no DISTINCT
+    query_parts = [f"""
+    SELECT {columns}
+    FROM products_latest p
+    WHERE EXISTS (
+        SELECT 1 FROM condition_tags ct
+        WHERE ct.product_id = p.product_id AND ct.condition = ANY(:conditions{suffix}))
+    """]
+    params = {f'conditions{suffix}': request.conditions}
+
+    # Add budget filters
+    if request.budget_min is not None:
+        query_parts.append(f"AND p.min_price >= :budget_min{suffix}")
+        params[f'budget_min{suffix}'] = request.budget_min
+
+    if request.budget_max is not None:
+        query_parts.append(f"AND p.min_price <= :budget_max{suffix}")
+        params[f'budget_max{suffix}'] = request.budget_max
+
+    # Add ingredient filters, answered from the product_ingredients index
+    for i, term in enumerate(request.include_ingredients or []):
+        query_parts.append(f"""AND EXISTS (
+            SELECT 1 FROM product_ingredients pi
+            WHERE pi.product_id = p.product_id AND pi.ingredient = ANY(:include_{i}{suffix}))""")
+        params[f'include_{i}{suffix}'] = expand_ingredient_query(term)
+
+    excluded = [name for term in request.exclude_ingredients or [] for name in expand_ingredient_query(term)]
+    if excluded:
+        query_parts.append(f"""AND NOT EXISTS (
+            SELECT 1 FROM product_ingredients pi
+            WHERE pi.product_id = p.product_id AND pi.ingredient = ANY(:exclude_ingredients{suffix}))""")
+        params[f'exclude_ingredients{suffix}'] = excluded
+
+    # Add price filter to exclude products without prices
+    query_parts.append("AND p.min_price IS NOT NULL")
+
+    # Add sorting and limit
+    query_parts.append(f"ORDER BY {order_by}")
+    query_parts.append(f"LIMIT :limit{suffix}")
+    params[f'limit{suffix}'] = request.limit
+
+    return " ".join(query_parts), params
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    trace = RequestTrace()
+    token = current_trace.set(trace)
+    try:
+        response = await call_next(request)
+    finally:
+        current_trace.reset(token)
+    timings = trace.finish()
+    # Label by route template, not raw path, so product IDs don't explode cardinality
+    route = request.scope.get("route")
+    path = route.path if route is not None else "unmatched"
+    REQUEST_SECONDS.labels(request.method, path, response.status_code).observe(timings["total"])
+    latency_window.record(f"{request.method} {path}", timings)
+    response.headers["Server-Timing"] = server_timing(timings)
+    return response
+
 @app.get("/healthz")
 def health_check():
-    return {"status": "ok"}
+    with span("serialize"):
+        return json_response(to_json({"status": "ok"}))
 
-@app.post("/recommend", response_model=List[ProductRecommendation])
+@app.get("/metrics")
+def metrics():
+    return Response(latest(), media_type=CONTENT_TYPE_LATEST)
+
+@app.get("/debug/latency", include_in_schema=config.DEBUG_ENDPOINTS)
+def latency_summary():
+    """p50/p95/p99 per route, in milliseconds, split into acquire/execute/fetch/serialize."""
+    # Internal timings stay private unless the deployment opts in
+    if not config.DEBUG_ENDPOINTS:
+        raise HTTPException(status_code=404, detail="Not Found")
+    with span("serialize"):
+        return json_response(to_json(latency_window.summary()))
+
+@app.post("/recommend", response_class=ORJSONResponse, responses=encoded_json(List[ProductRecommendation]))
 def recommend_products(request: RecommendationRequest):
     """
     Get product recommendations based on skin conditions and budget.
     """
-    session = SessionLocal()
+    key = cache_key("recommend", current_view_version(), request.model_dump())
+    body = response_cache.get(key)
+    if body is not None:
+        return json_response(body, {"X-Cache": "hit"})
+
+    session = read_session()
+    try:
+        acquire(session)
+        query, params = build_recommend_query(request)
+        result = session.execute(text(query), params)
+        with span("fetch"):
+            rows = result.fetchall()
+
+        # Format results
+        with span("serialize"):
+            body = rows_to_json(rows)
+        response_cache.put(key, body)
+        return json_response(body, {"X-Cache": "miss"})
+
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Database query failed: {str(e)}")
+    finally:
+        session.close()
+
+@app.post("/recommend/batch", response_class=ORJSONResponse, responses=encoded_json(List[List[ProductRecommendation]]))
+def recommend_products_batch(requests: List[RecommendationRequest]):
+    """
+    Answer several recommendation requests in one database round trip.
+    Results come back in request order; cached requests are not re-queried.
+    """
+    if len(requests) > MAX_BATCH_REQUESTS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_REQUESTS} requests per batch")
+
+    version = current_view_version()
+    keys = [cache_key("recommend", version, request.model_dump()) for request in requests]
+    bodies = [response_cache.get(key) for key in keys]
+    missing = [i for i, body in enumerate(bodies) if body is None]
+
+    if missing:
+        session = read_session()
+        try:
+            acquire(session)
+            # Each request keeps its own plan and ORDER BY/LIMIT as one UNION ALL branch
+            branches, params = [], {}
+            for i in missing:
+                query, branch_params = build_recommend_query(requests[i], batch_index=i)
+                branches.append(f"({query})")
+                params.update(branch_params)
+            query = f"SELECT * FROM ({' UNION ALL '.join(branches)}) b ORDER BY request_index, position"
+            result = session.execute(text(query), params)
+            with span("fetch"):
+                rows = result.fetchall()
+
+            with span("serialize"):
+                for i, body in group_rows_to_json(rows, missing).items():
+                    bodies[i] = body
+                    response_cache.put(keys[i], body)
+
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Database query failed: {str(e)}")
+        finally:
+            session.close()
+
+    return json_response(b"[" + b",".join(bodies) + b"]", {"X-Cache": f"hits={len(requests) - len(missing)}"})
+
+@app.get("/search", response_class=ORJSONResponse, responses=encoded_json(List[ProductRecommendation]))
+def search_products(q: str, budget_min: Optional[float] = None, budget_max: Optional[float] = None, limit: int = 10):
+    """
+    Search products by brand, name or product type. Every word matches as a
+    prefix, so partial input works for typeahead; near-miss spellings fall
+    back to trigram similarity.
+    """
+    tsquery = build_prefix_tsquery(q)
+    if not tsquery:
+        return []
+
+    key = cache_key("search", current_view_version(), q, budget_min, budget_max, limit)
+    body = response_cache.get(key)
+    if body is not None:
+        return json_response(body, {"X-Cache": "hit"})
+
+    session = read_session()
     try:
-        # Build the base query
-        query_parts = []
-        params = {}
-        
-        # Base query with condition filtering
-        base_query = """
-        SELECT DISTINCT p.product_id, p.brand, p.name, p.min_price, p.avg_rating, p.offer_count
-        FROM products_latest p
-        JOIN condition_tags ct ON p.product_id = ct.product_id
-        WHERE ct.condition = ANY(:conditions)
-        """
-        query_parts.append(base_query)
-        params['conditions'] = request.conditions
-        
+        acquire(session)
+        query_parts = [f"""
+        SELECT {RECOMMENDATION_COLUMNS}
+        FROM products pr
+        JOIN products_latest p ON p.product_id = pr.product_id
+        WHERE ({SEARCH_TSV} @@ to_tsquery('simple', :tsquery) OR {SEARCH_TEXT} % :q)
+        AND p.min_price IS NOT NULL
+        """]
+        params = {'tsquery': tsquery, 'q': q, 'limit': limit}
+
         # Add budget filters
-        if request.budget_min is not None:
+        if budget_min is not None:
             query_parts.append("AND p.min_price >= :budget_min")
-            params['budget_min'] = request.budget_min
-            
-        if request.budget_max is not None:
+            params['budget_min'] = budget_min
+
+        if budget_max is not None:
             query_parts.append("AND p.min_price <= :budget_max")
-            params['budget_max'] = request.budget_max
-        
-        # Add price filter to exclude products without prices
-        query_parts.append("AND p.min_price IS NOT NULL")
-        
-        # Add sorting
-        if request.sort == "rating":
-            query_parts.append("ORDER BY p.avg_rating DESC NULLS LAST, p.min_price ASC")
-        elif request.sort == "price_low":
-            query_parts.append("ORDER BY p.min_price ASC, p.avg_rating DESC NULLS LAST")
-        elif request.sort == "price_high":
-            query_parts.append("ORDER BY p.min_price DESC, p.avg_rating DESC NULLS LAST")
-        elif request.sort == "brand":
-            query_parts.append("ORDER BY p.brand ASC, p.avg_rating DESC NULLS LAST")
+            params['budget_max'] = budget_max
+
+        # Rank by text relevance, then by rating
+        query_parts.append(f"""
+        ORDER BY ts_rank({SEARCH_TSV}, to_tsquery('simple', :tsquery)) + similarity({SEARCH_TEXT}, :q) DESC,
+                 p.avg_rating DESC NULLS LAST
+        LIMIT :limit
+        """)
+
+        result = session.execute(text(" ".join(query_parts)), params)
+        with span("fetch"):
+            rows = result.fetchall()
+        with span("serialize"):
+            body = rows_to_json(rows)
+        response_cache.put(key, body)
+        return json_response(body, {"X-Cache": "miss"})
+
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Database query failed: {str(e)}")
+    finally:
+        session.close()
+
+@app.post("/detections", status_code=202)
+async def ingest_detections(events: Union[DetectionEvent, List[DetectionEvent]]):
+    """
+    Record one detection event or a batch. Events are buffered and written in
+    bulk; when the buffer is full the whole request is refused with 503.
+    """
+    if isinstance(events, DetectionEvent):
+        events = [events]
+    now = datetime.now()
+    events = [event if event.ts is not None else event.model_copy(update={"ts": now}) for event in events]
+    if not detection_buffer.add(events):
+        DETECTIONS_REJECTED.inc(len(events))
+        raise HTTPException(status_code=503, detail="Detection buffer is full", headers={"Retry-After": "1"})
+    with span("serialize"):
+        return json_response(to_json({"accepted": len(events)}), status_code=202)
+
+@app.get("/detections/popularity")
+def detection_popularity(days: int = 30):
+    """Detections per condition over the last `days` days, most detected first."""
+    session = read_session()
+    try:
+        acquire(session)
+        result = session.execute(text("""
+        SELECT condition, sum(count)::bigint AS detections
+        FROM detection_condition_counts
+        WHERE day >= current_date - :days
+        GROUP BY condition
+        ORDER BY detections DESC, condition
+        """), {'days': days})
+        with span("fetch"):
+            rows = result.fetchall()
+        with span("serialize"):
+            return json_response(rows_to_json(rows))
+
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Database query failed: {str(e)}")
+    finally:
+        session.close()
+
+@app.get("/products/{product_id}/price-history", response_class=ORJSONResponse, responses=encoded_json(List[PricePoint]))
+def price_history(product_id: str, resolution: Literal["daily", "weekly"] = "daily", days: int = 90, offer_id: Optional[str] = None):
+    """
+    Price trend for a product (or one of its offers) read from the rollup tables.
+    """
+    session = read_session()
+    try:
+        acquire(session)
+        params = {
+            'product_id': product_id,
+            'resolution': PRICE_RESOLUTIONS[resolution],
+            'since': datetime.utcnow() - timedelta(days=days),
+        }
+        if offer_id is None:
+            query = """
+            SELECT bucket_start, min_price::float8 AS min_price, max_price::float8 AS max_price,
+                   last_price::float8 AS last_price
+            FROM price_rollups_product
+            WHERE product_id = :product_id AND resolution = :resolution AND bucket_start >= :since
+            ORDER BY bucket_start
+            """
         else:
-            query_parts.append("ORDER BY p.avg_rating DESC NULLS LAST, p.min_price ASC")
-        
-        # Add limit
-        query_parts.append("LIMIT :limit")
-        params['limit'] = request.limit
-        
-        # Execute query
-        full_query = " ".join(query_parts)
-        result = session.execute(text(full_query), params).fetchall()
-        
-        # Format results
-        recommendations = []
-        for row in result:
-            # Handle NaN values in avg_rating
-            avg_rating = row[4]
-            if avg_rating is not None:
-                avg_rating = float(avg_rating)
-                if math.isnan(avg_rating):  # Check for NaN
-                    avg_rating = None
-            
-            recommendations.append(ProductRecommendation(
-                product_id=row[0],
-                brand=row[1] or "",
-                name=row[2] or "",
-                min_price=float(row[3]) if row[3] is not None else None,
-                avg_rating=avg_rating,
-                offer_count=int(row[5]) if row[5] is not None else 0
-            ))
-        
-        return recommendations
-        
+            query = """
+            SELECT r.bucket_start, r.min_price::float8 AS min_price, r.max_price::float8 AS max_price,
+                   r.last_price::float8 AS last_price
+            FROM price_rollups_offer r
+            JOIN offers o ON o.offer_id = r.offer_id
+            WHERE r.offer_id = :offer_id AND o.product_id = :product_id
+              AND r.resolution = :resolution AND r.bucket_start >= :since
+            ORDER BY r.bucket_start
+            """
+            params['offer_id'] = offer_id
+
+        result = session.execute(text(query), params)
+        with span("fetch"):
+            rows = result.fetchall()
+        with span("serialize"):
+            return json_response(rows_to_json(rows))
+
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Database query failed: {str(e)}")
     finally:
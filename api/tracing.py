@@ -0,0 +1,142 @@
+import logging
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from sqlalchemy import event
+
+logger = logging.getLogger("api.slow_query")
+
+# Spans recorded per request. Routes encode their JSON bodies themselves inside
+# "serialize" and return a Response, so FastAPI does no response_model work;
+# what is left of the total (routing, request validation, middleware) is
+# reported as "framework".
+SPANS = ("acquire", "execute", "fetch", "serialize")
+
+current_trace = ContextVar("current_trace", default=None)
+
+
+class RequestTrace:
+    """Accumulated span durations (seconds) and query count for one request."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.spans = dict.fromkeys(SPANS, 0.0)
+        self.queries = 0
+
+    def add(self, name, seconds):
+        self.spans[name] = self.spans.get(name, 0.0) + seconds
+
+    def finish(self):
+        total = time.perf_counter() - self.started
+        timings = dict(self.spans)
+        timings["framework"] = max(total - sum(self.spans.values()), 0.0)
+        timings["total"] = total
+        return timings
+
+
+@contextmanager
+def span(name):
+    """Time a block into the current request's trace (no-op outside a request)."""
+    trace = current_trace.get()
+    if trace is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        trace.add(name, time.perf_counter() - started)
+
+
+def server_timing(timings):
+    """Format timings as a Server-Timing header value (milliseconds)."""
+    return ", ".join(f"{name};dur={seconds * 1000:.2f}" for name, seconds in timings.items())
+
+
+def percentile(values, q):
+    """The q-th percentile (0-100) of `values` by linear interpolation."""
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    position = (len(ordered) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+class LatencyWindow:
+    """The last `size` request timings per route, summarized as percentiles."""
+
+    def __init__(self, size=1000):
+        self.size = size
+        self.routes = defaultdict(lambda: deque(maxlen=self.size))
+
+    def record(self, route, timings):
+        self.routes[route].append(timings)
+
+    def summary(self, percentiles=(50, 95, 99)):
+        result = {}
+        for route, samples in sorted(self.routes.items()):
+            names = samples[0].keys()
+            result[route] = {
+                "count": len(samples),
+                **{
+                    name: {f"p{q}": round(percentile([s[name] for s in samples], q) * 1000, 3) for q in percentiles}
+                    for name in names
+                },
+            }
+        return result
+
+
+def instrument_engine(engine, slow_query_ms, explain=False):
+    """
+    Record query time into the current request's trace and log statements slower than `slow_query_ms` with their parameters. With
+    `explain`, slow SELECTs are logged with their EXPLAIN plan as well.
+    """
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_started"].pop()
+        trace = current_trace.get()
+        if trace is not None:
+            trace.add("execute", elapsed)
+            trace.queries += 1
+        if elapsed * 1000 >= slow_query_ms:
+            plan = explain_plan(conn, statement, parameters) if explain and not executemany else None
+            logger.warning(
+                "Slow query (%.1f ms): %s | params=%r%s",
+                elapsed * 1000, " ".join(statement.split()), parameters,
+                f"\n{plan}" if plan else "",
+            )
+
+
+def explain_plan(conn, statement, parameters):
+    """EXPLAIN a SELECT on the same connection; None for other statements."""
+    if not statement.lstrip().upper().startswith(("SELECT", "WITH")):
+        return None
+    cursor = conn.connection.cursor()
+    # A savepoint keeps a failed EXPLAIN from aborting the request's transaction
+    cursor.execute("SAVEPOINT explain_plan")
+    try:
+        cursor.execute(f"EXPLAIN {statement}", parameters)
+        plan = "\n".join(str(row[0]) for row in cursor.fetchall())
+        cursor.execute("RELEASE SAVEPOINT explain_plan")
+        return plan
+    except Exception as e:
+        cursor.execute("ROLLBACK TO SAVEPOINT explain_plan")
+        return f"EXPLAIN failed: {e}"
+    finally:
+        cursor.close()
+
+
+def acquire(session):
+    """Check out the session's connection inside the acquire span."""
+    with span("acquire"):
+        session.connection()
+    return session
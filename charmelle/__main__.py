@@ -0,0 +1,5 @@
+import sys
+
+from charmelle.cli import main
+
+sys.exit(main())
@@ -0,0 +1,138 @@
+import os
+import re
+import runpy
+import subprocess
+import sys
+from pathlib import Path
+
+# `python -m charmelle <command> [args...]`. Each command runs an existing
+# script as __main__, so its own argparse handles the arguments and only that
+# command's dependencies are imported: a view refresh never loads pandas,
+# BeautifulSoup or Scrapy. Keep imports at the top of this file to the
+# standard library.
+
+ROOT = Path(__file__).resolve().parents[1]
+
+# command -> (module, arguments prepended to the user's, help)
+COMMANDS = {
+    "etl": ("etl.load_to_db", [], "Load unsynced staging offers into the catalog."),
+    "refresh": ("etl.refresh_view", [], "Refresh or swap products_latest."),
+    "retag": ("etl.retag", [], "Recompute condition tags after CONDITION_MAP changes."),
+    "maintenance": ("etl.maintenance", [], "Partition and retention maintenance."),
+    "ingest-segments": ("etl.ingest_segments", [], "Load crawler segment files."),
+}
+
+# backfill target -> (module, arguments prepended to the user's, help)
+BACKFILLS = {
+    "retailers": ("update_retailer", [], "Fill staging_raw_offers.retailer from offer IDs."),
+    "tags": ("etl.retag", ["--force"], "Re-tag every product, even if the tagger version was applied."),
+    "ingredients": ("etl.load_to_db", ["--reindex-ingredients"], "Rebuild the ingredient index."),
+    "matches": ("etl.load_to_db", ["--rebuild-matches"], "Re-cluster the catalog into canonical products."),
+    "rollups": ("etl.rollups", [], "Rebuild price history rollups."),
+}
+
+# `python -X importtime` lines: self and cumulative microseconds, then the
+# module name indented by its nesting depth
+IMPORTTIME_RE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+
+
+def usage():
+    lines = ["usage: python -m charmelle <command> [args...]", "", "commands:"]
+    lines.append(f"  {'crawl':<16} Run a spider (arguments as for `scrapy crawl`).")
+    lines.extend(f"  {name:<16} {help_text}" for name, (_, _, help_text) in COMMANDS.items())
+    lines.append(f"  {'backfill':<16} One-off backfills: {', '.join(BACKFILLS)}.")
+    lines.append(f"  {'importtime':<16} Report the import cost of a command's startup.")
+    return "\n".join(lines)
+
+
+def run_module(module, argv):
+    """Run `module` as a script with `argv` as its arguments."""
+    sys.path.insert(0, str(ROOT))
+    sys.argv = [module] + list(argv)
+    # alter_sys makes the module sys.modules["__main__"], so functions it
+    # hands to multiprocessing pools pickle the same way as when run directly
+    runpy.run_module(module, run_name="__main__", alter_sys=True)
+
+
+def crawl(argv):
+    # scrapy finds the project through crawler/scrapy.cfg in the working directory
+    os.chdir(ROOT / "crawler")
+    from scrapy.cmdline import execute
+    execute(["scrapy", "crawl"] + list(argv))
+
+
+def backfill(argv):
+    if not argv or argv[0] not in BACKFILLS:
+        print("usage: python -m charmelle backfill <target> [args...]\n\ntargets:")
+        for name, (_, _, help_text) in BACKFILLS.items():
+            print(f"  {name:<12} {help_text}")
+        return 0 if argv and argv[0] in ("-h", "--help") else 2
+    module, preset, _ = BACKFILLS[argv[0]]
+    run_module(module, preset + list(argv[1:]))
+    return 0
+
+
+def parse_importtime(output):
+    """(module, cumulative_us) for every top-level import in `-X importtime` output."""
+    imports = []
+    for line in output.splitlines():
+        match = IMPORTTIME_RE.match(line)
+        # One space of indent is the top level; nested imports are indented further
+        if match and len(match.group(3)) == 1:
+            imports.append((match.group(4), int(match.group(2))))
+    return imports
+
+
+def importtime(argv):
+    """
+    Start `argv` (a charmelle command) with `--help` under `-X importtime` and
+    report its top-level imports. With --budget-ms, exit non-zero when the
+    total goes over, so a startup regression fails the check.
+    """
+    import argparse
+    parser = argparse.ArgumentParser(prog="charmelle importtime", description=importtime.__doc__)
+    parser.add_argument("command", nargs="+", help="Command to measure, e.g. `refresh` or `backfill tags`.")
+    parser.add_argument("--top", type=int, default=15, help="Slowest imports to list.")
+    parser.add_argument("--budget-ms", type=float, default=None, help="Fail when startup imports take longer.")
+    args = parser.parse_args(argv)
+
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-m", "charmelle", *args.command, "--help"],
+        cwd=ROOT, capture_output=True, text=True,
+    )
+    if process.returncode != 0:
+        # The command failed before its --help, so the timings are incomplete
+        errors = [line for line in process.stderr.splitlines() if not line.startswith("import time:")]
+        print("\n".join(errors), file=sys.stderr)
+        print(f"{' '.join(args.command)} exited with {process.returncode}.", file=sys.stderr)
+        return process.returncode
+    imports = parse_importtime(process.stderr)
+    total_ms = sum(us for _, us in imports) / 1000
+    print(f"{' '.join(args.command)}: {total_ms:.1f} ms in {len(imports)} top-level imports")
+    for module, us in sorted(imports, key=lambda item: -item[1])[:args.top]:
+        print(f"  {us / 1000:>8.1f} ms  {module}")
+    if args.budget_ms is not None and total_ms > args.budget_ms:
+        print(f"Over the {args.budget_ms:.0f} ms budget.")
+        return 1
+    return 0
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else list(argv)
+    if not argv or argv[0] in ("-h", "--help"):
+        print(usage())
+        return 0 if argv else 2
+    command, rest = argv[0], argv[1:]
+    if command == "crawl":
+        crawl(rest)
+    elif command == "backfill":
+        return backfill(rest)
+    elif command == "importtime":
+        return importtime(rest)
+    elif command in COMMANDS:
+        module, preset, _ = COMMANDS[command]
+        run_module(module, preset + rest)
+    else:
+        print(f"unknown command: {command}\n\n{usage()}", file=sys.stderr)
+        return 2
+    return 0
@@ -1,15 +1,86 @@
-from sqlalchemy import create_engine
+import time
+from sqlalchemy import create_engine, text
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
 import config
 
-engine = create_engine(config.DB_URL)
+def connect_args(statement_timeout_ms, connect_timeout):
+    """psycopg2 connect arguments for a server-side statement timeout (ms) and a connect timeout (s); 0: none."""
+    args = {}
+    if statement_timeout_ms:
+        args['options'] = f'-c statement_timeout={statement_timeout_ms}'
+    if connect_timeout:
+        args['connect_timeout'] = connect_timeout
+    return args
+
+def make_engine(url, pool_size, max_overflow, statement_timeout_ms, connect_timeout=0):
+    """An engine with its own connection pool, statement timeout and connect timeout (0: none)."""
+    return create_engine(url, pool_size=pool_size, max_overflow=max_overflow,
+                         connect_args=connect_args(statement_timeout_ms, connect_timeout))
+
+# Primary: ETL, view refreshes, maintenance and every other write
+engine = make_engine(config.DB_URL, config.DB_POOL_SIZE, config.DB_MAX_OVERFLOW, config.DB_STATEMENT_TIMEOUT_MS)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+# Reads for the API. Without DB_READ_URL this is still a separate pool on the
+# primary, so batch writes can't exhaust the connections the API serves from.
+read_engine = make_engine(
+    config.DB_READ_URL or config.DB_URL,
+    config.DB_READ_POOL_SIZE, config.DB_READ_MAX_OVERFLOW, config.DB_READ_STATEMENT_TIMEOUT_MS,
+    # Requests (and the lag check) must not hang on an unreachable replica
+    config.DB_READ_CONNECT_TIMEOUT,
+)
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+
 Base = declarative_base()
 
+# The last replayed transaction ages while the primary is idle, so a replica
+# that has replayed everything it received counts as caught up
+REPLICA_LAG_SQL = """
+SELECT CASE WHEN NOT pg_is_in_recovery() THEN 0
+            WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+            ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END
+"""
+
+class ReplicaMonitor:
+    """
+    Tracks how far the read replica lags behind the primary. The lag is
+    re-checked at most every `interval` seconds; an unreachable replica counts
+    as stale.
+    """
+
+    def __init__(self, read_engine, max_lag, interval=5.0):
+        self.read_engine = read_engine
+        self.max_lag = max_lag
+        self.interval = interval
+        self.lag = None
+        self.checked = None
+
+    def check_lag(self):
+        with self.read_engine.connect() as connection:
+            return float(connection.execute(text(REPLICA_LAG_SQL)).scalar())
+
+    def fresh(self):
+        now = time.monotonic()
+        if self.checked is None or now - self.checked >= self.interval:
+            self.checked = now
+            try:
+                self.lag = self.check_lag()
+            except Exception:
+                self.lag = None
+        return self.lag is not None and self.lag <= self.max_lag
+
+replica_monitor = ReplicaMonitor(read_engine, config.DB_READ_MAX_LAG_SECONDS) if config.DB_READ_URL else None
+
+def read_session():
+    """A session for read-only queries: the replica unless it is too stale, else the primary."""
+    if replica_monitor is None or replica_monitor.fresh():
+        return ReadSessionLocal()
+    return SessionLocal()
+
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close() 
\ No newline at end of file
+        db.close()
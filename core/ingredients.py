@@ -0,0 +1,97 @@
+import re
+import unicodedata
+
+# Spellings that refer to the same ingredient on INCI lists
+INGREDIENT_ALIASES = {
+    "aqua": "water",
+    "eau": "water",
+    "parfum": "fragrance",
+    "perfume": "fragrance",
+    "fragrance parfum": "fragrance",
+    "parfum fragrance": "fragrance",
+    "alcohol denat": "alcohol denat",
+    "denatured alcohol": "alcohol denat",
+    "sd alcohol": "alcohol denat",
+    "sd alcohol 40": "alcohol denat",
+    "sd alcohol 40 b": "alcohol denat",
+    "ethanol": "alcohol",
+    "ethyl alcohol": "alcohol",
+    "nicotinamide": "niacinamide",
+    "vitamin b3": "niacinamide",
+    "ascorbic acid vitamin c": "ascorbic acid",
+    "vitamin c": "ascorbic acid",
+    "tocopherol vitamin e": "tocopherol",
+    "vitamin e": "tocopherol",
+    "retinol vitamin a": "retinol",
+    "sodium hyaluronate": "sodium hyaluronate",
+}
+
+# What customers mean by a filter term; fatty alcohols like cetyl alcohol are not "alcohol"
+INGREDIENT_GROUPS = {
+    "alcohol": ["alcohol", "alcohol denat", "isopropyl alcohol", "benzyl alcohol"],
+    "fragrance": ["fragrance"],
+    "vitamin c": ["ascorbic acid", "sodium ascorbyl phosphate", "ascorbyl glucoside", "magnesium ascorbyl phosphate"],
+    "hyaluronic acid": ["hyaluronic acid", "sodium hyaluronate"],
+}
+
+# Longer fragments are prose (marketing copy in the ingredients field), not ingredients
+MAX_INGREDIENT_WORDS = 6
+
+_LABEL_RE = re.compile(r"^\s*(?:full\s+)?ingredients?\s*(?:list)?\s*:\s*", re.I)
+_NOISE_RE = re.compile(r"\d+(?:\.\d+)?\s*%|[*†‡]")
+
+
+def _split_top_level(text):
+    """Split on commas/semicolons that are not inside parentheses."""
+    parts, depth, current = [], 0, []
+    for char in text:
+        if char in "([":
+            depth += 1
+        elif char in ")]":
+            depth = max(depth - 1, 0)
+        if char in ",;•\n" and depth == 0:
+            parts.append("".join(current))
+            current = []
+        else:
+            current.append(char)
+    parts.append("".join(current))
+    return parts
+
+
+def normalize_ingredient(name):
+    """Canonical form of a single ingredient name."""
+    if not isinstance(name, str):
+        return ""
+    text = unicodedata.normalize("NFKD", name).encode("ascii", "ignore").decode("ascii").lower()
+    text = _NOISE_RE.sub(" ", text)
+    text = " ".join(re.findall(r"[a-z0-9/\-]+", text.replace("(", " ").replace(")", " ")))
+    text = text.strip(" -/")
+    if text in INGREDIENT_ALIASES:
+        return INGREDIENT_ALIASES[text]
+    # "Water/Aqua/Eau" style lists of synonyms
+    if "/" in text:
+        aliases = {INGREDIENT_ALIASES.get(part.strip(), part.strip()) for part in text.split("/")}
+        if len(aliases) == 1:
+            return aliases.pop()
+    return text
+
+
+def tokenize_ingredients(ingredients):
+    """Turn a free-text ingredient list into a sorted list of normalized ingredients."""
+    if not isinstance(ingredients, str) or not ingredients.strip():
+        return []
+    tokens = set()
+    for part in _split_top_level(_LABEL_RE.sub("", ingredients)):
+        # "Aqua (Water)" indexes both the name and its parenthetical synonym
+        inner = [p for p in re.findall(r"\(([^()]*)\)", part) if "," not in p]
+        for candidate in [re.sub(r"\([^()]*\)", " ", part)] + inner:
+            token = normalize_ingredient(candidate)
+            if token and len(token.split()) <= MAX_INGREDIENT_WORDS:
+                tokens.add(token)
+    return sorted(tokens)
+
+
+def expand_ingredient_query(term):
+    """Normalized ingredient names matched by a customer filter term."""
+    token = normalize_ingredient(term)
+    return INGREDIENT_GROUPS.get(token, [token]) if token else []
@@ -0,0 +1,61 @@
+import os
+import time
+from contextlib import contextmanager
+
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Histogram, generate_latest, write_to_textfile
+
+import config
+
+REGISTRY = CollectorRegistry()
+
+# Crawler
+ITEMS_SCRAPED = Counter(
+    'charmelle_items_scraped_total', 'Items scraped', ['spider'], registry=REGISTRY)
+PIPELINE_WRITE_SECONDS = Histogram(
+    'charmelle_pipeline_write_seconds', 'Time to persist one scraped item', ['sink'], registry=REGISTRY,
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5))
+
+# ETL and view maintenance
+ETL_ROWS = Counter(
+    'charmelle_etl_rows_total', 'Rows handled per ETL stage', ['stage'], registry=REGISTRY)
+ETL_STAGE_SECONDS = Histogram(
+    'charmelle_etl_stage_seconds', 'Duration of ETL stages', ['stage'], registry=REGISTRY,
+    buckets=(0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800))
+
+# API
+REQUEST_SECONDS = Histogram(
+    'charmelle_api_request_seconds', 'API request duration', ['method', 'route', 'status'], registry=REGISTRY,
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5))
+DETECTIONS_WRITTEN = Counter(
+    'charmelle_detections_written_total', 'Detection events flushed to detection_logs', registry=REGISTRY)
+DETECTIONS_DROPPED = Counter(
+    'charmelle_detections_dropped_total', 'Detection events lost after a failed flush', registry=REGISTRY)
+DETECTIONS_REJECTED = Counter(
+    'charmelle_detections_rejected_total', 'Detection events refused because the ingest buffer was full', registry=REGISTRY)
+
+
+@contextmanager
+def track_stage(stage):
+    """Record how long an ETL stage takes."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        ETL_STAGE_SECONDS.labels(stage).observe(time.perf_counter() - started)
+
+
+def latest():
+    """Current metrics in the Prometheus text format."""
+    return generate_latest(REGISTRY)
+
+
+def push_to_textfile(job):
+    """
+    Write this process's metrics to METRICS_TEXTFILE_DIR/<job>.prom for
+    node_exporter's textfile collector. Batch jobs exit before they could be
+    scraped, so they call this when they finish. No-op when not configured.
+    """
+    if not config.METRICS_TEXTFILE_DIR:
+        return
+    os.makedirs(config.METRICS_TEXTFILE_DIR, exist_ok=True)
+    write_to_textfile(os.path.join(config.METRICS_TEXTFILE_DIR, f'{job}.prom'), REGISTRY)
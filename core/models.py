@@ -3,11 +3,15 @@ from sqlalchemy import (
     String,
     Text,
     TIMESTAMP,
+    Date,
     Numeric,
     CHAR,
     ForeignKey,
     PrimaryKeyConstraint,
     Integer,
+    BigInteger,
+    Float,
+    Index,
     func
 )
 from sqlalchemy.ext.declarative import declarative_base
@@ -22,6 +26,8 @@ class Product(Base):
     variant = Column(Text, nullable=False, server_default='')
     product_type = Column(Text, nullable=False, server_default='uncategorized')
     ingredients = Column(Text, nullable=False, server_default='')
+    # Text the condition tagger ran on, kept so tags can be recomputed (see etl/retag.py)
+    description = Column(Text, nullable=True)
     created_ts = Column(TIMESTAMP, server_default=func.now())
 
 class Offer(Base):
@@ -34,6 +40,8 @@ class Offer(Base):
     rating = Column(Numeric(2, 1))
     url = Column(Text)
     availability = Column(Text)
+    # This retailer's product text; products.description merges those of all offers
+    description = Column(Text, nullable=True)
     last_seen_ts = Column(TIMESTAMP)
     etl_sync_ts = Column(TIMESTAMP)
 
@@ -42,7 +50,40 @@ class PriceHistory(Base):
     offer_id = Column(Text, ForeignKey('offers.offer_id'))
     ts = Column(TIMESTAMP)
     price = Column(Numeric(10, 2))
-    __table_args__ = (PrimaryKeyConstraint('offer_id', 'ts'),)
+    # Monthly partitions are created and expired by etl/maintenance.py
+    __table_args__ = (
+        PrimaryKeyConstraint('offer_id', 'ts'),
+        {'postgresql_partition_by': 'RANGE (ts)'},
+    )
+
+class PriceRollupOffer(Base):
+    __tablename__ = 'price_rollups_offer'
+    offer_id = Column(Text, ForeignKey('offers.offer_id'))
+    resolution = Column(Text)  # a date_trunc field: 'day' or 'week'
+    bucket_start = Column(TIMESTAMP)
+    min_price = Column(Numeric(10, 2))
+    max_price = Column(Numeric(10, 2))
+    last_price = Column(Numeric(10, 2))
+    last_ts = Column(TIMESTAMP)
+    __table_args__ = (
+        PrimaryKeyConstraint('offer_id', 'resolution', 'bucket_start'),
+        Index('idx_price_rollups_offer_bucket', 'bucket_start', postgresql_using='brin'),
+    )
+
+class PriceRollupProduct(Base):
+    __tablename__ = 'price_rollups_product'
+    product_id = Column(Text, ForeignKey('products.product_id'))
+    resolution = Column(Text)
+    bucket_start = Column(TIMESTAMP)
+    min_price = Column(Numeric(10, 2))
+    max_price = Column(Numeric(10, 2))
+    last_price = Column(Numeric(10, 2))
+    last_ts = Column(TIMESTAMP)
+    offer_count = Column(Integer)
+    __table_args__ = (
+        PrimaryKeyConstraint('product_id', 'resolution', 'bucket_start'),
+        Index('idx_price_rollups_product_bucket', 'bucket_start', postgresql_using='brin'),
+    )
 
 class ConditionTag(Base):
     __tablename__ = 'condition_tags'
@@ -50,6 +91,43 @@ class ConditionTag(Base):
     condition = Column(Text)
     __table_args__ = (PrimaryKeyConstraint('product_id', 'condition'),)
 
+class TaggerVersion(Base):
+    __tablename__ = 'tagger_versions'
+    version = Column(Text, primary_key=True)
+    applied_ts = Column(TIMESTAMP, server_default=func.now())
+    products_changed = Column(Integer)
+
+class ProductsLatestVersion(Base):
+    __tablename__ = 'products_latest_versions'
+    version = Column(Integer, primary_key=True, autoincrement=True)
+    mode = Column(Text, nullable=False)  # 'refresh' or 'swap'
+    state = Column(Text, nullable=False)  # 'active', 'previous' (kept as products_latest_prev) or 'retired'
+    row_count = Column(BigInteger)
+    build_seconds = Column(Float)
+    built_ts = Column(TIMESTAMP, server_default=func.now())
+    __table_args__ = (Index('idx_products_latest_versions_state', 'state'),)
+
+class ProductIngredient(Base):
+    __tablename__ = 'product_ingredients'
+    product_id = Column(Text, ForeignKey('products.product_id'))
+    ingredient = Column(Text)
+    __table_args__ = (
+        PrimaryKeyConstraint('product_id', 'ingredient'),
+        Index('idx_product_ingredients_ingredient', 'ingredient'),
+    )
+
+class ProductMatch(Base):
+    __tablename__ = 'product_matches'
+    product_id = Column(Text, primary_key=True)
+    canonical_product_id = Column(Text, ForeignKey('products.product_id'), nullable=False)
+    brand_key = Column(Text, nullable=False, server_default='')
+    similarity = Column(Float)
+    matched_ts = Column(TIMESTAMP, server_default=func.now())
+    __table_args__ = (
+        Index('idx_product_matches_brand_key', 'brand_key'),
+        Index('idx_product_matches_canonical', 'canonical_product_id'),
+    )
+
 class DetectionLog(Base):
     __tablename__ = 'detection_logs'
     id = Column(Integer, primary_key=True, autoincrement=True)
@@ -57,10 +135,28 @@ class DetectionLog(Base):
     area = Column(Text)
     ts = Column(TIMESTAMP, server_default=func.now())
 
+class DetectionConditionCount(Base):
+    __tablename__ = 'detection_condition_counts'
+    condition = Column(Text)
+    day = Column(Date)
+    count = Column(BigInteger, nullable=False)
+    __table_args__ = (PrimaryKeyConstraint('condition', 'day'),)
+
 class StagingRawOffer(Base):
     __tablename__ = 'staging_raw_offers'
     offer_id = Column(Text, primary_key=True)
     retailer = Column(Text)
     json_blob = Column(Text) # Using Text for simplicity, can be JSONB in postgres
     last_seen_ts = Column(TIMESTAMP, server_default=func.now())
-    etl_sync_ts = Column(TIMESTAMP, nullable=True) 
\ No newline at end of file
+    etl_sync_ts = Column(TIMESTAMP, nullable=True)
+    # Bumped whenever a re-crawl changes json_blob; the ETL only marks the version it loaded as synced
+    version = Column(BigInteger, nullable=False, server_default='1')
+    # Lease held by the ETL worker processing this row (see load_to_db.claim_offers)
+    claimed_by = Column(Text, nullable=True)
+    claim_expires_ts = Column(TIMESTAMP, nullable=True)
+    # Version whose blob failed to transform; skipped until a re-crawl changes it
+    failed_version = Column(BigInteger, nullable=True)
+
+    __table_args__ = (
+        Index('idx_staging_unsynced', 'last_seen_ts', postgresql_where=etl_sync_ts.is_(None)),
+    )
\ No newline at end of file
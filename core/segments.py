@@ -0,0 +1,158 @@
+import gzip
+import json
+import os
+import re
+import zlib
+from datetime import datetime
+from pathlib import Path
+
+# Segments are append-only JSONL files where every record is its own gzip
+# member: the file as a whole is a valid .jsonl.gz, and the sidecar index of
+# offer_id -> (offset, length) allows reading a single record without
+# decompressing the rest. Files are written as *.open and renamed once sealed,
+# so readers only ever see complete segments.
+SEGMENT_SUFFIX = '.jsonl.gz'
+OPEN_SUFFIX = '.open'
+INDEX_SUFFIX = '.idx.json'
+INGESTED_DIR = 'ingested'
+
+
+def index_path(segment_path):
+    return Path(str(segment_path) + INDEX_SUFFIX)
+
+
+class SegmentWriter:
+    """Append records to rotating, compressed segment files in `directory`."""
+
+    def __init__(self, directory, prefix, max_records=10000, max_bytes=64 * 1024 * 1024):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.prefix = prefix
+        self.max_records = max_records
+        self.max_bytes = max_bytes
+        self.sequence = 0
+        self.file = None
+        # Segments left open by a crashed crawl are recovered up to their last
+        # complete record. Open segments of other prefixes, or of crawls that
+        # are still running (a full crawl can overlap a delta crawl), are left alone.
+        for leftover in sorted(self.directory.glob(f'{prefix}-*{SEGMENT_SUFFIX}{OPEN_SUFFIX}')):
+            pid = segment_pid(leftover, prefix)
+            if pid is not None and not process_running(pid):
+                recover_segment(leftover)
+
+    def _open(self):
+        name = f"{self.prefix}-{datetime.utcnow():%Y%m%dT%H%M%S}-{os.getpid()}-{self.sequence:04d}{SEGMENT_SUFFIX}"
+        self.sequence += 1
+        self.path = self.directory / name
+        self.file = open(str(self.path) + OPEN_SUFFIX, 'wb')
+        self.index = {}
+        self.offset = 0
+
+    def append(self, offer_id, record):
+        if self.file is None:
+            self._open()
+        member = gzip.compress((json.dumps(record) + '\n').encode('utf-8'), mtime=0)
+        self.file.write(member)
+        self.index[offer_id] = [self.offset, len(member)]
+        self.offset += len(member)
+        if len(self.index) >= self.max_records or self.offset >= self.max_bytes:
+            self.seal()
+
+    def seal(self):
+        """Close the current segment and publish it with its index."""
+        if self.file is None:
+            return
+        self.file.close()
+        self.file = None
+        with open(index_path(self.path), 'w') as f:
+            json.dump(self.index, f)
+        os.replace(str(self.path) + OPEN_SUFFIX, self.path)
+
+    def close(self):
+        self.seal()
+
+
+def segment_pid(path, prefix):
+    """PID of the process that wrote a segment named by SegmentWriter, or None."""
+    match = re.fullmatch(
+        rf"{re.escape(prefix)}-\d{{8}}T\d{{6}}-(\d+)-\d+{re.escape(SEGMENT_SUFFIX)}(?:{re.escape(OPEN_SUFFIX)})?",
+        Path(path).name,
+    )
+    return int(match.group(1)) if match else None
+
+
+def process_running(pid):
+    if pid == os.getpid():
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        # Exists, but belongs to another user
+        return True
+    return True
+
+
+def recover_segment(open_path):
+    """Seal a *.open segment, rebuilding its index and dropping a truncated last record."""
+    data = Path(open_path).read_bytes()
+    index, offset = {}, 0
+    while offset < len(data):
+        decompressor = zlib.decompressobj(wbits=31)
+        try:
+            line = decompressor.decompress(data[offset:])
+        except zlib.error:
+            break
+        if not decompressor.eof:
+            break
+        length = len(data) - offset - len(decompressor.unused_data)
+        index[json.loads(line)['offer_id']] = [offset, length]
+        offset += length
+
+    segment_path = Path(str(open_path)[:-len(OPEN_SUFFIX)])
+    with open(open_path, 'r+b') as f:
+        f.truncate(offset)
+    with open(index_path(segment_path), 'w') as f:
+        json.dump(index, f)
+    os.replace(open_path, segment_path)
+    return segment_path
+
+
+def sealed_segments(directory):
+    """Sealed, not yet ingested segment files under `directory`, oldest first."""
+    directory = Path(directory)
+    if not directory.exists():
+        return []
+    return sorted(
+        (p for p in directory.rglob(f'*{SEGMENT_SUFFIX}') if INGESTED_DIR not in p.relative_to(directory).parts),
+        key=lambda p: p.name,
+    )
+
+
+def iter_segment(path):
+    """Yield every record in a segment, in write order."""
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        for line in f:
+            yield json.loads(line)
+
+
+def read_record(path, offer_id):
+    """Read one record through the segment's index, or None if it isn't there."""
+    with open(index_path(path)) as f:
+        location = json.load(f).get(offer_id)
+    if location is None:
+        return None
+    offset, length = location
+    with open(path, 'rb') as f:
+        f.seek(offset)
+        return json.loads(gzip.decompress(f.read(length)))
+
+
+def mark_ingested(path):
+    """Move a segment and its index out of the way once it has been loaded."""
+    path = Path(path)
+    target = path.parent / INGESTED_DIR
+    target.mkdir(exist_ok=True)
+    os.replace(index_path(path), target / index_path(path).name)
+    os.replace(path, target / path.name)
@@ -0,0 +1,40 @@
+from sqlalchemy import case, text
+from sqlalchemy.dialects.postgresql import insert
+
+from core.models import StagingRawOffer
+
+
+def upsert_staging_stmt(records):
+    """
+    Insert raw offers into staging, refreshing the blob of offers already there.
+
+    A re-crawled offer whose blob changed gets a new version and is flagged
+    for the next ETL run again (etl_sync_ts cleared); an unchanged blob only
+    refreshes last_seen_ts.
+    """
+    stmt = insert(StagingRawOffer).values(records)
+    changed = StagingRawOffer.json_blob.is_distinct_from(stmt.excluded.json_blob)
+    return stmt.on_conflict_do_update(
+        index_elements=['offer_id'],
+        set_=dict(
+            retailer=stmt.excluded.retailer,
+            json_blob=stmt.excluded.json_blob,
+            last_seen_ts=stmt.excluded.last_seen_ts,
+            version=case((changed, StagingRawOffer.version + 1), else_=StagingRawOffer.version),
+            etl_sync_ts=case((changed, None), else_=StagingRawOffer.etl_sync_ts),
+        )
+    )
+
+
+def touch_offers(connection, offer_ids, seen_ts):
+    """
+    Mark offers as seen at `seen_ts` without re-loading them, for pages a
+    crawl found unchanged. Keeps staging rows out of prune_staging and
+    offers.last_seen_ts current.
+    """
+    params = {'offer_ids': sorted(set(offer_ids)), 'seen_ts': seen_ts}
+    for table in ('staging_raw_offers', 'offers'):
+        connection.execute(text(f"""
+            UPDATE {table} SET last_seen_ts = :seen_ts
+            WHERE offer_id = ANY(:offer_ids) AND (last_seen_ts IS NULL OR last_seen_ts < :seen_ts)
+        """), params)
@@ -0,0 +1,88 @@
+# Run from the crawler/ directory, like `scrapy crawl`, so scrapy.cfg is found.
+import json
+import logging
+import time
+from pathlib import Path
+
+from scrapy import Request
+from scrapy.crawler import CrawlerProcess
+from scrapy.item import Item
+from scrapy.spiderloader import SpiderLoader
+from scrapy.utils.project import data_path, get_project_settings
+
+from skincare_spiders.httpcache import build_response, iter_entries
+
+STORAGE = 'skincare_spiders.httpcache.ContentAddressedCacheStorage'
+
+
+def record(spider_name, corpus, spider_args, write_items):
+    """Run a live crawl with every response stored in the replay corpus."""
+    settings = get_project_settings()
+    settings.set('HTTPCACHE_ENABLED', True)
+    settings.set('HTTPCACHE_STORAGE', STORAGE)
+    settings.set('HTTPCACHE_DIR', corpus)
+    settings.set('HTTPCACHE_EXPIRATION_SECS', 0)
+    if not write_items:
+        settings.set('ITEM_PIPELINES', {})
+    process = CrawlerProcess(settings)
+    process.crawl(spider_name, **spider_args)
+    process.start()
+
+
+def replay(spider_name, corpus, spider_args, repeat):
+    """Feed every cached response to its recorded callback and time the parsing."""
+    settings = get_project_settings()
+    spidercls = SpiderLoader.from_settings(settings).load(spider_name)
+    root = Path(data_path(corpus)) / spider_name
+    entries = [entry for entry in iter_entries(root) if entry['callback']]
+    if not entries:
+        raise SystemExit(f"No recorded responses for {spider_name} in {root}")
+
+    # Build responses up front so only parsing is timed
+    pages = [(entry['callback'], build_response(root, entry, Request(entry['url']))) for entry in entries]
+
+    stats = {}
+    for _ in range(repeat):
+        spider = spidercls(**spider_args)
+        for callback, response in pages:
+            result = stats.setdefault(callback, {'pages': 0, 'bytes': 0, 'items': 0, 'requests': 0, 'seconds': 0.0})
+            started = time.perf_counter()
+            for output in getattr(spider, callback)(response) or ():
+                if isinstance(output, Request):
+                    result['requests'] += 1
+                elif isinstance(output, (Item, dict)):
+                    result['items'] += 1
+            result['seconds'] += time.perf_counter() - started
+            result['pages'] += 1
+            result['bytes'] += len(response.body)
+
+    for result in stats.values():
+        seconds = max(result['seconds'], 1e-9)
+        result['pages_per_sec'] = round(result['pages'] / seconds, 1)
+        result['mb_per_sec'] = round(result['bytes'] / seconds / 1e6, 2)
+        result['seconds'] = round(result['seconds'], 4)
+    return {'spider': spider_name, 'responses': len(pages), 'repeat': repeat, 'callbacks': stats}
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Record crawls into a replay corpus and benchmark parsing offline.")
+    parser.add_argument("command", choices=["record", "replay"])
+    parser.add_argument("spider", help="Spider name, e.g. sephora.")
+    parser.add_argument("-a", dest="spider_args", action="append", default=[], metavar="NAME=VALUE", help="Spider argument, as for scrapy crawl.")
+    parser.add_argument("--corpus", default="replaycache", help="Cache directory inside the project data dir (.scrapy/).")
+    parser.add_argument("--write-items", action="store_true", help="Keep item pipelines enabled while recording.")
+    parser.add_argument("--repeat", type=int, default=1, help="Replay passes over the corpus.")
+    parser.add_argument("--report", help="Write the replay report as JSON to this file.")
+    args = parser.parse_args()
+    spider_args = dict(arg.split("=", 1) for arg in args.spider_args)
+
+    if args.command == "record":
+        record(args.spider, args.corpus, spider_args, args.write_items)
+    else:
+        # Per-page log lines would dominate the timings
+        logging.basicConfig(level=logging.WARNING)
+        report = replay(args.spider, args.corpus, spider_args, args.repeat)
+        print(json.dumps(report, indent=2))
+        if args.report:
+            Path(args.report).write_text(json.dumps(report, indent=2))
@@ -0,0 +1,127 @@
+import sys
+import time
+from pathlib import Path
+
+from scrapy import signals
+from scrapy.exceptions import NotConfigured
+
+from .profiles import CRAWL_PROFILES
+
+# Add project root to sys.path
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from core.metrics import ITEMS_SCRAPED, push_to_textfile
+
+# Status codes that mean "slow down" rather than "broken page"
+THROTTLE_STATUSES = {429, 503}
+
+
+class DomainStats:
+    """Running totals and smoothed latency/error rate for one download slot."""
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.responses = 0
+        self.errors = 0
+        self.throttled = 0
+        self.bytes = 0
+        self.latency_total = 0.0
+        self.latency_ewma = None
+        self.error_ewma = 0.0
+
+    def record(self, status, latency, size, alpha=0.2):
+        self.responses += 1
+        self.bytes += size
+        is_error = status >= 500 or status in THROTTLE_STATUSES
+        self.errors += is_error
+        self.throttled += status in THROTTLE_STATUSES
+        self.error_ewma = alpha * is_error + (1 - alpha) * self.error_ewma
+        if latency is not None:
+            self.latency_total += latency
+            self.latency_ewma = latency if self.latency_ewma is None else alpha * latency + (1 - alpha) * self.latency_ewma
+
+
+class AdaptiveThrottle:
+    """
+    Per-domain throttling driven by observed latency and error/429 rates.
+
+    Each response updates its download slot: throttling responses back off
+    hard (double the delay, drop one concurrent request), a rising error rate
+    backs off gently, and otherwise the delay converges on
+    latency / target_concurrency like Scrapy's AutoThrottle. All values stay
+    within the spider's crawl profile. Per-domain throughput is logged and
+    written to the crawl stats when the spider closes.
+    """
+
+    def __init__(self, crawler):
+        self.crawler = crawler
+        self.domains = {}
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        if not crawler.settings.getbool('ADAPTIVE_THROTTLE_ENABLED'):
+            raise NotConfigured
+        extension = cls(crawler)
+        crawler.signals.connect(extension.response_received, signal=signals.response_received)
+        crawler.signals.connect(extension.spider_closed, signal=signals.spider_closed)
+        return extension
+
+    def response_received(self, response, request, spider):
+        key = request.meta.get('download_slot')
+        slot = self.crawler.engine.downloader.slots.get(key)
+        if slot is None:
+            return
+        stats = self.domains.setdefault(key, DomainStats())
+        stats.record(response.status, request.meta.get('download_latency'), len(response.body))
+        self.adjust(slot, stats, response.status, CRAWL_PROFILES[getattr(spider, 'crawl_profile', 'standard')])
+
+    def adjust(self, slot, stats, status, profile):
+        if status in THROTTLE_STATUSES:
+            slot.delay = slot.delay * 2 or profile['min_delay']
+            slot.concurrency = max(1, slot.concurrency - 1)
+        elif stats.error_ewma > 0.1:
+            slot.delay = slot.delay * 1.25 or profile['min_delay']
+        elif stats.latency_ewma is not None:
+            target = stats.latency_ewma / profile['target_concurrency']
+            slot.delay = (slot.delay + target) / 2
+            # Recover concurrency slowly once the site is healthy again
+            if stats.error_ewma < 0.01 and slot.concurrency < profile['concurrency']:
+                slot.concurrency += 1
+        slot.delay = min(max(slot.delay, profile['min_delay']), profile['max_delay'])
+
+    def spider_closed(self, spider):
+        slots = self.crawler.engine.downloader.slots
+        for key, stats in sorted(self.domains.items()):
+            elapsed = max(time.monotonic() - stats.started, 1e-6)
+            avg_latency = stats.latency_total / stats.responses if stats.responses else 0.0
+            slot = slots.get(key)
+            summary = {
+                'responses': stats.responses,
+                'responses_per_min': round(stats.responses * 60 / elapsed, 2),
+                'avg_latency': round(avg_latency, 3),
+                'error_rate': round(stats.errors / stats.responses, 3) if stats.responses else 0.0,
+                'throttled': stats.throttled,
+                'bytes': stats.bytes,
+                'final_delay': round(slot.delay, 3) if slot else None,
+                'final_concurrency': slot.concurrency if slot else None,
+            }
+            for name, value in summary.items():
+                self.crawler.stats.set_value(f'throttle/{key}/{name}', value, spider=spider)
+            spider.logger.info(f"THROTTLE: {key} {summary}")
+
+
+class CrawlMetrics:
+    """Counts scraped items per spider and writes the crawl's metrics file on close."""
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        extension = cls()
+        crawler.signals.connect(extension.item_scraped, signal=signals.item_scraped)
+        crawler.signals.connect(extension.spider_closed, signal=signals.spider_closed)
+        return extension
+
+    def item_scraped(self, item, response, spider):
+        ITEMS_SCRAPED.labels(spider.name).inc()
+
+    def spider_closed(self, spider):
+        push_to_textfile(f'crawl_{spider.name}')
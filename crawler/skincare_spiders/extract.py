@@ -0,0 +1,74 @@
+# Byte-level extraction of the JSON retailers embed in product pages. Scanning
+# the raw response for the script tag or variable assignment avoids building a
+# DOM and decoding the whole page; only the JSON slice is parsed, by orjson.
+import re
+
+import orjson
+
+# Strings are matched whole so braces inside them don't affect nesting depth
+_JSON_TOKEN_RE = re.compile(rb'"(?:[^"\\]|\\.)*"|[{}\[\]]')
+_WHITESPACE_RE = re.compile(rb'\s*')
+
+JSONDecodeError = orjson.JSONDecodeError
+
+
+def iter_script_payloads(body, *markers):
+    """Yield the raw contents of <script> tags whose opening tag contains every marker."""
+    pos = 0
+    while True:
+        start = body.find(b'<script', pos)
+        if start == -1:
+            return
+        tag_end = body.find(b'>', start)
+        if tag_end == -1:
+            return
+        end = body.find(b'</script', tag_end)
+        if end == -1:
+            return
+        open_tag = body[start:tag_end]
+        if all(marker in open_tag for marker in markers):
+            yield body[tag_end + 1:end].strip()
+        pos = end + len(b'</script')
+
+
+def script_payload(body, *markers):
+    """Raw contents of the first matching <script> tag, or None."""
+    return next(iter_script_payloads(body, *markers), None)
+
+
+def slice_json_value(buf, start):
+    """The balanced JSON object or array beginning at `start` (after whitespace), or None."""
+    start = _WHITESPACE_RE.match(buf, start).end()
+    if buf[start:start + 1] not in (b'{', b'['):
+        return None
+    depth = 0
+    for match in _JSON_TOKEN_RE.finditer(buf, start):
+        token = match.group()
+        if token in (b'{', b'['):
+            depth += 1
+        elif token in (b'}', b']'):
+            depth -= 1
+            if depth == 0:
+                return buf[start:match.end()]
+    return None
+
+
+def assigned_json(body, name):
+    """Raw JSON assigned to a JavaScript variable, e.g. `window.__APOLLO_STATE__ = {...};`."""
+    # Only an assignment counts: not a comparison, a guard such as
+    # `if (window.__APOLLO_STATE__)` or a longer name with the same prefix
+    assignment = re.compile(rb'(?<![\w$.])' + re.escape(name) + rb'\s*=(?!=)')
+    for match in assignment.finditer(body):
+        raw = slice_json_value(body, match.end())
+        if raw is not None:
+            return raw
+    return None
+
+
+def loads(raw):
+    return orjson.loads(raw)
+
+
+def dumps(data):
+    """Compact JSON text for the item's json_blob."""
+    return orjson.dumps(data).decode('utf-8')
@@ -0,0 +1,102 @@
+import gzip
+import hashlib
+import json
+import os
+from pathlib import Path
+from time import time
+
+from scrapy.http import Headers
+from scrapy.responsetypes import responsetypes
+from scrapy.utils.project import data_path
+
+
+class ContentAddressedCacheStorage:
+    """
+    HTTP cache storage that keeps each distinct body once.
+
+    Layout under HTTPCACHE_DIR/<spider>/:
+      entries/<fp[:2]>/<fp>.json   request fingerprint -> status, headers, body hash, callback
+      objects/<sha[:2]>/<sha>.gz   gzip-compressed response bodies, keyed by SHA-256
+
+    Repeated crawls of unchanged pages add only a small entry file. The
+    callback name recorded with each entry lets replay.py feed cached
+    responses straight to the spider's parse methods.
+    """
+
+    def __init__(self, settings):
+        self.cachedir = Path(data_path(settings['HTTPCACHE_DIR']))
+        self.expiration_secs = settings.getint('HTTPCACHE_EXPIRATION_SECS')
+
+    def open_spider(self, spider):
+        self.fingerprinter = spider.crawler.request_fingerprinter
+        self.root = self.cachedir / spider.name
+
+    def close_spider(self, spider):
+        pass
+
+    def _entry_path(self, request):
+        key = self.fingerprinter.fingerprint(request).hex()
+        return self.root / 'entries' / key[:2] / f'{key}.json'
+
+    def retrieve_response(self, spider, request):
+        entry = load_entry(self._entry_path(request))
+        if entry is None:
+            return None
+        if self.expiration_secs > 0 and time() - entry['timestamp'] > self.expiration_secs:
+            return None
+        return build_response(self.root, entry)
+
+    def store_response(self, spider, request, response):
+        digest = hashlib.sha256(response.body).hexdigest()
+        object_path = self.root / 'objects' / digest[:2] / f'{digest}.gz'
+        if not object_path.exists():
+            _atomic_write(object_path, gzip.compress(response.body, mtime=0))
+
+        callback = request.callback or spider.parse
+        entry = {
+            'url': request.url,
+            'method': request.method,
+            'status': response.status,
+            'response_url': response.url,
+            'headers': {
+                key.decode('latin-1'): [v.decode('latin-1') for v in values]
+                for key, values in response.headers.items()
+            },
+            'body_sha256': digest,
+            'callback': getattr(callback, '__name__', None),
+            'timestamp': time(),
+        }
+        _atomic_write(self._entry_path(request), json.dumps(entry).encode('utf-8'))
+
+
+def _atomic_write(path, data):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f'{path.name}.{os.getpid()}.tmp')
+    tmp_path.write_bytes(data)
+    os.replace(tmp_path, path)
+
+
+def load_entry(path):
+    try:
+        return json.loads(Path(path).read_text())
+    except FileNotFoundError:
+        return None
+
+
+def read_body(root, digest):
+    return gzip.decompress((Path(root) / 'objects' / digest[:2] / f'{digest}.gz').read_bytes())
+
+
+def build_response(root, entry, request=None):
+    """Rebuild the Response stored for a cache entry."""
+    body = read_body(root, entry['body_sha256'])
+    headers = Headers(entry['headers'])
+    url = entry['response_url']
+    respcls = responsetypes.from_args(headers=headers, url=url, body=body)
+    return respcls(url=url, headers=headers, status=entry['status'], body=body, request=request)
+
+
+def iter_entries(root):
+    """Every cache entry for one spider, in a stable order."""
+    for path in sorted((Path(root) / 'entries').glob('*/*.json')):
+        yield load_entry(path)
@@ -0,0 +1,165 @@
+import hashlib
+import json
+import sqlite3
+import sys
+from datetime import datetime
+from pathlib import Path
+
+from scrapy import signals
+from scrapy.exceptions import IgnoreRequest
+from sqlalchemy import create_engine
+
+# Add project root to sys.path
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from config import DB_URL
+from core.staging import touch_offers
+
+
+class CrawlStateStore:
+    """Validators and content fingerprints of previously crawled pages, in a local SQLite file."""
+
+    def __init__(self, path, commit_every=100):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(path))
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS pages ("
+            "url TEXT PRIMARY KEY, etag TEXT, last_modified TEXT, fingerprint TEXT, crawled_ts TEXT, offer_ids TEXT)"
+        )
+        # State files written before offer IDs were recorded
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(pages)")}
+        if "offer_ids" not in columns:
+            self.conn.execute("ALTER TABLE pages ADD COLUMN offer_ids TEXT")
+        self.commit_every = commit_every
+        self.pending = 0
+
+    def get(self, url):
+        """(etag, last_modified, fingerprint, offer_ids) stored for `url`, or None."""
+        row = self.conn.execute(
+            "SELECT etag, last_modified, fingerprint, offer_ids FROM pages WHERE url = ?", (url,)
+        ).fetchone()
+        if row is None:
+            return None
+        return row[:3] + (json.loads(row[3]) if row[3] else [],)
+
+    def put(self, url, etag, last_modified, fingerprint, offer_ids=()):
+        self.conn.execute(
+            "INSERT OR REPLACE INTO pages (url, etag, last_modified, fingerprint, crawled_ts, offer_ids) VALUES (?, ?, ?, ?, ?, ?)",
+            (url, etag, last_modified, fingerprint, datetime.now().isoformat(), json.dumps(sorted(offer_ids))),
+        )
+        self.pending += 1
+        if self.pending >= self.commit_every:
+            self.conn.commit()
+            self.pending = 0
+
+    def close(self):
+        self.conn.commit()
+        self.conn.close()
+
+
+class IncrementalCrawlMiddleware:
+    """
+    Skip product pages that have not changed since the last crawl.
+
+    Active only for spiders running with `mode=incremental`, and only for
+    requests flagged with `meta['incremental']`. Sends If-None-Match /
+    If-Modified-Since from the stored validators; a 304, or a 200 whose body
+    hashes to the stored fingerprint, drops the request before parsing.
+
+    A changed page's validators travel in its request meta and are only
+    stored once an item scraped from it has made it through the pipelines, so
+    a parse or write failure is retried by the next crawl; pages that yield no
+    item leave nothing behind. Offers on skipped pages still count as seen:
+    their last_seen_ts is refreshed in staging_raw_offers and offers, in
+    batches.
+    """
+
+    def __init__(self, state_dir, stats, touch_batch=500):
+        self.state_dir = Path(state_dir)
+        self.stats = stats
+        self.touch_batch = touch_batch
+        self.store = None
+        self.engine = None
+        self.seen_offer_ids = []
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        middleware = cls(crawler.settings.get('CRAWL_STATE_DIR', '.crawlstate'), crawler.stats)
+        crawler.signals.connect(middleware.spider_opened, signal=signals.spider_opened)
+        crawler.signals.connect(middleware.spider_closed, signal=signals.spider_closed)
+        crawler.signals.connect(middleware.item_scraped, signal=signals.item_scraped)
+        return middleware
+
+    def spider_opened(self, spider):
+        if getattr(spider, 'mode', None) == 'incremental':
+            self.store = CrawlStateStore(self.state_dir / f"{spider.name}.sqlite")
+
+    def spider_closed(self, spider):
+        if self.store is not None:
+            self.flush_seen()
+            self.store.close()
+            self.store = None
+
+    def process_request(self, request, spider):
+        if self.store is None or not request.meta.get('incremental'):
+            return None
+        state = self.store.get(request.url)
+        if state:
+            etag, last_modified, _, _ = state
+            if etag:
+                request.headers.setdefault('If-None-Match', etag)
+            if last_modified:
+                request.headers.setdefault('If-Modified-Since', last_modified)
+        return None
+
+    def process_response(self, request, response, spider):
+        if self.store is None or not request.meta.get('incremental'):
+            return response
+
+        if response.status == 304:
+            self.stats.inc_value('incremental/not_modified', spider=spider)
+            self.mark_seen(request.url)
+            raise IgnoreRequest(f"Not modified: {request.url}")
+
+        if response.status == 200:
+            fingerprint = hashlib.sha1(response.body).hexdigest()
+            etag = response.headers.get('ETag', b'').decode('latin-1') or None
+            last_modified = response.headers.get('Last-Modified', b'').decode('latin-1') or None
+            previous = self.store.get(request.url)
+            if previous and previous[2] == fingerprint:
+                # Same content, so the stored offers are still current
+                self.store.put(request.url, etag, last_modified, fingerprint, previous[3])
+                self.stats.inc_value('incremental/unchanged', spider=spider)
+                self.mark_seen(request.url)
+                raise IgnoreRequest(f"Unchanged content: {request.url}")
+            # (etag, last_modified, fingerprint, offer_ids) until an item from the page is persisted
+            request.meta['incremental_state'] = (etag, last_modified, fingerprint, set())
+            self.stats.inc_value('incremental/changed', spider=spider)
+
+        return response
+
+    def item_scraped(self, item, response, spider):
+        """Store a changed page's state once an item from it has been persisted."""
+        state = response.meta.get('incremental_state') if response is not None else None
+        if self.store is None or state is None:
+            return
+        etag, last_modified, fingerprint, offer_ids = state
+        offer_ids.add(item['offer_id'])
+        self.store.put(response.request.url, etag, last_modified, fingerprint, offer_ids)
+
+    def mark_seen(self, url):
+        state = self.store.get(url)
+        if state:
+            self.seen_offer_ids.extend(state[3])
+        if len(self.seen_offer_ids) >= self.touch_batch:
+            self.flush_seen()
+
+    def flush_seen(self):
+        """Refresh last_seen_ts of the offers on skipped pages."""
+        if not self.seen_offer_ids:
+            return
+        if self.engine is None:
+            self.engine = create_engine(DB_URL)
+        with self.engine.begin() as connection:
+            touch_offers(connection, self.seen_offer_ids, datetime.now())
+        self.seen_offer_ids = []
@@ -1,49 +1,96 @@
 import sys
+import time
 from pathlib import Path
-import json
-from datetime import datetime
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy import create_engine
-from sqlalchemy.dialects.postgresql import insert
+from scrapy.exceptions import DropItem, NotConfigured
 import logging
 
 # Add project root to sys.path
 sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
 
-from core.models import StagingRawOffer
-from config import DB_URL
+from core.metrics import PIPELINE_WRITE_SECONDS
+from core.segments import SegmentWriter
+from core.staging import upsert_staging_stmt
+from config import DB_URL, SEGMENT_DIR
 
 
 class DatabasePipeline:
+    """Writes each item straight into staging_raw_offers (ITEM_SINK = 'database')."""
+
     def __init__(self):
         self.engine = create_engine(DB_URL)
         self.Session = sessionmaker(bind=self.engine)
         self.logger = logging.getLogger(__name__)
 
+    @classmethod
+    def from_crawler(cls, crawler):
+        if crawler.settings.get('ITEM_SINK', 'database') != 'database':
+            raise NotConfigured
+        return cls()
+
     def process_item(self, item, spider):
         session = self.Session()
         self.logger.info(f"PIPELINE: Processing item {item['offer_id']} for spider {spider.name}.")
-        stmt = insert(StagingRawOffer).values(
+        stmt = upsert_staging_stmt(dict(
             offer_id=item['offer_id'],
             retailer=item['retailer'],
             json_blob=item['json_blob'],
             last_seen_ts=item['last_seen_ts']
-        )
-        stmt = stmt.on_conflict_do_update(
-            index_elements=['offer_id'],
-            set_=dict(
-                retailer=stmt.excluded.retailer,
-                json_blob=stmt.excluded.json_blob,
-                last_seen_ts=stmt.excluded.last_seen_ts
-            )
-        )
+        ))
+        started = time.perf_counter()
         try:
             session.execute(stmt)
             session.commit()
+            PIPELINE_WRITE_SECONDS.labels('database').observe(time.perf_counter() - started)
             self.logger.info(f"PIPELINE: Successfully saved item {item['offer_id']} to the database.")
         except Exception as e:
             self.logger.error(f"PIPELINE: Failed to save item {item['offer_id']}. Error: {e}")
             session.rollback()
+            # Dropped items don't fire item_scraped, so incremental crawl state isn't saved for them
+            raise DropItem(f"Failed to save item {item['offer_id']}")
         finally:
             session.close()
-        return item 
\ No newline at end of file
+        return item
+
+
+class SegmentPipeline:
+    """
+    Appends items to local compressed segment files (ITEM_SINK = 'segments').
+
+    The crawl never waits on the database; `etl/ingest_segments.py` loads the
+    sealed segments into staging later in large batches.
+    """
+
+    def __init__(self, directory, max_records, max_bytes):
+        self.directory = Path(directory)
+        self.max_records = max_records
+        self.max_bytes = max_bytes
+        self.logger = logging.getLogger(__name__)
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        if crawler.settings.get('ITEM_SINK', 'database') != 'segments':
+            raise NotConfigured
+        return cls(
+            crawler.settings.get('SEGMENT_DIR') or SEGMENT_DIR,
+            crawler.settings.getint('SEGMENT_MAX_RECORDS', 10000),
+            crawler.settings.getint('SEGMENT_MAX_BYTES', 64 * 1024 * 1024),
+        )
+
+    def open_spider(self, spider):
+        self.writer = SegmentWriter(self.directory / spider.name, spider.name, self.max_records, self.max_bytes)
+
+    def close_spider(self, spider):
+        self.writer.close()
+
+    def process_item(self, item, spider):
+        started = time.perf_counter()
+        self.writer.append(item['offer_id'], dict(
+            offer_id=item['offer_id'],
+            retailer=item['retailer'],
+            json_blob=item['json_blob'],
+            last_seen_ts=item['last_seen_ts']
+        ))
+        PIPELINE_WRITE_SECONDS.labels('segments').observe(time.perf_counter() - started)
+        return item
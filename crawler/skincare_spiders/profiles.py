@@ -0,0 +1,45 @@
+# Per-retailer crawl profiles. Each spider names one via `crawl_profile`; the
+# values seed Scrapy's per-domain download slots and bound the AdaptiveThrottle
+# extension, which moves the delay and concurrency within these limits.
+CRAWL_PROFILES = {
+    # Sites that rate-limit aggressively or serve bot challenges
+    'strict': {
+        'concurrency': 2,
+        'delay': 2.0,
+        'min_delay': 1.0,
+        'max_delay': 30.0,
+        'target_concurrency': 1.0,
+    },
+    'standard': {
+        'concurrency': 4,
+        'delay': 1.0,
+        'min_delay': 0.5,
+        'max_delay': 20.0,
+        'target_concurrency': 2.0,
+    },
+    # Storefronts (e.g. Shopify) that comfortably serve parallel requests
+    'tolerant': {
+        'concurrency': 8,
+        'delay': 0.25,
+        'min_delay': 0.1,
+        'max_delay': 10.0,
+        'target_concurrency': 4.0,
+    },
+}
+
+
+def profile_settings(profile_name, domains):
+    """Scrapy settings that apply a crawl profile to the given domains."""
+    profile = CRAWL_PROFILES[profile_name]
+    return {
+        'DOWNLOAD_SLOTS': {
+            domain: {
+                'concurrency': profile['concurrency'],
+                'delay': profile['delay'],
+                'randomize_delay': True,
+            }
+            for domain in domains
+        },
+        'CONCURRENT_REQUESTS_PER_DOMAIN': profile['concurrency'],
+        'DOWNLOAD_DELAY': profile['delay'],
+    }
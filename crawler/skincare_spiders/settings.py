@@ -19,11 +19,12 @@ ROBOTSTXT_OBEY = False
 USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
 
 # Configure maximum concurrent requests performed by Scrapy (default: 16)
-CONCURRENT_REQUESTS = 8
+# Per-domain limits come from each spider's crawl profile (see profiles.py)
+CONCURRENT_REQUESTS = 16
 
 # Configure a delay for requests for the same website (default: 0)
 # See https://docs.scrapy.org/en/latest/topics/settings.html#download-delay
-# See also autothrottle settings and docs
+# Fallback for domains without a crawl profile; spiders override it per domain
 DOWNLOAD_DELAY = 1.5
 # The download delay setting will honor only one of:
 #CONCURRENT_REQUESTS_PER_DOMAIN = 16
@@ -50,21 +51,39 @@ DOWNLOAD_DELAY = 1.5
 # Enable or disable downloader middlewares
 # See https://docs.scrapy.org/en/latest/topics/downloader-middleware.html
 DOWNLOADER_MIDDLEWARES = {
-    # Standard middlewares work fine
+    # Runs inside HttpCompressionMiddleware (590) so fingerprints cover the decoded body
+    'skincare_spiders.middlewares.IncrementalCrawlMiddleware': 550,
 }
 
+# Where `-a mode=incremental` keeps per-URL ETag/Last-Modified/fingerprints between crawls
+CRAWL_STATE_DIR = '.crawlstate'
+
 # Enable or disable extensions
 # See https://docs.scrapy.org/en/latest/topics/extensions.html
-#EXTENSIONS = {
-#    'scrapy.extensions.telnet.TelnetConsole': None,
-#}
+EXTENSIONS = {
+    'skincare_spiders.extensions.AdaptiveThrottle': 500,
+    'skincare_spiders.extensions.CrawlMetrics': 510,
+}
+
+# Adjust per-domain delay/concurrency from latency and error/429 rates within
+# the spider's crawl profile; replaces AutoThrottle, which should stay disabled
+ADAPTIVE_THROTTLE_ENABLED = True
 
 # Configure pipelines
 # See https://docs.scrapy.org/en/latest/topics/item-pipeline.html
 ITEM_PIPELINES = {
    'skincare_spiders.pipelines.DatabasePipeline': 300,
+   'skincare_spiders.pipelines.SegmentPipeline': 310,
 }
 
+# Where scraped items go: 'database' writes each item to staging_raw_offers,
+# 'segments' appends to local segment files for etl/ingest_segments.py
+ITEM_SINK = 'database'
+# Defaults to config.SEGMENT_DIR; segments rotate at whichever limit is hit first
+#SEGMENT_DIR = ''
+SEGMENT_MAX_RECORDS = 10000
+SEGMENT_MAX_BYTES = 64 * 1024 * 1024
+
 # Enable and configure the AutoThrottle extension (disabled by default)
 # See https://docs.scrapy.org/en/latest/topics/autothrottle.html
 #AUTOTHROTTLE_ENABLED = True
@@ -85,6 +104,8 @@ ITEM_PIPELINES = {
 #HTTPCACHE_DIR = 'httpcache'
 #HTTPCACHE_IGNORE_HTTP_CODES = []
 #HTTPCACHE_STORAGE = 'scrapy.httpcache.FilesystemCacheStorage'
+# Deduplicated, compressed storage used by replay.py; also usable for everyday caching
+#HTTPCACHE_STORAGE = 'skincare_spiders.httpcache.ContentAddressedCacheStorage'
 
 # Set settings whose default value is deprecated to a future-proof value
 REQUEST_FINGERPRINTER_IMPLEMENTATION = '2.7'
@@ -0,0 +1,75 @@
+import scrapy
+from w3lib.url import add_or_replace_parameter, url_query_parameter
+
+from ..profiles import profile_settings
+
+
+class RetailerSpider(scrapy.Spider):
+    """
+    Crawl modes shared by the retailer spiders, selected with `-a mode=...`:
+
+    - sample (default): first listing page, at most `sample_limit` products
+    - full: follow pagination through the whole category
+    - incremental: like full, but product pages are fetched with conditional
+      requests and skipped when unchanged (see IncrementalCrawlMiddleware)
+
+    `-a max_pages=N` caps pagination in full and incremental modes.
+
+    Subclasses declare a `crawl_profile` (see profiles.py) and the
+    `crawl_domains` it applies to.
+    """
+    retailer = None
+    crawl_profile = 'standard'
+    crawl_domains = ()
+    modes = ('sample', 'full', 'incremental')
+    sample_limit = 20
+    # Query parameter used to page through listings when there is no rel="next" link
+    page_param = 'page'
+
+    def __init__(self, mode='sample', max_pages=None, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if mode not in self.modes:
+            raise ValueError(f"Unknown crawl mode {mode!r}; expected one of {', '.join(self.modes)}")
+        self.mode = mode
+        self.max_pages = int(max_pages) if max_pages else None
+        self.pages_crawled = 0
+        self.seen_links = set()
+
+    @classmethod
+    def update_settings(cls, settings):
+        super().update_settings(settings)
+        settings.setdict(profile_settings(cls.crawl_profile, cls.crawl_domains), priority='spider')
+
+    def follow_products(self, response, links, callback):
+        """Requests for the product links on a listing page not already seen in this crawl."""
+        links = [link for link in dict.fromkeys(links) if link not in self.seen_links]
+        if self.mode == 'sample':
+            links = links[:self.sample_limit]
+        self.seen_links.update(links)
+        return [
+            response.follow(link, callback, meta={'incremental': self.mode == 'incremental'})
+            for link in links
+        ]
+
+    def follow_next_page(self, response, callback, found_new_products):
+        """Yield the request for the next listing page, if there should be one."""
+        self.pages_crawled += 1
+        # A page without new products means we ran past the end of the listing
+        if self.mode == 'sample' or not found_new_products:
+            return
+        if self.max_pages and self.pages_crawled >= self.max_pages:
+            self.logger.info(f"Reached max_pages={self.max_pages}, stopping pagination.")
+            return
+        next_url = self.next_page_url(response)
+        if next_url:
+            yield response.follow(next_url, callback)
+
+    def next_page_url(self, response):
+        """The rel="next" link if the page has one, else the page parameter incremented."""
+        rel_next = response.css('link[rel="next"]::attr(href), a[rel="next"]::attr(href)').get()
+        if rel_next:
+            return response.urljoin(rel_next)
+        current_page = url_query_parameter(response.url, self.page_param, '1')
+        if not current_page.isdigit():
+            return None
+        return add_or_replace_parameter(response.url, self.page_param, str(int(current_page) + 1))
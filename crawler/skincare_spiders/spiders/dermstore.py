@@ -1,11 +1,15 @@
 import scrapy
+from .. import extract
 from ..items import RawOfferItem
-import json
+from .base import RetailerSpider
 from datetime import datetime
 
-class DermstoreSpider(scrapy.Spider):
+class DermstoreSpider(RetailerSpider):
     name = 'dermstore'
     retailer = 'dermstore'
+    crawl_profile = 'standard'
+    crawl_domains = ('www.dermstore.com',)
+    page_param = 'pageNumber'
     start_urls = ['https://www.dermstore.com/c/skin-care/']
     
     def parse(self, response):
@@ -36,22 +40,20 @@ class DermstoreSpider(scrapy.Spider):
             self.logger.info(f"Sample links found: {sample_links}")
 
         # Process product links
-        for link in set(product_links[:20]):  # Limit to 20 products for testing
-            if link.startswith('/'):
-                link = response.urljoin(link)
-            yield response.follow(link, self.parse_product)
+        product_requests = self.follow_products(response, product_links, self.parse_product)
+        yield from product_requests
+        yield from self.follow_next_page(response, self.parse, bool(product_requests))
 
     def parse_product(self, response):
         """Parse individual product pages for detailed data."""
         self.logger.info(f"Parsing product page: {response.url}")
         
         # Try to extract structured data from JSON-LD
-        json_ld_scripts = response.css('script[type="application/ld+json"]::text').getall()
         product_data = {}
         
-        for script in json_ld_scripts:
+        for script in extract.iter_script_payloads(response.body, b'application/ld+json'):
             try:
-                data = json.loads(script)
+                data = extract.loads(script)
                 if isinstance(data, dict) and data.get('@type') == 'Product':
                     product_data = data
                     break
@@ -60,7 +62,7 @@ class DermstoreSpider(scrapy.Spider):
                         if isinstance(item, dict) and item.get('@type') == 'Product':
                             product_data = item
                             break
-            except json.JSONDecodeError:
+            except extract.JSONDecodeError:
                 continue
         
         # If no JSON-LD, extract from page elements
@@ -87,7 +89,7 @@ class DermstoreSpider(scrapy.Spider):
         item = RawOfferItem()
         item['retailer'] = self.retailer
         item['offer_id'] = f"{self.retailer}-{response.url.split('/')[-1]}"
-        item['json_blob'] = json.dumps(product_data)
+        item['json_blob'] = extract.dumps(product_data)
         item['last_seen_ts'] = datetime.now().isoformat()
         
         yield item 
\ No newline at end of file
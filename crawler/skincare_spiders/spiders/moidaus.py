@@ -1,11 +1,14 @@
 import scrapy
+from .. import extract
 from ..items import RawOfferItem
-import json
+from .base import RetailerSpider
 from datetime import datetime
 
-class MoidausSpider(scrapy.Spider):
+class MoidausSpider(RetailerSpider):
     name = 'moidaus'
     retailer = 'moidaus'
+    crawl_profile = 'tolerant'
+    crawl_domains = ('moidaus.com',)
     
     def start_requests(self):
         url = 'https://moidaus.com/collections/skin-care'
@@ -30,24 +33,20 @@ class MoidausSpider(scrapy.Spider):
             sample_links = response.css('a::attr(href)').getall()[:10]
             self.logger.info(f"Sample links found: {sample_links}")
             
-        for link in set(product_links[:20]):  # Limit to 20 products for testing
-            yield response.follow(link, self.parse_product)
-        
-        # Skip pagination for now to keep it simple
-        # next_page = response.css('a[rel="next"]::attr(href)').get()
-        # if next_page:
-        #     yield response.follow(next_page, self.parse)
+        product_requests = self.follow_products(response, product_links, self.parse_product)
+        yield from product_requests
+        yield from self.follow_next_page(response, self.parse, bool(product_requests))
 
     def parse_product(self, response):
         self.logger.info(f"Parsing product page: {response.url}")
         
-        script_json = response.css('script[type="application/json"][id*="ProductJson"]::text').get()
+        script_json = extract.script_payload(response.body, b'application/json', b'ProductJson')
         if not script_json:
             self.logger.error(f"Could not find product JSON on {response.url}")
             return
             
         try:
-            product_data = json.loads(script_json)
+            product_data = extract.loads(script_json)
             
             product_id = product_data.get('id')
             if not product_id:
@@ -63,10 +62,10 @@ class MoidausSpider(scrapy.Spider):
             item = RawOfferItem()
             item['retailer'] = self.retailer
             item['offer_id'] = f"{self.retailer}-{product_id}"
-            item['json_blob'] = json.dumps(product_data)
+            item['json_blob'] = extract.dumps(product_data)
             item['last_seen_ts'] = datetime.now().isoformat()
             
             yield item
             
-        except json.JSONDecodeError:
+        except extract.JSONDecodeError:
             self.logger.error(f"Failed to parse product JSON on {response.url}") 
\ No newline at end of file
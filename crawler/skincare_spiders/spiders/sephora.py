@@ -1,11 +1,15 @@
 import scrapy
-import json
 from datetime import datetime
+from .. import extract
 from ..items import RawOfferItem
+from .base import RetailerSpider
 
-class SephoraSpider(scrapy.Spider):
+class SephoraSpider(RetailerSpider):
     name = 'sephora'
     retailer = 'sephora'
+    crawl_profile = 'strict'
+    crawl_domains = ('www.sephora.com',)
+    page_param = 'currentPage'
     
     def start_requests(self):
         url = 'https://www.sephora.com/shop/moisturizing-cream-oils-mists'
@@ -24,22 +28,21 @@ class SephoraSpider(scrapy.Spider):
             
         self.logger.info(f"Found {len(product_links)} product links on {response.url}")
 
-        for link in set(product_links[:20]):  # Limit to 20 products for testing
-            if link.startswith('/'):
-                link = response.urljoin(link)
-            yield scrapy.Request(link, callback=self.parse_product)
+        product_requests = self.follow_products(response, product_links, self.parse_product)
+        yield from product_requests
+        yield from self.follow_next_page(response, self.parse_list, bool(product_requests))
 
     def parse_product(self, response):
         """Extracts detailed product data from an embedded script tag on the product page."""
         self.logger.info(f"Parsing product page: {response.url}")
         
-        script_data = response.css('script[type="application/ld+json"][data-comp="PageJSON"]::text').get()
+        script_data = extract.script_payload(response.body, b'application/ld+json', b'PageJSON')
         if not script_data:
             self.logger.error(f"Could not find PageJSON data on {response.url}")
             return
             
         try:
-            product_json = json.loads(script_data)
+            product_json = extract.loads(script_data)
             
             # The actual product data is nested inside this JSON
             props = product_json.get("props", {})
@@ -54,12 +57,12 @@ class SephoraSpider(scrapy.Spider):
             item = RawOfferItem()
             item['retailer'] = self.retailer
             item['offer_id'] = f"{self.retailer}-{sku}"
-            item['json_blob'] = json.dumps(product_data) # Store the detailed product data
+            item['json_blob'] = extract.dumps(product_data) # Store the detailed product data
             item['last_seen_ts'] = datetime.now().isoformat()
             
             yield item
             
-        except json.JSONDecodeError:
+        except extract.JSONDecodeError:
             self.logger.error(f"Failed to parse PageJSON on {response.url}")
 
  
\ No newline at end of file
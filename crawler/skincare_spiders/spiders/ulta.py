@@ -1,12 +1,14 @@
 import scrapy
-import json
-import re
 from datetime import datetime
+from .. import extract
 from ..items import RawOfferItem
+from .base import RetailerSpider
 
-class UltaSpider(scrapy.Spider):
+class UltaSpider(RetailerSpider):
     name = 'ulta'
     retailer = 'ulta'
+    crawl_profile = 'strict'
+    crawl_domains = ('www.ulta.com',)
 
     def start_requests(self):
         url = 'https://www.ulta.com/shop/skin-care'
@@ -32,25 +34,25 @@ class UltaSpider(scrapy.Spider):
             sample_links = response.css('a::attr(href)').getall()[:10]
             self.logger.info(f"Sample links found: {sample_links}")
 
-        for link in set(product_links[:20]):  # Limit to 20 products for testing
-            yield response.follow(link, self.parse_product)
+        product_requests = self.follow_products(response, product_links, self.parse_product)
+        yield from product_requests
+        yield from self.follow_next_page(response, self.parse_list, bool(product_requests))
 
     def parse_product(self, response):
         """Extracts __APOLLO_STATE__ from the product detail page."""
         self.logger.info(f"Parsing product page: {response.url}")
         
-        script_content = response.xpath("//script[contains(., 'window.__APOLLO_STATE__')]/text()").get()
-        if not script_content:
+        if b'window.__APOLLO_STATE__' not in response.body:
             self.logger.error(f"Could not find __APOLLO_STATE__ script on {response.url}")
             return
         
-        match = re.search(r'window\.__APOLLO_STATE__\s*=\s*(\{.*\})', script_content)
-        if not match:
-            self.logger.error(f"Could not extract __APOOLLO_STATE__ JSON from script on {response.url}")
+        raw_state = extract.assigned_json(response.body, b'window.__APOLLO_STATE__')
+        if not raw_state:
+            self.logger.error(f"Could not extract __APOLLO_STATE__ JSON from script on {response.url}")
             return
             
         try:
-            apollo_state = json.loads(match.group(1))
+            apollo_state = extract.loads(raw_state)
             
             # Find the main product entry in the Apollo state
             product_key = next((key for key in apollo_state if key.startswith('Product:')), None)
@@ -68,10 +70,10 @@ class UltaSpider(scrapy.Spider):
             item = RawOfferItem()
             item['retailer'] = self.retailer
             item['offer_id'] = f"{self.retailer}-{product_id}"
-            item['json_blob'] = json.dumps(product_data)
+            item['json_blob'] = extract.dumps(product_data)
             item['last_seen_ts'] = datetime.now().isoformat()
             
             yield item
             
-        except json.JSONDecodeError:
+        except extract.JSONDecodeError:
             self.logger.error(f"Failed to parse __APOLLO_STATE__ JSON on {response.url}") 
\ No newline at end of file
@@ -1,12 +1,15 @@
 import scrapy
+from .. import extract
 from ..items import RawOfferItem
-import json
+from .base import RetailerSpider
 from datetime import datetime
-import re
 
-class YesstyleSpider(scrapy.Spider):
+class YesstyleSpider(RetailerSpider):
     name = 'yesstyle'
     retailer = 'yesstyle'
+    crawl_profile = 'standard'
+    crawl_domains = ('www.yesstyle.com',)
+    page_param = 'pn'
     base_url = 'https://www.yesstyle.com/en/beauty-skin-care/list.html/bcc.15544_bpt.46'
     
     def start_requests(self):
@@ -34,29 +37,21 @@ class YesstyleSpider(scrapy.Spider):
             sample_links = response.css('a::attr(href)').getall()[:10]
             self.logger.info(f"Sample links found: {sample_links}")
 
-        for pdp_url in set(product_links[:20]):  # Limit to 20 products for testing
-            yield response.follow(pdp_url, self.parse_product)
-        
-        # Skip pagination for now to keep it simple
-        # current_page_match = re.search(r'pn=(\d+)', response.url)
-        # current_page = int(current_page_match.group(1)) if current_page_match else 1
-        # 
-        # if current_page < 3: # Limit pages to avoid excessive scraping
-        #     next_page = current_page + 1
-        #     next_url = f"{self.base_url}?pn={next_page}"
-        #     yield response.follow(next_url, self.parse_list)
+        product_requests = self.follow_products(response, product_links, self.parse_product)
+        yield from product_requests
+        yield from self.follow_next_page(response, self.parse_list, bool(product_requests))
 
     def parse_product(self, response):
         """Parses the product detail page for full product data."""
         self.logger.info(f"Parsing product page: {response.url}")
         
-        script_data = response.css('script[id="__NEXT_DATA__"]::text').get()
+        script_data = extract.script_payload(response.body, b'__NEXT_DATA__')
         if not script_data:
             self.logger.error(f"Could not find __NEXT_DATA__ on product page {response.url}")
             return
 
         try:
-            data = json.loads(script_data)
+            data = extract.loads(script_data)
             product_data = data.get('props', {}).get('pageProps', {}).get('product', {})
             product_id = product_data.get('id')
             
@@ -67,9 +62,9 @@ class YesstyleSpider(scrapy.Spider):
             item = RawOfferItem()
             item['retailer'] = self.retailer
             item['offer_id'] = f"{self.retailer}-{product_id}"
-            item['json_blob'] = json.dumps(product_data)
+            item['json_blob'] = extract.dumps(product_data)
             item['last_seen_ts'] = datetime.now().isoformat()
             yield item
 
-        except json.JSONDecodeError:
+        except extract.JSONDecodeError:
             self.logger.error(f"Failed to parse __NEXT_DATA__ JSON on product page {response.url}") 
\ No newline at end of file
@@ -0,0 +1,81 @@
+import sys
+from pathlib import Path
+
+# Add project root to sys.path
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import config
+from core.database import engine
+from core.segments import iter_segment, mark_ingested, sealed_segments
+from core.staging import upsert_staging_stmt
+
+
+def segment_batches(path, batch_size):
+    """Records of a segment in batches, keeping only the latest record per offer."""
+    batch = {}
+    for record in iter_segment(path):
+        # One INSERT ... ON CONFLICT cannot touch the same offer twice
+        batch.pop(record['offer_id'], None)
+        batch[record['offer_id']] = record
+        if len(batch) >= batch_size:
+            yield list(batch.values())
+            batch = {}
+    if batch:
+        yield list(batch.values())
+
+
+def ingest_to_staging(path, batch_size):
+    """Bulk-upsert one segment into staging_raw_offers in a single transaction."""
+    loaded = 0
+    with engine.begin() as connection:
+        for batch in segment_batches(path, batch_size):
+            connection.execute(upsert_staging_stmt(batch))
+            loaded += len(batch)
+    return loaded
+
+
+def ingest_direct(path, batch_size):
+    """
+    Feed one segment straight through transform_data/load_data, bypassing
+    staging. Segment records carry no staging version, so load_data leaves
+    staging rows (and any leases on them) untouched.
+    """
+    import pandas as pd
+    from etl.load_to_db import transform_data, load_data
+
+    loaded = 0
+    for batch in segment_batches(path, batch_size):
+        df = pd.DataFrame(batch)
+        df['last_seen_ts'] = pd.to_datetime(df['last_seen_ts'])
+        if not load_data(transform_data(df)):
+            raise RuntimeError("load_data rolled back")
+        loaded += len(batch)
+    return loaded
+
+
+def ingest_segments(directory, direct=False, batch_size=1000):
+    """Load every sealed segment under `directory`, oldest first."""
+    segments = sealed_segments(directory)
+    print(f"Found {len(segments)} segments to ingest in {directory}.")
+    total = 0
+    for path in segments:
+        try:
+            loaded = ingest_direct(path, batch_size) if direct else ingest_to_staging(path, batch_size)
+        except Exception as e:
+            # Leave the segment in place so the next run retries it
+            print(f"Error ingesting segment {path.name}: {e}")
+            continue
+        mark_ingested(path)
+        total += loaded
+        print(f"Ingested {loaded} records from {path.name}.")
+    print(f"Successfully ingested {total} records.")
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Load crawler segment files.")
+    parser.add_argument("--dir", default=config.SEGMENT_DIR, help="Segment directory (default: SEGMENT_DIR).")
+    parser.add_argument("--direct", action="store_true", help="Transform and load directly instead of filling staging.")
+    parser.add_argument("--batch-size", type=int, default=1000, help="Records per INSERT.")
+    args = parser.parse_args()
+    ingest_segments(args.dir, args.direct, args.batch_size)
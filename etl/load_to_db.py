@@ -1,34 +1,163 @@
+import os
 import sys
+import socket
+import importlib.util
+import multiprocessing
 from pathlib import Path
-import pandas as pd
 import json
 import re
-from slugify import slugify
 from datetime import datetime
-from bs4 import BeautifulSoup
+
+# pandas, slugify and BeautifulSoup are imported by the functions that use
+# them, so the backfills and `--help` don't pay for them (see charmelle/cli.py)
 
 # Add project root to sys.path
 sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
 
 from core.database import engine
+from sqlalchemy import select, text
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.dialects.postgresql import insert
-from core.models import Product, Offer, PriceHistory, ConditionTag, StagingRawOffer
+from core.models import Product, ProductMatch, ProductIngredient
+from core.ingredients import tokenize_ingredients
+from core.metrics import ETL_ROWS, push_to_textfile
+from etl.matching import match_record, resolve_matches
+from etl.profiling import RunProfiler
+from etl.rollups import update_price_rollups
+from etl.retag import apply_tags
+from etl.tagging import tag_conditions, tag_description
 
 Session = sessionmaker(bind=engine)
 
-# Simple keyword-based tagger
-CONDITION_MAP = {
-    "dryness": ["dry", "hydration", "hydrating", "moisture", "moisturizing"],
-    "acne": ["acne", "blemish", "pore", "breakout", "clear"],
-    "wrinkles": ["wrinkle", "age-defy", "aging", "fine lines", "anti-aging"],
-    "redness": ["redness", "sensitive", "calm", "soothing", "gentle"],
-    "dullness": ["dullness", "brightening", "radiance", "glow", "luminous"],
-}
+# Claim the oldest unsynced rows nobody holds a live lease on. SKIP LOCKED lets
+# concurrent workers pass over rows another worker is claiming right now, so
+# every worker gets a disjoint batch; leases of crashed workers simply expire.
+# Rows whose current version failed to transform wait for a re-crawl.
+CLAIM_SQL = """
+UPDATE staging_raw_offers s
+SET claimed_by = :worker_id, claim_expires_ts = now() + make_interval(secs => :lease_seconds)
+WHERE s.offer_id IN (
+    SELECT offer_id FROM staging_raw_offers
+    WHERE etl_sync_ts IS NULL AND (claim_expires_ts IS NULL OR claim_expires_ts < now())
+      AND failed_version IS DISTINCT FROM version
+    ORDER BY last_seen_ts
+    LIMIT :batch_size
+    FOR UPDATE SKIP LOCKED
+)
+RETURNING s.offer_id, s.retailer, s.json_blob, s.last_seen_ts, s.version
+"""
+
+# Mark loaded rows as synced and release their leases. A row re-crawled with a
+# new blob while it was being loaded has a newer version and stays unsynced,
+# so the change is picked up by the next run. A worker releases every row it
+# holds; a run without leases (worker_id NULL) only touches rows still at the
+# version it loaded, so it never clears a lease a concurrent worker holds on a
+# newer version, and records loaded without a version (segment ingest) leave
+# staging alone.
+MARK_SYNCED_SQL = """
+UPDATE staging_raw_offers s
+SET etl_sync_ts = CASE WHEN s.version = v.version THEN :synced_ts ELSE s.etl_sync_ts END,
+    claimed_by = NULL,
+    claim_expires_ts = NULL
+FROM unnest(CAST(:offer_ids AS text[]), CAST(:versions AS bigint[])) AS v(offer_id, version)
+WHERE s.offer_id = v.offer_id
+  AND CASE WHEN CAST(:worker_id AS text) IS NULL THEN s.version = v.version
+           ELSE s.claimed_by = :worker_id END
+"""
+
+# Release rows of a claimed batch that failed to transform, recording the
+# failed version so they are not claimed again until a re-crawl changes them
+RELEASE_FAILED_SQL = """
+UPDATE staging_raw_offers s
+SET failed_version = v.version, claimed_by = NULL, claim_expires_ts = NULL
+FROM unnest(CAST(:offer_ids AS text[]), CAST(:versions AS bigint[])) AS v(offer_id, version)
+WHERE s.offer_id = v.offer_id AND s.claimed_by = :worker_id
+"""
+
+# Bulk writes take one array per column and unnest them server-side, so a
+# batch is sent without building a dict per row or a VALUES list per row.
+# Descriptions are kept per offer and merged onto products by DESCRIBE_PRODUCTS_SQL.
+UPSERT_PRODUCTS_SQL = """
+INSERT INTO products (product_id, brand, name, variant, product_type, ingredients)
+SELECT * FROM unnest(CAST(:product_id AS text[]), CAST(:brand AS text[]), CAST(:name AS text[]),
+                     CAST(:variant AS text[]), CAST(:product_type AS text[]), CAST(:ingredients AS text[]))
+ON CONFLICT (product_id) DO NOTHING
+"""
+
+UPSERT_OFFERS_SQL = """
+INSERT INTO offers (offer_id, product_id, retailer, price, currency, rating, url, availability, description, last_seen_ts)
+SELECT * FROM unnest(CAST(:offer_id AS text[]), CAST(:product_id AS text[]), CAST(:retailer AS text[]),
+                     CAST(:price AS numeric[]), CAST(:currency AS text[]), CAST(:rating AS numeric[]),
+                     CAST(:url AS text[]), CAST(:availability AS text[]), CAST(:description AS text[]),
+                     CAST(:last_seen_ts AS timestamp[]))
+ON CONFLICT (offer_id) DO UPDATE SET
+    retailer = EXCLUDED.retailer, price = EXCLUDED.price, currency = EXCLUDED.currency,
+    rating = EXCLUDED.rating, url = EXCLUDED.url, availability = EXCLUDED.availability,
+    description = COALESCE(EXCLUDED.description, offers.description),
+    last_seen_ts = EXCLUDED.last_seen_ts
+"""
+
+# A canonical product is sold by several retailers, each describing it
+# differently, so its description is the union of its offers' descriptions
+# (one per line) and its tags don't depend on which retailer was loaded last.
+# The WHERE clause compares old and new explicitly, so only products whose
+# text changed are returned for re-tagging.
+LOCK_PRODUCTS_SQL = """
+SELECT product_id FROM products WHERE product_id = ANY(CAST(:product_ids AS text[])) ORDER BY product_id FOR UPDATE
+"""
+
+DESCRIBE_PRODUCTS_SQL = """
+UPDATE products p SET description = d.description
+FROM (
+    SELECT product_id, string_agg(DISTINCT description, E'\\n' ORDER BY description) AS description
+    FROM offers
+    WHERE product_id = ANY(CAST(:product_ids AS text[])) AND description <> ''
+    GROUP BY product_id
+) d
+WHERE p.product_id = d.product_id AND p.description IS DISTINCT FROM d.description
+RETURNING p.product_id, p.brand, p.name, p.description
+"""
+
+INSERT_PRICE_HISTORY_SQL = """
+INSERT INTO price_history (offer_id, ts, price)
+SELECT * FROM unnest(CAST(:offer_id AS text[]), CAST(:last_seen_ts AS timestamp[]), CAST(:price AS numeric[]))
+ON CONFLICT (offer_id, ts) DO NOTHING
+"""
+
+INSERT_TAGS_SQL = """
+INSERT INTO condition_tags (product_id, condition)
+SELECT * FROM unnest(CAST(:product_ids AS text[]), CAST(:values AS text[]))
+ON CONFLICT (product_id, condition) DO NOTHING
+"""
+
+INSERT_INGREDIENTS_SQL = """
+INSERT INTO product_ingredients (product_id, ingredient)
+SELECT * FROM unnest(CAST(:product_ids AS text[]), CAST(:values AS text[]))
+ON CONFLICT (product_id, ingredient) DO NOTHING
+"""
+
+# transform_data output. Low-cardinality text is categorical (each distinct
+# value stored once), other text uses pandas' string dtype (see string_dtype),
+# ratings are float32.
+CATEGORY_COLUMNS = ['retailer', 'currency', 'availability', 'product_type', 'brand']
+STRING_COLUMNS = ['offer_id', 'product_id', 'name', 'variant', 'ingredients', 'description', 'url']
+EXTRACTED_COLUMNS = ['brand', 'name', 'variant', 'product_type', 'ingredients', 'price', 'currency',
+                     'rating', 'url', 'availability', 'description']
+
+def string_dtype():
+    """pandas' string dtype, Arrow-backed when pyarrow is installed."""
+    import pandas as pd
+    return pd.StringDtype("pyarrow" if importlib.util.find_spec("pyarrow") else "python")
 
 def get_unsynced_offers(limit):
     """Fetch raw offers that haven't been processed yet."""
-    query = "SELECT * FROM staging_raw_offers WHERE etl_sync_ts IS NULL"
+    import pandas as pd
+
+    # Rows leased by running workers are left to them, and versions that
+    # already failed to transform wait for a re-crawl
+    query = ("SELECT * FROM staging_raw_offers WHERE etl_sync_ts IS NULL"
+             " AND (claim_expires_ts IS NULL OR claim_expires_ts < now())"
+             " AND failed_version IS DISTINCT FROM version")
     if limit:
         query += f" LIMIT {limit}"
     
@@ -36,6 +165,15 @@ def get_unsynced_offers(limit):
         df = pd.read_sql(query, connection)
     return df
 
+def claim_offers(worker_id, batch_size, lease_seconds):
+    """Lease a batch of unsynced raw offers to `worker_id` and return them."""
+    import pandas as pd
+
+    with engine.begin() as connection:
+        return pd.read_sql(text(CLAIM_SQL), connection, params={
+            'worker_id': worker_id, 'batch_size': batch_size, 'lease_seconds': lease_seconds,
+        })
+
 def extract_sephora_data(json_data):
     """Extract data from Sephora's detailed product page JSON."""
     data = {}
@@ -103,6 +241,8 @@ def extract_ulta_data(json_data):
 
 def extract_moidaus_data(json_data):
     """Extract data from Moidaus's product JSON and description HTML."""
+    from bs4 import BeautifulSoup
+
     data = {}
     data['name'] = json_data.get('title', '')
     data['brand'] = json_data.get('vendor', '')
@@ -129,6 +269,8 @@ def extract_moidaus_data(json_data):
 
 def extract_yesstyle_data(json_data):
     """Extract data from YesStyle's __NEXT_DATA__ structure."""
+    from bs4 import BeautifulSoup
+
     data = {}
     data['name'] = json_data.get('name', '')
     data['brand'] = json_data.get('brand', {}).get('name', '')
@@ -154,8 +296,18 @@ def extract_yesstyle_data(json_data):
     data['description'] = ' '.join(filter(None, [data['brand'], data['name']]))
     return data
 
+EXTRACTORS = {
+    'sephora': extract_sephora_data,
+    'dermstore': extract_dermstore_data,
+    'ulta': extract_ulta_data,
+    'moidaus': extract_moidaus_data,
+    'yesstyle': extract_yesstyle_data,
+}
+
 def generate_product_id(row):
     """Generate a canonical product ID from brand, name, and variant."""
+    from slugify import slugify
+
     brand = slugify(row.get('brand', ''))
     name = slugify(row.get('name', ''))
     variant = slugify(row.get('variant', ''))
@@ -189,141 +341,411 @@ def clean_price(price_str):
     except (ValueError, TypeError):
         return None
 
+def compact_frame(columns):
+    """A DataFrame of transformed columns (name -> list of values) with compact dtypes."""
+    import pandas as pd
+
+    strings = string_dtype()
+    frame = {name: pd.Categorical(columns[name]) for name in CATEGORY_COLUMNS}
+    frame.update({name: pd.Series(columns[name], dtype=object).astype(strings) for name in STRING_COLUMNS})
+    frame['price'] = pd.Series(columns['price'], dtype='float64')
+    frame['rating'] = pd.Series(columns['rating'], dtype='float32')
+    frame['last_seen_ts'] = pd.to_datetime(pd.Series(columns['last_seen_ts'], dtype=object))
+    frame['version'] = pd.Series(columns['version'], dtype='Int64')
+    frame['condition_tags'] = pd.Series(columns['condition_tags'], dtype=object)
+    frame['ingredient_tokens'] = pd.Series(columns['ingredient_tokens'], dtype=object)
+    return pd.DataFrame(frame)
+
 def transform_data(df):
     """Parse JSON, generate IDs, and tag conditions."""
+    import pandas as pd
+
     if df.empty:
         return pd.DataFrame()
 
-    # Parse JSON and extract data based on retailer
-    extracted_data = []
-    for _, row in df.iterrows():
+    # Parse JSON and extract data based on retailer, straight into columns
+    columns = {name: [] for name in EXTRACTED_COLUMNS + ['offer_id', 'retailer', 'last_seen_ts', 'version']}
+    versions = df['version'] if 'version' in df else [None] * len(df)
+    for offer_id, retailer, json_blob, last_seen_ts, version in zip(
+        df['offer_id'], df['retailer'], df['json_blob'], df['last_seen_ts'], versions
+    ):
+        extract = EXTRACTORS.get(retailer)
+        if extract is None:
+            continue
         try:
-            json_data = json.loads(row['json_blob'])
-            retailer = row['retailer']
-            
-            if retailer == 'sephora':
-                extracted = extract_sephora_data(json_data)
-            elif retailer == 'dermstore':
-                extracted = extract_dermstore_data(json_data)
-            elif retailer == 'ulta':
-                extracted = extract_ulta_data(json_data)
-            elif retailer == 'moidaus':
-                extracted = extract_moidaus_data(json_data)
-            elif retailer == 'yesstyle':
-                extracted = extract_yesstyle_data(json_data)
-            else:
-                continue
-            
-            # Add original row data
-            extracted.update({
-                'offer_id': row['offer_id'],
-                'retailer': row['retailer'],
-                'last_seen_ts': row['last_seen_ts']
-            })
-            
-            extracted_data.append(extracted)
+            extracted = extract(json.loads(json_blob))
         except Exception as e:
-            print(f"Error processing offer {row.get('offer_id', 'unknown')}: {e}")
+            print(f"Error processing offer {offer_id}: {e}")
             continue
-    
-    if not extracted_data:
+
+        for name in EXTRACTED_COLUMNS:
+            columns[name].append(extracted.get(name))
+        columns['offer_id'].append(offer_id)
+        columns['retailer'].append(retailer)
+        columns['last_seen_ts'].append(last_seen_ts)
+        columns['version'].append(None if pd.isna(version) else version)
+
+    if not columns['offer_id']:
         return pd.DataFrame()
-    
-    # Create DataFrame from extracted data
-    df = pd.DataFrame(extracted_data)
-    
+
     # Generate IDs
-    df['product_id'] = df.apply(generate_product_id, axis=1)
-    
+    columns['product_id'] = [
+        generate_product_id({'brand': brand, 'name': name, 'variant': variant})
+        for brand, name, variant in zip(columns['brand'], columns['name'], columns['variant'])
+    ]
+
     # Clean rating and price values
-    df['rating'] = df['rating'].apply(clean_rating)
-    df['price'] = df['price'].apply(clean_price)
-    
+    columns['rating'] = [clean_rating(rating) for rating in columns['rating']]
+    columns['price'] = [clean_price(price) for price in columns['price']]
+
     # Tag conditions
-    df['condition_tags'] = df['description'].apply(tag_conditions)
-    
-    return df
+    columns['condition_tags'] = [tag_conditions(description) for description in columns['description']]
+
+    # Normalize ingredient lists for the inverted index
+    columns['ingredient_tokens'] = [tokenize_ingredients(ingredients) for ingredients in columns['ingredients']]
+
+    return compact_frame(columns)
+
+def describe_products(session, product_ids):
+    """
+    Merge the offers' descriptions onto `product_ids` and re-tag the products
+    whose description changed. Returns how many products' tags changed.
+    """
+    # Lock in primary-key order like the other writes, so concurrent workers don't deadlock
+    session.execute(text(LOCK_PRODUCTS_SQL), {'product_ids': product_ids})
+    described = session.execute(text(DESCRIBE_PRODUCTS_SQL), {'product_ids': product_ids}).all()
+    if not described:
+        return 0
+    return apply_tags(session, {
+        row.product_id: set(tag_description(row.brand, row.name, row.description)) for row in described
+    })
+
+def column_values(series):
+    """A column as a plain list for an array parameter, with missing values as None."""
+    return series.astype(object).where(series.notna(), None).tolist()
+
+def column_params(df, names):
+    return {name: column_values(df[name]) for name in names}
+
+def pair_params(product_ids, value_lists):
+    """Sorted, de-duplicated (product_id, value) pairs from a list column, as two arrays."""
+    pairs = sorted({(product_id, value) for product_id, values in zip(product_ids, value_lists) for value in values})
+    return {'product_ids': [p for p, _ in pairs], 'values': [v for _, v in pairs]}
+
+def resolve_product_ids(session, df):
+    """
+    Map the batch's product IDs onto canonical products shared across retailers.
+
+    New IDs are matched against the canonical products of the same brand blocks
+    only. Returns the remapped DataFrame and the product_matches rows to record.
+    """
+    batch = df[['product_id', 'brand', 'name', 'variant']].drop_duplicates(subset=['product_id'])
+    known = dict(session.execute(
+        select(ProductMatch.product_id, ProductMatch.canonical_product_id)
+        .where(ProductMatch.product_id.in_(batch['product_id'].tolist()))
+    ).all())
+
+    pending = [match_record(*row) for row in batch.itertuples(index=False) if row.product_id not in known]
+    match_records = []
+    if pending:
+        blocks = list({r['block'] for r in pending})
+        rows = session.execute(
+            select(Product.product_id, Product.brand, Product.name, Product.variant)
+            .join(ProductMatch, ProductMatch.product_id == Product.product_id)
+            .where(ProductMatch.brand_key.in_(blocks))
+            .where(ProductMatch.canonical_product_id == Product.product_id)
+        ).all()
+        canonical = [match_record(*row) for row in rows]
+        resolved = resolve_matches(canonical + pending, {r['product_id'] for r in canonical})
+        for record in pending:
+            canonical_id, score = resolved[record['product_id']]
+            known[record['product_id']] = canonical_id
+            match_records.append({
+                'product_id': record['product_id'],
+                'canonical_product_id': canonical_id,
+                'brand_key': record['block'],
+                'similarity': score,
+            })
 
-def tag_conditions(description):
-    """Tag a product based on keywords in its description."""
-    tags = set()
-    if not isinstance(description, str):
-        return []
-    
-    lower_desc = description.lower()
-    for condition, keywords in CONDITION_MAP.items():
-        if any(re.search(r'\b' + keyword + r'\b', lower_desc) for keyword in keywords):
-            tags.add(condition)
-    return list(tags)
-
-def load_data(df):
-    """Load transformed data into canonical tables."""
+    df = df.assign(product_id=df['product_id'].map(lambda pid: known.get(pid, pid)).astype(string_dtype()))
+    return df, match_records
+
+def load_data(df, worker_id=None):
+    """
+    Load transformed data into canonical tables. Returns False if the load was rolled back.
+
+    Rows are written in primary-key order so concurrent workers lock shared
+    products in the same order instead of deadlocking. Staging rows are marked
+    as synced only if they still hold the version that was loaded (and, with
+    `worker_id`, are still leased to that worker).
+    """
     if df.empty:
         print("No new data to load.")
-        return
+        return True
 
     session = Session()
     try:
+        # Collapse the same product sold by different retailers onto one ID
+        df, match_records = resolve_product_ids(session, df)
+
+        # Offers and price points go out in (offer_id, ts) order
+        df = df.sort_values(['offer_id', 'last_seen_ts'], ignore_index=True)
+
         # Upsert Products
-        products_df = df[['product_id', 'brand', 'name', 'variant', 'product_type', 'ingredients']].drop_duplicates(subset=['product_id'])
-        products_records = products_df.to_dict(orient='records')
-        if products_records:
-            stmt = insert(Product).values(products_records)
+        products_df = df[['product_id', 'brand', 'name', 'variant', 'product_type', 'ingredients']].drop_duplicates(subset=['product_id']).sort_values('product_id')
+        if not products_df.empty:
+            session.execute(text(UPSERT_PRODUCTS_SQL), column_params(products_df, products_df.columns))
+
+        # Record how the batch's product IDs were resolved
+        if match_records:
+            stmt = insert(ProductMatch).values(sorted(match_records, key=lambda m: m['product_id']))
             stmt = stmt.on_conflict_do_nothing(index_elements=['product_id'])
             session.execute(stmt)
 
         # Upsert Offers
-        offers_df = df[['offer_id', 'product_id', 'retailer', 'price', 'currency', 'rating', 'url', 'availability', 'last_seen_ts']]
-        offers_records = offers_df.to_dict(orient='records')
-        if offers_records:
-            stmt = insert(Offer).values(offers_records)
-            update_dict = {c.name: c for c in stmt.excluded if c.name not in ['offer_id', 'product_id']}
-            stmt = stmt.on_conflict_do_update(index_elements=['offer_id'], set_=update_dict)
-            session.execute(stmt)
+        session.execute(text(UPSERT_OFFERS_SQL), column_params(df, [
+            'offer_id', 'product_id', 'retailer', 'price', 'currency', 'rating', 'url', 'availability', 'description',
+            'last_seen_ts',
+        ]))
 
         # Insert into Price History (if price changed)
         # A more robust implementation would check against the last recorded price
-        price_history_df = df[['offer_id', 'last_seen_ts', 'price']].rename(columns={'last_seen_ts': 'ts'})
-        price_records = price_history_df.to_dict(orient='records')
-        if price_records:
-            stmt = insert(PriceHistory).values(price_records)
-            stmt = stmt.on_conflict_do_nothing(index_elements=['offer_id', 'ts'])
-            session.execute(stmt)
-            
-        # Insert Condition Tags
-        tags_df = df[['product_id', 'condition_tags']].explode('condition_tags').dropna()
-        tags_df = tags_df.rename(columns={'condition_tags': 'condition'})
-        tags_records = tags_df.to_dict(orient='records')
-        if tags_records:
-            stmt = insert(ConditionTag).values(tags_records)
-            stmt = stmt.on_conflict_do_nothing(index_elements=['product_id', 'condition'])
-            session.execute(stmt)
+        session.execute(text(INSERT_PRICE_HISTORY_SQL), column_params(df, ['offer_id', 'last_seen_ts', 'price']))
+
+        # Refresh the daily/weekly rollups the new points fall into
+        update_price_rollups(session, df['offer_id'].unique().tolist(), df['last_seen_ts'].min())
 
-        # Mark raw offers as synced
-        session.query(StagingRawOffer).filter(StagingRawOffer.offer_id.in_(df['offer_id'].tolist())).update({"etl_sync_ts": datetime.utcnow()})
+        # Insert Condition Tags
+        tags = pair_params(df['product_id'], df['condition_tags'])
+        if tags['product_ids']:
+            session.execute(text(INSERT_TAGS_SQL), tags)
+
+        # Products whose merged description changed are re-tagged from it,
+        # dropping tags none of their offers' texts support any more
+        describe_products(session, products_df['product_id'].tolist())
+
+        # Insert Ingredient Index
+        ingredients = pair_params(df['product_id'], df['ingredient_tokens'])
+        if ingredients['product_ids']:
+            session.execute(text(INSERT_INGREDIENTS_SQL), ingredients)
+
+        # Mark the loaded versions of the raw offers as synced
+        session.execute(text(MARK_SYNCED_SQL), {
+            'offer_ids': column_values(df['offer_id']),
+            'versions': column_values(df['version']),
+            'synced_ts': datetime.utcnow(),
+            'worker_id': worker_id,
+        })
 
         session.commit()
         print(f"Successfully processed and loaded {len(df)} offers.")
+        return True
     except Exception as e:
         session.rollback()
         print(f"Error during data loading: {e}")
+        return False
     finally:
         session.close()
 
+def rebuild_product_matches():
+    """
+    Re-cluster the whole catalog into canonical products. Offers, tags,
+    ingredients and product rollups move to the canonical product, which is
+    re-described and re-tagged from all its offers, and the merged products
+    are deleted, all in one transaction.
+    """
+    session = Session()
+    try:
+        rows = session.execute(select(Product.product_id, Product.brand, Product.name, Product.variant)).all()
+        records = [match_record(*row) for row in rows]
+        resolved = resolve_matches(records)
+
+        match_records = [{
+            'product_id': r['product_id'],
+            'canonical_product_id': resolved[r['product_id']][0],
+            'brand_key': r['block'],
+            'similarity': resolved[r['product_id']][1],
+        } for r in records]
+        if match_records:
+            stmt = insert(ProductMatch).values(match_records)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=['product_id'],
+                set_={c: stmt.excluded[c] for c in ['canonical_product_id', 'brand_key', 'similarity', 'matched_ts']}
+            )
+            session.execute(stmt)
+
+        merged = [{'product_id': m['product_id'], 'canonical_product_id': m['canonical_product_id']}
+                  for m in match_records if m['product_id'] != m['canonical_product_id']]
+        if merged:
+            session.execute(text("CREATE TEMP TABLE merged_products (product_id TEXT PRIMARY KEY, canonical_product_id TEXT) ON COMMIT DROP"))
+            session.execute(text("INSERT INTO merged_products VALUES (:product_id, :canonical_product_id)"), merged)
+            moved_offer_ids = session.execute(text("""
+                UPDATE offers o SET product_id = m.canonical_product_id
+                FROM merged_products m WHERE o.product_id = m.product_id
+                RETURNING o.offer_id
+            """)).scalars().all()
+            for table, column in [('condition_tags', 'condition'), ('product_ingredients', 'ingredient')]:
+                session.execute(text(f"""
+                    INSERT INTO {table} (product_id, {column})
+                    SELECT m.canonical_product_id, t.{column}
+                    FROM {table} t JOIN merged_products m USING (product_id)
+                    ON CONFLICT DO NOTHING
+                """))
+                session.execute(text(f"DELETE FROM {table} t USING merged_products m WHERE t.product_id = m.product_id"))
+            # Aliases matched onto a product that has now been merged follow it
+            session.execute(text("""
+                UPDATE product_matches pm SET canonical_product_id = m.canonical_product_id
+                FROM merged_products m WHERE pm.canonical_product_id = m.product_id
+            """))
+            # Product rollups of the merged products are rebuilt under their canonical product
+            session.execute(text("DELETE FROM price_rollups_product r USING merged_products m WHERE r.product_id = m.product_id"))
+            if moved_offer_ids:
+                update_price_rollups(session, moved_offer_ids, datetime(1970, 1, 1))
+            session.execute(text("DELETE FROM products p USING merged_products m WHERE p.product_id = m.product_id"))
+            # Canonical products now also carry the merged products' offer descriptions
+            describe_products(session, sorted({m['canonical_product_id'] for m in merged}))
+
+        session.commit()
+        print(f"Matched {len(records)} products into {len(records) - len(merged)} canonical products.")
+    except Exception as e:
+        session.rollback()
+        print(f"Error during product matching: {e}")
+    finally:
+        session.close()
+
+def reindex_ingredients(chunk_size=5000):
+    """Rebuild the ingredient index for every product, one chunk at a time."""
+    session = Session()
+    indexed = 0
+    last_id = ''
+    try:
+        while True:
+            rows = session.execute(
+                select(Product.product_id, Product.ingredients)
+                .where(Product.product_id > last_id)
+                .order_by(Product.product_id)
+                .limit(chunk_size)
+            ).all()
+            if not rows:
+                break
+            last_id = rows[-1].product_id
+            product_ids = [row.product_id for row in rows]
+            records = [
+                {'product_id': row.product_id, 'ingredient': token}
+                for row in rows for token in tokenize_ingredients(row.ingredients)
+            ]
+            session.query(ProductIngredient).filter(ProductIngredient.product_id.in_(product_ids)).delete(synchronize_session=False)
+            if records:
+                session.execute(insert(ProductIngredient).values(records))
+            session.commit()
+            indexed += len(rows)
+        print(f"Reindexed ingredients for {indexed} products.")
+    except Exception as e:
+        session.rollback()
+        print(f"Error during ingredient reindex: {e}")
+    finally:
+        session.close()
+
+def failed_offers(claimed_df, transformed_df):
+    """(offer_ids, versions) of claimed rows that transform_data dropped."""
+    transformed = set(transformed_df['offer_id']) if not transformed_df.empty else set()
+    failed = claimed_df[~claimed_df['offer_id'].isin(transformed)]
+    return column_values(failed['offer_id']), column_values(failed['version'])
+
+def release_failed(worker_id, offer_ids, versions):
+    """Release the lease on rows that failed to transform and park them until re-crawled."""
+    with engine.begin() as connection:
+        connection.execute(text(RELEASE_FAILED_SQL), {
+            'offer_ids': offer_ids, 'versions': versions, 'worker_id': worker_id,
+        })
+
+def run_worker(worker_id, batch_size=1000, lease_seconds=600):
+    """Claim, transform and load staging batches until none are left to claim."""
+    # Forked workers must not reuse the parent's pooled connections
+    engine.dispose(close=False)
+    processed = failed = 0
+    while True:
+        claimed_df = claim_offers(worker_id, batch_size, lease_seconds)
+        if claimed_df.empty:
+            break
+        ETL_ROWS.labels('extract').inc(len(claimed_df))
+        transformed_df = transform_data(claimed_df)
+        ETL_ROWS.labels('transform').inc(len(transformed_df))
+        # Rows that can't be transformed would otherwise stay leased and fail
+        # again every time their lease expires
+        failed_ids, failed_versions = failed_offers(claimed_df, transformed_df)
+        if failed_ids:
+            release_failed(worker_id, failed_ids, failed_versions)
+            ETL_ROWS.labels('failed').inc(len(failed_ids))
+            failed += len(failed_ids)
+        # A failed load keeps its lease and is retried by whoever claims it after it expires
+        if load_data(transformed_df, worker_id):
+            ETL_ROWS.labels('load').inc(len(transformed_df))
+        processed += len(claimed_df)
+    print(f"Worker {worker_id} processed {processed} staging rows ({failed} failed to transform).")
+    push_to_textfile(f"etl_{worker_id.replace(':', '_')}")
+
+def run_workers(workers, batch_size=1000, lease_seconds=600):
+    """Run `workers` claiming ETL processes on this host and wait for them to finish."""
+    prefix = f"{socket.gethostname()}:{os.getpid()}"
+    if workers == 1:
+        run_worker(f"{prefix}:0", batch_size, lease_seconds)
+        return
+    processes = [
+        multiprocessing.Process(target=run_worker, args=(f"{prefix}:{i}", batch_size, lease_seconds))
+        for i in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+
 if __name__ == "__main__":
     import argparse
     parser = argparse.ArgumentParser(description="ETL process for skincare products.")
     parser.add_argument("--limit", type=int, help="Max staging rows to process.", default=None)
     parser.add_argument("--dry-run", action="store_true", help="Parse only, don't write to DB.")
+    parser.add_argument("--rebuild-matches", action="store_true", help="Re-cluster the whole catalog into canonical products and exit.")
+    parser.add_argument("--reindex-ingredients", action="store_true", help="Rebuild the ingredient index for all products and exit.")
+    parser.add_argument("--workers", type=int, default=None, help="Process staging in N parallel workers that claim disjoint batches.")
+    parser.add_argument("--batch-size", type=int, default=1000, help="Staging rows claimed per worker batch.")
+    parser.add_argument("--lease-seconds", type=int, default=600, help="How long a claimed batch stays reserved for its worker.")
+    parser.add_argument("--profile", action="store_true", help="Run under cProfile and report the top functions.")
+    parser.add_argument("--trace-stages", action="store_true", help="Report wall time and peak memory per ETL stage.")
+    parser.add_argument("--sample", action="store_true", help="Sample the main thread's stack and write folded stacks.")
+    parser.add_argument("--sample-interval", type=float, default=0.005, help="Seconds between stack samples.")
+    parser.add_argument("--profile-dir", default="profiles", help="Directory for profile reports.")
     args = parser.parse_args()
 
+    if args.rebuild_matches:
+        rebuild_product_matches()
+        sys.exit(0)
+    if args.reindex_ingredients:
+        reindex_ingredients()
+        sys.exit(0)
+    if args.workers:
+        print(f"Starting ETL with {args.workers} workers...")
+        run_workers(args.workers, args.batch_size, args.lease_seconds)
+        print("ETL process finished.")
+        sys.exit(0)
+
     print("Starting ETL process...")
-    raw_offers_df = get_unsynced_offers(args.limit)
-    transformed_df = transform_data(raw_offers_df)
-    
-    if not args.dry_run:
-        load_data(transformed_df)
-    else:
-        print("Dry run complete. Data transformed:")
-        print(transformed_df.head())
+    profiler = RunProfiler('etl', args.profile_dir, args.profile, args.trace_stages, args.sample, args.sample_interval)
+    with profiler:
+        with profiler.stage('extract'):
+            raw_offers_df = get_unsynced_offers(args.limit)
+        ETL_ROWS.labels('extract').inc(len(raw_offers_df))
+        with profiler.stage('transform'):
+            transformed_df = transform_data(raw_offers_df)
+        ETL_ROWS.labels('transform').inc(len(transformed_df))
+
+        if not args.dry_run:
+            with profiler.stage('load'):
+                loaded = load_data(transformed_df)
+            if loaded:
+                ETL_ROWS.labels('load').inc(len(transformed_df))
+        else:
+            print("Dry run complete. Data transformed:")
+            print(transformed_df.head())
+    push_to_textfile('etl')
     print("ETL process finished.") 
\ No newline at end of file
@@ -0,0 +1,132 @@
+import sys
+from pathlib import Path
+from datetime import date
+from sqlalchemy import text
+
+# Add project root to sys.path
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import config
+from core.database import engine
+
+PARTITION_PREFIX = "price_history_"
+
+LIST_PARTITIONS_SQL = """
+SELECT c.relname
+FROM pg_inherits i
+JOIN pg_class c ON c.oid = i.inhrelid
+JOIN pg_class parent ON parent.oid = i.inhparent
+WHERE parent.relname = 'price_history'
+"""
+
+
+def add_months(month_start, months):
+    """First day of the month `months` after `month_start`."""
+    index = month_start.year * 12 + month_start.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month_start):
+    return f"{PARTITION_PREFIX}{month_start:%Y%m}"
+
+
+def partition_month(name):
+    """Month a price_history_YYYYMM partition covers, or None for other partitions."""
+    suffix = name[len(PARTITION_PREFIX):]
+    if not name.startswith(PARTITION_PREFIX) or len(suffix) != 6 or not suffix.isdigit():
+        return None
+    return date(int(suffix[:4]), int(suffix[4:]), 1)
+
+
+def attached_partitions(connection):
+    return {row[0] for row in connection.execute(text(LIST_PARTITIONS_SQL))}
+
+
+def ensure_partitions(months_ahead=None, today=None):
+    """Create monthly price_history partitions from this month up to `months_ahead`."""
+    months_ahead = config.PRICE_HISTORY_PARTITIONS_AHEAD if months_ahead is None else months_ahead
+    this_month = (today or date.today()).replace(day=1)
+    created = []
+    with engine.begin() as connection:
+        existing = attached_partitions(connection)
+        for offset in range(months_ahead + 1):
+            lower = add_months(this_month, offset)
+            upper = add_months(lower, 1)
+            name = partition_name(lower)
+            if name in existing:
+                continue
+            # Build the partition standalone so rows that landed in the default
+            # partition for this month can be moved before attaching it.
+            connection.execute(text(f"CREATE TABLE {name} (LIKE price_history INCLUDING DEFAULTS)"))
+            connection.execute(text(f"""
+                WITH moved AS (
+                    DELETE FROM price_history_default WHERE ts >= :lower AND ts < :upper
+                    RETURNING offer_id, ts, price
+                )
+                INSERT INTO {name} (offer_id, ts, price) SELECT offer_id, ts, price FROM moved
+            """), {'lower': lower, 'upper': upper})
+            connection.execute(text(
+                f"ALTER TABLE price_history ATTACH PARTITION {name} FOR VALUES FROM ('{lower}') TO ('{upper}')"
+            ))
+            created.append(name)
+    print(f"Created {len(created)} price_history partitions: {', '.join(created) or 'none'}")
+    return created
+
+
+def expire_partitions(retention_months=None, action=None, today=None):
+    """Detach or drop price_history partitions older than the retention window."""
+    retention_months = config.PRICE_HISTORY_RETENTION_MONTHS if retention_months is None else retention_months
+    action = action or config.PRICE_HISTORY_RETENTION_ACTION
+    if action not in ("detach", "drop"):
+        raise ValueError(f"Unknown retention action: {action}")
+
+    cutoff = add_months((today or date.today()).replace(day=1), -retention_months)
+    expired = []
+    with engine.begin() as connection:
+        for name in sorted(attached_partitions(connection)):
+            month = partition_month(name)
+            if month is None or add_months(month, 1) > cutoff:
+                continue
+            connection.execute(text(f"ALTER TABLE price_history DETACH PARTITION {name}"))
+            if action == "drop":
+                connection.execute(text(f"DROP TABLE {name}"))
+            expired.append(name)
+    print(f"Expired ({action}) {len(expired)} price_history partitions: {', '.join(expired) or 'none'}")
+    return expired
+
+
+def prune_staging(retention_days=None, batch_size=10000):
+    """Delete already-synced staging rows not seen for `retention_days`, in small batches."""
+    retention_days = config.STAGING_RETENTION_DAYS if retention_days is None else retention_days
+    total = 0
+    while True:
+        # Short transactions keep locks and WAL bursts small on a large table
+        with engine.begin() as connection:
+            result = connection.execute(text("""
+                DELETE FROM staging_raw_offers
+                WHERE offer_id IN (
+                    SELECT offer_id FROM staging_raw_offers
+                    WHERE etl_sync_ts IS NOT NULL
+                      AND last_seen_ts < now() - make_interval(days => :days)
+                    LIMIT :batch_size
+                )
+            """), {'days': retention_days, 'batch_size': batch_size})
+        total += result.rowcount
+        if result.rowcount < batch_size:
+            break
+    print(f"Pruned {total} synced staging rows older than {retention_days} days.")
+    return total
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Partition and retention maintenance.")
+    parser.add_argument("--months-ahead", type=int, default=None, help="Future price_history partitions to keep ready.")
+    parser.add_argument("--retention-months", type=int, default=None, help="Months of raw price_history to keep.")
+    parser.add_argument("--retention-action", choices=["detach", "drop"], default=None, help="What to do with expired partitions.")
+    parser.add_argument("--staging-retention-days", type=int, default=None, help="Days to keep synced staging rows.")
+    args = parser.parse_args()
+
+    ensure_partitions(args.months_ahead)
+    expire_partitions(args.retention_months, args.retention_action)
+    prune_staging(args.staging_retention_days)
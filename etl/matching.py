@@ -0,0 +1,212 @@
+import re
+import random
+import unicodedata
+import zlib
+
+# Brand suffixes that retailers append inconsistently ("CeraVe" vs "CeraVe Skincare")
+BRAND_STOPWORDS = {"skincare", "skin", "care", "beauty", "cosmetics", "labs", "lab", "inc", "co", "the"}
+
+# Sizes are compared in a common unit; cosmetics are close enough to 1 g/ml
+SIZE_UNITS = {
+    "ml": 1.0,
+    "l": 1000.0,
+    "floz": 29.5735,
+    "oz": 29.5735,
+    "g": 1.0,
+    "kg": 1000.0,
+    "mg": 0.001,
+}
+SIZE_RE = re.compile(r"(\d+(?:\.\d+)?)\s*(fl\.?\s*oz|oz|ml|mg|kg|g|l)\b")
+SIZE_TOLERANCE = 0.08
+# Standalone numbers and percentages in a name ("Retinol 0.5%", "No. 5"), once sizes are removed
+NUMBER_RE = re.compile(r"(?<![a-z0-9.])\d+(?:\.\d+)?%?(?![a-z0-9])")
+
+SIMILARITY_THRESHOLD = 0.7
+
+# MinHash / LSH parameters: 8 bands of 4 rows catch pairs above ~0.6 Jaccard
+NUM_PERM = 32
+LSH_BANDS = 8
+LSH_ROWS = NUM_PERM // LSH_BANDS
+# Blocks smaller than this are compared pairwise, which is cheaper than hashing
+LSH_MIN_BLOCK = 64
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_rng = random.Random(1337)
+_PERMUTATIONS = [
+    (_rng.randrange(1, _MERSENNE_PRIME), _rng.randrange(0, _MERSENNE_PRIME))
+    for _ in range(NUM_PERM)
+]
+
+
+def _ascii_lower(value):
+    """Lowercase and strip accents so "Rodial" and "Ródial" compare equal."""
+    if not isinstance(value, str):
+        return ""
+    value = unicodedata.normalize("NFKD", value)
+    return value.encode("ascii", "ignore").decode("ascii").lower()
+
+
+def normalize_brand(brand):
+    """Blocking key for a brand name."""
+    tokens = re.findall(r"[a-z0-9]+", _ascii_lower(brand).replace("&", " and "))
+    kept = [t for t in tokens if t not in BRAND_STOPWORDS]
+    return "".join(kept or tokens)
+
+
+def parse_size(text):
+    """Return the first size found in text in ml-equivalents, or None."""
+    match = SIZE_RE.search(_ascii_lower(text))
+    if not match:
+        return None
+    unit = re.sub(r"[^a-z]", "", match.group(2))
+    return float(match.group(1)) * SIZE_UNITS[unit]
+
+
+def normalize_name(name, brand=""):
+    """Lowercase, strip sizes, punctuation and a leading brand from a product name."""
+    tokens = re.findall(r"[a-z0-9]+", SIZE_RE.sub(" ", _ascii_lower(name)))
+    brand_tokens = set(re.findall(r"[a-z0-9]+", _ascii_lower(brand)))
+    start = 0
+    while start < len(tokens) - 1 and tokens[start] in brand_tokens:
+        start += 1
+    return " ".join(tokens[start:])
+
+
+def name_numbers(name):
+    """Numeric tokens of a product name other than its size, e.g. {"0.5%"}."""
+    return frozenset(NUMBER_RE.findall(SIZE_RE.sub(" ", _ascii_lower(name))))
+
+
+def variant_key(variant):
+    """The non-size part of a variant (shade, scent), normalized."""
+    text = SIZE_RE.sub(" ", _ascii_lower(variant))
+    return " ".join(re.findall(r"[a-z0-9]+", text))
+
+
+def trigrams(text):
+    """Character trigrams of a padded string, as used by pg_trgm."""
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def jaccard(a, b):
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def minhash(shingles):
+    """MinHash signature of a set of shingles."""
+    hashes = [zlib.crc32(s.encode("utf-8")) for s in shingles]
+    return tuple(
+        min((a * h + b) % _MERSENNE_PRIME for h in hashes)
+        for a, b in _PERMUTATIONS
+    )
+
+
+def match_record(product_id, brand, name, variant):
+    """Precompute the features used for matching a product."""
+    return {
+        "product_id": product_id,
+        "block": normalize_brand(brand),
+        "trigrams": trigrams(normalize_name(name, brand)),
+        "size": parse_size(variant) or parse_size(name),
+        "variant": variant_key(variant),
+        "numbers": name_numbers(name),
+    }
+
+
+def similarity(left, right):
+    """Similarity of two match records, or 0.0 if they are incompatible."""
+    if left["variant"] and right["variant"] and left["variant"] != right["variant"]:
+        return 0.0
+    # Trigrams barely notice "0.5%" vs "1%", but they are different products
+    if left["numbers"] and right["numbers"] and left["numbers"] != right["numbers"]:
+        return 0.0
+    if left["size"] and right["size"]:
+        if abs(left["size"] - right["size"]) > SIZE_TOLERANCE * max(left["size"], right["size"]):
+            return 0.0
+    return jaccard(left["trigrams"], right["trigrams"])
+
+
+def candidate_pairs(records):
+    """Yield index pairs within one block that are worth comparing."""
+    if len(records) < LSH_MIN_BLOCK:
+        for i in range(len(records)):
+            for j in range(i + 1, len(records)):
+                yield i, j
+        return
+
+    # Locality-sensitive hashing: records sharing any band bucket are candidates
+    seen = set()
+    buckets = {}
+    for idx, record in enumerate(records):
+        signature = minhash(record["trigrams"]) if record["trigrams"] else None
+        if signature is None:
+            continue
+        for band in range(LSH_BANDS):
+            key = (band, signature[band * LSH_ROWS:(band + 1) * LSH_ROWS])
+            for other in buckets.setdefault(key, []):
+                if (other, idx) not in seen:
+                    seen.add((other, idx))
+                    yield other, idx
+            buckets[key].append(idx)
+
+
+class UnionFind:
+    def __init__(self):
+        self.parent = {}
+
+    def find(self, item):
+        parent = self.parent.setdefault(item, item)
+        if parent != item:
+            parent = self.parent[item] = self.find(parent)
+        return parent
+
+    def union(self, a, b):
+        root_a, root_b = self.find(a), self.find(b)
+        if root_a != root_b:
+            self.parent[root_b] = root_a
+
+
+def resolve_matches(records, canonical_ids=(), threshold=SIMILARITY_THRESHOLD):
+    """
+    Cluster match records into canonical products.
+
+    Records are blocked by normalized brand and only compared within a block,
+    so cost grows with block size rather than catalog size. `canonical_ids`
+    are products that already act as canonical and are preferred as cluster
+    representatives. Returns {product_id: (canonical_product_id, score)}.
+    """
+    canonical_ids = set(canonical_ids)
+    blocks = {}
+    for record in records:
+        blocks.setdefault(record["block"], []).append(record)
+
+    clusters = UnionFind()
+    best_score = {}
+    for block in blocks.values():
+        for record in block:
+            clusters.find(record["product_id"])
+        for i, j in candidate_pairs(block):
+            left, right = block[i], block[j]
+            # Two existing canonical products are never merged implicitly
+            if left["product_id"] in canonical_ids and right["product_id"] in canonical_ids:
+                continue
+            score = similarity(left, right)
+            if score >= threshold:
+                clusters.union(left["product_id"], right["product_id"])
+                for pid in (left["product_id"], right["product_id"]):
+                    best_score[pid] = max(best_score.get(pid, 0.0), score)
+
+    members = {}
+    for record in records:
+        members.setdefault(clusters.find(record["product_id"]), []).append(record["product_id"])
+
+    mapping = {}
+    for group in members.values():
+        preferred = sorted(pid for pid in group if pid in canonical_ids) or sorted(group)
+        canonical = preferred[0]
+        for pid in group:
+            mapping[pid] = (canonical, 1.0 if pid == canonical else best_score.get(pid, 0.0))
+    return mapping
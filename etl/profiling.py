@@ -0,0 +1,245 @@
+import cProfile
+import json
+import os
+import pstats
+import resource
+import subprocess
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+from pathlib import Path
+
+# Profiling hooks for the ETL CLI. Every profiled run writes one JSON report
+# (<dir>/<job>-<timestamp>.json) with whichever sections were enabled:
+#   stages  - wall time, tracemalloc peak and process max RSS per stage
+#   profile - top functions by cumulative time from cProfile (full .prof alongside)
+#   sample  - most frequent stacks from a wall-clock sampler (.folded alongside,
+#             ready for flamegraph.pl / speedscope)
+# Reports from two releases can be compared with `python etl/profiling.py diff`.
+
+TOP_FUNCTIONS = 50
+TOP_STACKS = 50
+
+
+def max_rss_bytes():
+    """Peak resident set size of this process so far."""
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return rss if sys.platform == 'darwin' else rss * 1024
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+            cwd=Path(__file__).resolve().parent, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class StageTracer:
+    """Wall time, Python heap peak (tracemalloc) and max RSS for each named stage."""
+
+    def __init__(self):
+        self.stages = []
+
+    def start(self):
+        tracemalloc.start()
+
+    def stop(self):
+        tracemalloc.stop()
+
+    @contextmanager
+    def stage(self, name):
+        tracemalloc.reset_peak()
+        heap_before = tracemalloc.get_traced_memory()[0]
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            heap_after, heap_peak = tracemalloc.get_traced_memory()
+            self.stages.append({
+                'stage': name,
+                'seconds': round(time.perf_counter() - started, 4),
+                'heap_peak_bytes': heap_peak,
+                'heap_delta_bytes': heap_after - heap_before,
+                'max_rss_bytes': max_rss_bytes(),
+            })
+
+
+class StackSampler:
+    """Periodically record the target thread's Python stack from a background thread."""
+
+    def __init__(self, interval=0.005, thread_id=None):
+        self.interval = interval
+        self.thread_id = thread_id or threading.get_ident()
+        self.stacks = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='stack-sampler', daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.stacks[fold_stack(frame)] += 1
+                self.samples += 1
+
+    def folded(self):
+        """Stacks in the collapsed `root;...;leaf count` format."""
+        return ''.join(f'{stack} {count}\n' for stack, count in self.stacks.most_common())
+
+
+def fold_stack(frame):
+    """Collapse a frame chain into `outer;...;inner` of file:function entries."""
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f'{Path(code.co_filename).name}:{code.co_name}')
+        frame = frame.f_back
+    return ';'.join(reversed(names))
+
+
+def top_functions(profiler, limit=TOP_FUNCTIONS):
+    """The most expensive functions of a cProfile run by cumulative time."""
+    stats = pstats.Stats(profiler)
+    rows = []
+    for (filename, line, name), (_, calls, tottime, cumtime, _) in stats.stats.items():
+        rows.append({
+            'function': f'{Path(filename).name}:{line}({name})',
+            'calls': calls,
+            'tottime': round(tottime, 4),
+            'cumtime': round(cumtime, 4),
+        })
+    rows.sort(key=lambda row: row['cumtime'], reverse=True)
+    return rows[:limit]
+
+
+class RunProfiler:
+    """
+    Collects the enabled profiles for one CLI run and writes its report.
+
+    Use `stage(name)` around each step of the run; with no profiling enabled it
+    only records the ETL stage metrics.
+    """
+
+    def __init__(self, job, directory, profile=False, trace_stages=False, sample=False, sample_interval=0.005):
+        self.job = job
+        self.directory = Path(directory)
+        self.profiler = cProfile.Profile() if profile else None
+        self.tracer = StageTracer() if trace_stages else None
+        self.sampler = StackSampler(sample_interval) if sample else None
+
+    @property
+    def enabled(self):
+        return bool(self.profiler or self.tracer or self.sampler)
+
+    def __enter__(self):
+        self.started = datetime.utcnow()
+        self.wall_started = time.perf_counter()
+        if self.tracer:
+            self.tracer.start()
+        if self.sampler:
+            self.sampler.start()
+        if self.profiler:
+            self.profiler.enable()
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.profiler:
+            self.profiler.disable()
+        if self.sampler:
+            self.sampler.stop()
+        if self.tracer:
+            self.tracer.stop()
+        if self.enabled:
+            path = self.write_report()
+            print(f"Profile report written to {path}")
+        return False
+
+    @contextmanager
+    def stage(self, name):
+        # Imported here so `profiling.py diff` runs without the project on sys.path
+        from core.metrics import track_stage
+
+        with track_stage(name), (self.tracer.stage(name) if self.tracer else nullcontext()):
+            yield
+
+    def write_report(self):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        base = self.directory / f'{self.job}-{self.started:%Y%m%dT%H%M%S}-{os.getpid()}'
+        report = {
+            'job': self.job,
+            'started': self.started.isoformat(),
+            'seconds': round(time.perf_counter() - self.wall_started, 4),
+            'revision': git_revision(),
+            'python': sys.version.split()[0],
+            'argv': sys.argv[1:],
+            'max_rss_bytes': max_rss_bytes(),
+        }
+        if self.tracer:
+            report['stages'] = self.tracer.stages
+        if self.profiler:
+            self.profiler.dump_stats(f'{base}.prof')
+            report['profile'] = {'file': f'{base.name}.prof', 'functions': top_functions(self.profiler)}
+        if self.sampler:
+            Path(f'{base}.folded').write_text(self.sampler.folded())
+            report['sample'] = {
+                'file': f'{base.name}.folded',
+                'interval': self.sampler.interval,
+                'samples': self.sampler.samples,
+                'stacks': [{'stack': s, 'count': c} for s, c in self.sampler.stacks.most_common(TOP_STACKS)],
+            }
+        path = Path(f'{base}.json')
+        path.write_text(json.dumps(report, indent=2))
+        return path
+
+
+def compare_reports(old, new):
+    """Per-stage and per-function changes between two reports, largest regressions first."""
+    changes = {}
+    old_stages = {s['stage']: s for s in old.get('stages', [])}
+    changes['stages'] = [
+        {
+            'stage': s['stage'],
+            'seconds': s['seconds'],
+            'seconds_delta': round(s['seconds'] - old_stages[s['stage']]['seconds'], 4),
+            'heap_peak_delta_bytes': s['heap_peak_bytes'] - old_stages[s['stage']]['heap_peak_bytes'],
+        }
+        for s in new.get('stages', []) if s['stage'] in old_stages
+    ]
+    old_functions = {f['function']: f for f in old.get('profile', {}).get('functions', [])}
+    functions = [
+        {
+            'function': f['function'],
+            'cumtime': f['cumtime'],
+            'cumtime_delta': round(f['cumtime'] - old_functions.get(f['function'], {}).get('cumtime', 0.0), 4),
+        }
+        for f in new.get('profile', {}).get('functions', [])
+    ]
+    changes['functions'] = sorted(functions, key=lambda f: f['cumtime_delta'], reverse=True)
+    return changes
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Compare two ETL profile reports.")
+    parser.add_argument("command", choices=["diff"])
+    parser.add_argument("old", help="Baseline report (JSON).")
+    parser.add_argument("new", help="Report to compare against the baseline.")
+    args = parser.parse_args()
+    old_report = json.loads(Path(args.old).read_text())
+    new_report = json.loads(Path(args.new).read_text())
+    print(json.dumps(compare_reports(old_report, new_report), indent=2))
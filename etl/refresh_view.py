@@ -1,4 +1,5 @@
 import sys
+import time
 from pathlib import Path
 from sqlalchemy import text
 
@@ -6,6 +7,99 @@ from sqlalchemy import text
 sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
 
 from core.database import engine
+from core.metrics import push_to_textfile, track_stage
+
+VIEW = "products_latest"
+SHADOW = f"{VIEW}_next"
+PREVIOUS = f"{VIEW}_prev"
+
+# Must match the definition in the latest products_latest migration
+# (see ce9f5d7b0a18_add_rank_score_to_products_latest.py for the rank_score
+# weights); tests/test_refresh_view.py checks that it does
+PRODUCTS_LATEST_QUERY = """
+WITH offer_stats AS (
+    SELECT
+        p.product_id,
+        p.brand,
+        p.name,
+        p.variant,
+        p.ingredients,
+        p.product_type,
+        MIN(o.price) as min_price,
+        MAX(o.price) as max_price,
+        AVG(o.price) as avg_price,
+        AVG(o.rating) as avg_rating,
+        COUNT(o.rating) as rating_count,
+        COUNT(o.offer_id) as offer_count,
+        COUNT(o.offer_id) FILTER (WHERE o.availability = 'in_stock') as in_stock_count,
+        MAX(o.last_seen_ts) as last_seen_ts
+    FROM products p
+    LEFT JOIN offers o ON p.product_id = o.product_id
+    GROUP BY p.product_id, p.brand, p.name, p.variant, p.ingredients, p.product_type
+),
+prior AS (
+    SELECT
+        (SELECT AVG(rating) FROM offers) as mean_rating,
+        (SELECT MAX(offer_count) FROM offer_stats) as max_offers
+)
+SELECT
+    s.product_id,
+    s.brand,
+    s.name,
+    s.variant,
+    s.ingredients,
+    s.min_price,
+    s.max_price,
+    s.avg_price,
+    s.avg_rating,
+    s.offer_count,
+    s.last_seen_ts,
+    (
+        0.60 * COALESCE((3 * pr.mean_rating + s.rating_count * COALESCE(s.avg_rating, 0)) / (3 + s.rating_count) / 5, 0)
+      + 0.15 * COALESCE(s.in_stock_count::numeric / NULLIF(s.offer_count, 0), 0)
+      + 0.15 * COALESCE(LN(1 + s.offer_count) / NULLIF(LN(1 + pr.max_offers), 0), 0)
+      + 0.10 * CASE WHEN s.min_price IS NULL THEN 0
+                    ELSE 1 - PERCENT_RANK() OVER (PARTITION BY s.product_type, s.min_price IS NULL ORDER BY s.min_price)
+               END
+    )::float8 as rank_score
+FROM offer_stats s
+CROSS JOIN prior pr
+"""
+
+# Index name suffix -> indexed columns. Indexes are named idx_<view>_<suffix>
+# and renamed along with their view on every swap.
+VIEW_INDEXES = {
+    "min_price": "(min_price)",
+    "avg_rating": "(avg_rating)",
+    "rank_score": "(rank_score DESC, product_id)",
+}
+
+def rename_view(connection, old, new):
+    """Rename a products_latest build and its indexes."""
+    connection.execute(text(f"ALTER MATERIALIZED VIEW {old} RENAME TO {new}"))
+    for suffix in VIEW_INDEXES:
+        connection.execute(text(f"ALTER INDEX IF EXISTS idx_{old}_{suffix} RENAME TO idx_{new}_{suffix}"))
+
+def record_version(connection, mode, row_count, build_seconds):
+    """Record a new active build of the view and return its version id."""
+    if mode == "swap":
+        connection.execute(text(f"UPDATE {VIEW}_versions SET state = 'retired' WHERE state = 'previous'"))
+        connection.execute(text(f"UPDATE {VIEW}_versions SET state = 'previous' WHERE state = 'active'"))
+    else:
+        connection.execute(text(f"UPDATE {VIEW}_versions SET state = 'retired' WHERE state = 'active'"))
+    return connection.execute(text(f"""
+        INSERT INTO {VIEW}_versions (mode, row_count, build_seconds, state)
+        VALUES (:mode, :row_count, :build_seconds, 'active')
+        RETURNING version
+    """), {'mode': mode, 'row_count': row_count, 'build_seconds': build_seconds}).scalar()
+
+def record_rollback(connection):
+    """Make the previous build active again and the active one previous."""
+    connection.execute(text(f"""
+        UPDATE {VIEW}_versions
+        SET state = CASE state WHEN 'active' THEN 'previous' ELSE 'active' END
+        WHERE state IN ('active', 'previous')
+    """))
 
 def refresh_view():
     """Refreshes the materialized view for the API."""
@@ -14,13 +108,79 @@ def refresh_view():
         try:
             # The CONCURRENTLY option requires a unique index on the view.
             # For local use, a standard refresh is acceptable, though it will
-            # lock the view during the refresh.
-            connection.execute(text("REFRESH MATERIALIZED VIEW products_latest;"))
+            # lock the view during the refresh. Use swap_view() to avoid that.
+            started = time.perf_counter()
+            with track_stage('refresh_view'):
+                connection.execute(text("REFRESH MATERIALIZED VIEW products_latest;"))
+            row_count = connection.execute(text(f"SELECT count(*) FROM {VIEW}")).scalar()
+            version = record_version(connection, "refresh", row_count, time.perf_counter() - started)
             connection.commit()
-            print("Successfully refreshed the view.")
+            print(f"Successfully refreshed the view (version {version}).")
         except Exception as e:
             print(f"Error refreshing view: {e}")
             connection.rollback()
 
+def swap_view():
+    """
+    Build the next products_latest beside the live one and swap it in.
+
+    The shadow view is built, indexed and analyzed while the API keeps reading
+    the current one; only the renames run in the swap transaction. The
+    replaced build is kept as products_latest_prev for rollback_view().
+    """
+    print(f"Building {SHADOW}...")
+    started = time.perf_counter()
+    try:
+        with track_stage('refresh_view'):
+            with engine.begin() as connection:
+                # Left behind by a failed build
+                connection.execute(text(f"DROP MATERIALIZED VIEW IF EXISTS {SHADOW}"))
+                connection.execute(text(f"CREATE MATERIALIZED VIEW {SHADOW} AS {PRODUCTS_LATEST_QUERY}"))
+                for suffix, columns in VIEW_INDEXES.items():
+                    connection.execute(text(f"CREATE INDEX idx_{SHADOW}_{suffix} ON {SHADOW} {columns}"))
+                connection.execute(text(f"ANALYZE {SHADOW}"))
+                row_count = connection.execute(text(f"SELECT count(*) FROM {SHADOW}")).scalar()
+        build_seconds = time.perf_counter() - started
+
+        with engine.begin() as connection:
+            # Don't queue behind a long read while holding locks that block the API
+            connection.execute(text("SET LOCAL lock_timeout = '5s'"))
+            connection.execute(text(f"DROP MATERIALIZED VIEW IF EXISTS {PREVIOUS}"))
+            rename_view(connection, VIEW, PREVIOUS)
+            rename_view(connection, SHADOW, VIEW)
+            version = record_version(connection, "swap", row_count, build_seconds)
+        print(f"Swapped in version {version} ({row_count} products, built in {build_seconds:.1f}s).")
+    except Exception as e:
+        print(f"Error rebuilding view: {e}")
+
+def rollback_view():
+    """Swap the previous build of products_latest back in."""
+    try:
+        with engine.begin() as connection:
+            previous = connection.execute(text(f"SELECT version FROM {VIEW}_versions WHERE state = 'previous'")).scalar()
+            if previous is None:
+                print("No previous version to roll back to.")
+                return
+            connection.execute(text("SET LOCAL lock_timeout = '5s'"))
+            rename_view(connection, VIEW, SHADOW)
+            rename_view(connection, PREVIOUS, VIEW)
+            rename_view(connection, SHADOW, PREVIOUS)
+            record_rollback(connection)
+        print(f"Rolled back to version {previous}.")
+    except Exception as e:
+        print(f"Error rolling back view: {e}")
+
 if __name__ == "__main__":
-    refresh_view() 
\ No newline at end of file
+    import argparse
+    parser = argparse.ArgumentParser(description="Refresh the products_latest view.")
+    parser.add_argument("--swap", action="store_true", help="Build a new version beside the live view and swap it in.")
+    parser.add_argument("--rollback", action="store_true", help="Swap the previous version back in.")
+    args = parser.parse_args()
+
+    if args.rollback:
+        rollback_view()
+    elif args.swap:
+        swap_view()
+    else:
+        refresh_view()
+    push_to_textfile('refresh_view')
@@ -0,0 +1,108 @@
+import sys
+import multiprocessing
+from pathlib import Path
+from sqlalchemy import select, text
+from sqlalchemy.dialects.postgresql import insert
+
+# Add project root to sys.path
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from core.database import engine
+from core.models import ConditionTag, Product, TaggerVersion
+from etl.tagging import TAGGER_VERSION, tag_description, tag_diff
+
+DELETE_TAGS_SQL = """
+DELETE FROM condition_tags ct
+USING unnest(CAST(:product_ids AS text[]), CAST(:conditions AS text[])) AS d(product_id, condition)
+WHERE ct.product_id = d.product_id AND ct.condition = d.condition
+"""
+
+
+def product_chunks(chunk_size):
+    """
+    Stream (product_id, brand, name, description) rows in keyset-ordered chunks.
+
+    A product's description is the union of its offers' descriptions (see
+    DESCRIBE_PRODUCTS_SQL in etl/load_to_db.py), so its tags cover every
+    retailer's text.
+    """
+    last_id = ''
+    while True:
+        with engine.connect() as connection:
+            rows = connection.execute(
+                select(Product.product_id, Product.brand, Product.name, Product.description)
+                .where(Product.product_id > last_id)
+                .order_by(Product.product_id)
+                .limit(chunk_size)
+            ).all()
+        if not rows:
+            return
+        last_id = rows[-1].product_id
+        yield [tuple(row) for row in rows]
+
+
+def tag_chunk(rows):
+    """Current tag set of every product in a chunk (runs in a pool worker)."""
+    return {product_id: set(tag_description(brand, name, description)) for product_id, brand, name, description in rows}
+
+
+def apply_tags(connection, new_tags):
+    """Bring condition_tags in line with `new_tags`; returns how many products changed."""
+    product_ids = list(new_tags)
+    old_tags = {}
+    for product_id, condition in connection.execute(
+        select(ConditionTag.product_id, ConditionTag.condition).where(ConditionTag.product_id.in_(product_ids))
+    ):
+        old_tags.setdefault(product_id, set()).add(condition)
+
+    inserts, deletes = tag_diff(product_ids, old_tags, new_tags)
+    if inserts:
+        stmt = insert(ConditionTag).values([{'product_id': p, 'condition': c} for p, c in inserts])
+        connection.execute(stmt.on_conflict_do_nothing(index_elements=['product_id', 'condition']))
+    if deletes:
+        connection.execute(text(DELETE_TAGS_SQL), {
+            'product_ids': [p for p, _ in deletes],
+            'conditions': [c for _, c in deletes],
+        })
+    return len({p for p, _ in inserts} | {p for p, _ in deletes})
+
+
+def retag_products(chunk_size=5000, processes=None, force=False):
+    """
+    Recompute condition tags for the whole catalog with the current tagger.
+
+    Chunks are tagged in a process pool while the main process applies the
+    differences, so only products whose tag set changed are written. The run
+    is recorded in tagger_versions and skipped next time unless `force`.
+    """
+    with engine.connect() as connection:
+        applied = connection.execute(select(TaggerVersion.version).where(TaggerVersion.version == TAGGER_VERSION)).scalar()
+    if applied and not force:
+        print(f"Tagger {TAGGER_VERSION} is already applied.")
+        return
+
+    print(f"Re-tagging products with tagger {TAGGER_VERSION}...")
+    checked = changed = 0
+    with multiprocessing.Pool(processes) as pool:
+        for new_tags in pool.imap(tag_chunk, product_chunks(chunk_size)):
+            with engine.begin() as connection:
+                changed += apply_tags(connection, new_tags)
+            checked += len(new_tags)
+
+    with engine.begin() as connection:
+        stmt = insert(TaggerVersion).values(version=TAGGER_VERSION, products_changed=changed)
+        connection.execute(stmt.on_conflict_do_update(
+            index_elements=['version'],
+            set_={'applied_ts': text('now()'), 'products_changed': stmt.excluded.products_changed}
+        ))
+    print(f"Checked {checked} products; tags changed for {changed}.")
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Recompute condition tags after CONDITION_MAP changes.")
+    parser.add_argument("--chunk-size", type=int, default=5000, help="Products per chunk.")
+    parser.add_argument("--processes", type=int, default=None, help="Tagging processes (default: CPU count).")
+    parser.add_argument("--force", action="store_true", help="Re-run even if this tagger version was already applied.")
+    args = parser.parse_args()
+    retag_products(args.chunk_size, args.processes, args.force)
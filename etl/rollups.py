@@ -0,0 +1,84 @@
+import sys
+from pathlib import Path
+from datetime import datetime
+from sqlalchemy import text
+
+# Add project root to sys.path
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from core.database import engine
+
+# date_trunc fields rolled up after every load
+RESOLUTIONS = ("day", "week")
+
+# Buckets from `since` onwards are recomputed from the raw points, so re-running is idempotent.
+# Rows are upserted in key order so concurrent ETL workers don't deadlock on shared buckets.
+OFFER_ROLLUP_SQL = """
+INSERT INTO price_rollups_offer (offer_id, resolution, bucket_start, min_price, max_price, last_price, last_ts)
+SELECT offer_id, :resolution, date_trunc(:resolution, ts) AS bucket_start,
+       MIN(price), MAX(price), (array_agg(price ORDER BY ts DESC))[1], MAX(ts)
+FROM price_history
+WHERE price IS NOT NULL
+  AND (CAST(:offer_ids AS text[]) IS NULL OR offer_id = ANY(:offer_ids))
+  AND ts >= date_trunc(:resolution, CAST(:since AS timestamp))
+GROUP BY offer_id, bucket_start
+ORDER BY offer_id, bucket_start
+ON CONFLICT (offer_id, resolution, bucket_start) DO UPDATE SET
+    min_price = EXCLUDED.min_price,
+    max_price = EXCLUDED.max_price,
+    last_price = EXCLUDED.last_price,
+    last_ts = EXCLUDED.last_ts
+"""
+
+# Product buckets are derived from the offer buckets rather than the raw points
+PRODUCT_ROLLUP_SQL = """
+INSERT INTO price_rollups_product (product_id, resolution, bucket_start, min_price, max_price, last_price, last_ts, offer_count)
+SELECT o.product_id, r.resolution, r.bucket_start,
+       MIN(r.min_price), MAX(r.max_price), (array_agg(r.last_price ORDER BY r.last_ts DESC))[1], MAX(r.last_ts),
+       COUNT(*)
+FROM price_rollups_offer r
+JOIN offers o ON o.offer_id = r.offer_id
+WHERE r.resolution = :resolution
+  AND r.bucket_start >= date_trunc(:resolution, CAST(:since AS timestamp))
+  AND (CAST(:offer_ids AS text[]) IS NULL
+       OR o.product_id IN (SELECT product_id FROM offers WHERE offer_id = ANY(:offer_ids)))
+GROUP BY o.product_id, r.resolution, r.bucket_start
+ORDER BY o.product_id, r.bucket_start
+ON CONFLICT (product_id, resolution, bucket_start) DO UPDATE SET
+    min_price = EXCLUDED.min_price,
+    max_price = EXCLUDED.max_price,
+    last_price = EXCLUDED.last_price,
+    last_ts = EXCLUDED.last_ts,
+    offer_count = EXCLUDED.offer_count
+"""
+
+
+def update_price_rollups(connection, offer_ids, since):
+    """
+    Refresh the daily/weekly rollups touched by new price points.
+
+    `offer_ids` limits the work to the offers (and their products) that just
+    received points; pass None to roll up every offer. Runs on the caller's
+    connection or session so it commits together with the load.
+    """
+    params = {'offer_ids': list(offer_ids) if offer_ids is not None else None, 'since': since}
+    for resolution in RESOLUTIONS:
+        connection.execute(text(OFFER_ROLLUP_SQL), {**params, 'resolution': resolution})
+        connection.execute(text(PRODUCT_ROLLUP_SQL), {**params, 'resolution': resolution})
+
+
+def rebuild_price_rollups(since=None):
+    """Recompute rollups for every offer from `since` (default: all history)."""
+    since = since or datetime(1970, 1, 1)
+    print(f"Rebuilding price rollups since {since:%Y-%m-%d}...")
+    with engine.begin() as connection:
+        update_price_rollups(connection, None, since)
+    print("Successfully rebuilt price rollups.")
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Rebuild price history rollups.")
+    parser.add_argument("--since", type=datetime.fromisoformat, help="Only rebuild buckets from this date (YYYY-MM-DD).", default=None)
+    args = parser.parse_args()
+    rebuild_price_rollups(args.since)
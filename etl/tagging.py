@@ -0,0 +1,50 @@
+import hashlib
+import json
+import re
+
+# Simple keyword-based tagger. Editing this map changes TAGGER_VERSION, and
+# `python etl/retag.py` brings the tags of already loaded products up to date.
+CONDITION_MAP = {
+    "dryness": ["dry", "hydration", "hydrating", "moisture", "moisturizing"],
+    "acne": ["acne", "blemish", "pore", "breakout", "clear"],
+    "wrinkles": ["wrinkle", "age-defy", "aging", "fine lines", "anti-aging"],
+    "redness": ["redness", "sensitive", "calm", "soothing", "gentle"],
+    "dullness": ["dullness", "brightening", "radiance", "glow", "luminous"],
+}
+
+TAGGER_VERSION = hashlib.sha1(json.dumps(CONDITION_MAP, sort_keys=True).encode("utf-8")).hexdigest()[:12]
+
+# One alternation per condition instead of a regex search per keyword
+CONDITION_PATTERNS = {
+    condition: re.compile(r"\b(?:" + "|".join(re.escape(keyword) for keyword in keywords) + r")\b")
+    for condition, keywords in CONDITION_MAP.items()
+}
+
+
+def tag_conditions(description):
+    """Tag a product based on keywords in its description."""
+    if not isinstance(description, str):
+        return []
+    lower_desc = description.lower()
+    return sorted(condition for condition, pattern in CONDITION_PATTERNS.items() if pattern.search(lower_desc))
+
+
+def tag_description(brand, name, description):
+    """Tags for a stored product; products loaded before descriptions were kept fall back to brand and name."""
+    if description is None:
+        description = " ".join(filter(None, [brand, name]))
+    return tag_conditions(description)
+
+
+def tag_diff(product_ids, old_tags, new_tags):
+    """
+    Rows to insert and delete to move condition_tags from `old_tags` to
+    `new_tags` (both product_id -> set of conditions) for `product_ids`.
+    """
+    inserts, deletes = [], []
+    for product_id in product_ids:
+        old = old_tags.get(product_id, set())
+        new = new_tags.get(product_id, set())
+        inserts.extend((product_id, condition) for condition in sorted(new - old))
+        deletes.extend((product_id, condition) for condition in sorted(old - new))
+    return inserts, deletes
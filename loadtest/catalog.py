@@ -0,0 +1,93 @@
+import os
+import random
+import subprocess
+import sys
+from datetime import datetime
+from pathlib import Path
+from sqlalchemy import create_engine, insert, text
+from sqlalchemy.engine import make_url
+
+# Add project root to sys.path
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from core.ingredients import tokenize_ingredients
+from core.models import ConditionTag, Offer, Product, ProductIngredient
+from etl.tagging import CONDITION_MAP, tag_conditions
+
+# Deterministic synthetic catalog for load tests: the same seed always yields
+# the same products, offers, tags and ingredient index, so runs against
+# different releases query identical data.
+
+BRANDS = ["Aurelle", "Botanica", "CeraLab", "Dermaly", "Elixa", "Florin", "Glowen", "Hydrana", "Ivory & Oak", "Juniper"]
+PRODUCT_TYPES = ["cleanser", "moisturizer", "serum", "toner", "sunscreen", "mask", "eye cream", "exfoliant"]
+NAME_WORDS = ["daily", "barrier", "repair", "night", "clarifying", "soft", "cloud", "dew", "balance", "pure", "rich", "light"]
+INGREDIENTS = [
+    "water", "glycerin", "niacinamide", "hyaluronic acid", "ceramide np", "salicylic acid", "retinol",
+    "vitamin c", "squalane", "panthenol", "allantoin", "zinc oxide", "fragrance", "alcohol denat",
+    "shea butter", "centella asiatica extract", "tocopherol", "lactic acid", "peptides", "aloe vera",
+]
+RETAILERS = ["sephora", "ulta", "boots", "amazon", "target"]
+LAST_SEEN = datetime(2026, 1, 1)
+
+# Tables seed_database() replaces, children before parents
+SEEDED_TABLES = ["product_ingredients", "condition_tags", "offers", "products"]
+
+
+def synthetic_catalog(products=2000, seed=42):
+    """Rows for products, offers, condition_tags and product_ingredients."""
+    rng = random.Random(seed)
+    catalog = {"products": [], "offers": [], "condition_tags": [], "product_ingredients": []}
+    for i in range(products):
+        product_id = f"lt-{i:06d}"
+        conditions = rng.sample(sorted(CONDITION_MAP), rng.randint(1, 2))
+        description = " ".join(rng.choice(CONDITION_MAP[condition]) for condition in conditions)
+        ingredients = ", ".join(rng.sample(INGREDIENTS, rng.randint(4, 10)))
+        catalog["products"].append({
+            "product_id": product_id,
+            "brand": rng.choice(BRANDS),
+            "name": " ".join(rng.sample(NAME_WORDS, 2)).title() + f" {i}",
+            "product_type": rng.choice(PRODUCT_TYPES),
+            "ingredients": ingredients,
+            "description": description,
+        })
+        catalog["condition_tags"].extend(
+            {"product_id": product_id, "condition": condition} for condition in tag_conditions(description))
+        catalog["product_ingredients"].extend(
+            {"product_id": product_id, "ingredient": ingredient} for ingredient in tokenize_ingredients(ingredients))
+        base_price = rng.uniform(5, 80)
+        for retailer in rng.sample(RETAILERS, rng.randint(1, 4)):
+            catalog["offers"].append({
+                "offer_id": f"{retailer}-{product_id}",
+                "product_id": product_id,
+                "retailer": retailer,
+                "price": round(base_price * rng.uniform(0.85, 1.15), 2),
+                "currency": "USD",
+                "rating": round(rng.uniform(3, 5), 1) if rng.random() < 0.9 else None,
+                "url": f"https://{retailer}.example/{product_id}",
+                "availability": "in_stock" if rng.random() < 0.8 else "out_of_stock",
+                "last_seen_ts": LAST_SEEN,
+            })
+    return catalog
+
+
+def create_database(url):
+    """Drop and recreate the database named in `url`, then migrate it to head."""
+    url = make_url(url)
+    admin = create_engine(url.set(database="postgres"), isolation_level="AUTOCOMMIT")
+    with admin.connect() as connection:
+        connection.execute(text(f'DROP DATABASE IF EXISTS "{url.database}"'))
+        connection.execute(text(f'CREATE DATABASE "{url.database}"'))
+    admin.dispose()
+    env = dict(os.environ, DB_URL=url.render_as_string(hide_password=False))
+    subprocess.run([sys.executable, "-m", "alembic", "upgrade", "head"], cwd=ROOT, env=env, check=True)
+
+
+def seed_database(engine, catalog, chunk_size=1000):
+    """Replace the catalog tables with `catalog`."""
+    with engine.begin() as connection:
+        connection.execute(text(f"TRUNCATE {', '.join(SEEDED_TABLES)} CASCADE"))
+        for model, rows in [(Product, catalog["products"]), (Offer, catalog["offers"]),
+                            (ConditionTag, catalog["condition_tags"]), (ProductIngredient, catalog["product_ingredients"])]:
+            for start in range(0, len(rows), chunk_size):
+                connection.execute(insert(model), rows[start:start + chunk_size])
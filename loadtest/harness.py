@@ -0,0 +1,206 @@
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+
+import httpx
+
+# Add project root to sys.path
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from api.tracing import percentile
+from etl.tagging import CONDITION_MAP
+from loadtest.catalog import BRANDS, INGREDIENTS, NAME_WORDS
+
+# Replays a request mix (JSONL, one {"method", "path", "json"|"params"} per
+# line) against the API at a fixed rate and reports latency per endpoint.
+#   uncached - the response cache is disabled, every request hits the database
+#   cached   - the response cache enabled with RESPONSE_CACHE_TTL, or
+#              CACHED_MODE_TTL seconds while it is off (the default)
+# Modes apply to the in-process app; with --url the running server is measured as is.
+
+MODES = ("uncached", "cached")
+CACHED_MODE_TTL = 60
+SORTS = ["rating", "rating", "score", "price_low", "price_high"]
+
+
+def recommend_request(rng):
+    request = {"conditions": rng.sample(sorted(CONDITION_MAP), rng.randint(1, 2)), "limit": rng.choice([5, 10, 20]),
+               "sort": rng.choice(SORTS)}
+    if rng.random() < 0.4:
+        request["budget_max"] = rng.choice([15, 25, 40, 60])
+    if rng.random() < 0.2:
+        request["include_ingredients"] = [rng.choice(INGREDIENTS)]
+    if rng.random() < 0.2:
+        request["exclude_ingredients"] = ["fragrance"]
+    return request
+
+
+def generate_mix(requests=1000, seed=7, distinct=200, batch_share=0.05, search_share=0.1):
+    """
+    A deterministic request mix. Recommendation requests are drawn from
+    `distinct` variants with Zipf-like popularity, so repeats (and cache hits)
+    occur at a realistic rate.
+    """
+    rng = random.Random(seed)
+    variants = [recommend_request(rng) for _ in range(distinct)]
+    weights = [1 / (rank + 1) for rank in range(distinct)]
+    mix = []
+    for _ in range(requests):
+        draw = rng.random()
+        if draw < batch_share:
+            mix.append({"method": "POST", "path": "/recommend/batch",
+                        "json": rng.choices(variants, weights, k=rng.randint(2, 5))})
+        elif draw < batch_share + search_share:
+            q = rng.choice([rng.choice(BRANDS), rng.choice(NAME_WORDS), rng.choice(NAME_WORDS)[:3]])
+            mix.append({"method": "GET", "path": "/search", "params": {"q": q, "limit": 10}})
+        else:
+            mix.append({"method": "POST", "path": "/recommend", "json": rng.choices(variants, weights)[0]})
+    return mix
+
+
+def save_mix(mix, path):
+    with open(path, "w") as f:
+        for request in mix:
+            f.write(json.dumps(request) + "\n")
+
+
+def load_mix(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+async def replay(client, mix, qps, concurrency):
+    """
+    Send `mix` open-loop: request i is due i/qps seconds after the start,
+    whether or not earlier ones have finished, with at most `concurrency` in
+    flight. Latency counts from the due time, so time spent queued behind a
+    slow server is included. Returns [(path, status, seconds)] and the run time.
+    """
+    in_flight = asyncio.Semaphore(concurrency)
+    results = []
+    started = time.perf_counter()
+
+    async def send(i, request):
+        due = started + i / qps
+        delay = due - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        async with in_flight:
+            try:
+                response = await client.request(request["method"], request["path"],
+                                                 json=request.get("json"), params=request.get("params"))
+                status = response.status_code
+            except httpx.HTTPError:
+                status = None
+        results.append((request["path"], status, time.perf_counter() - due))
+
+    await asyncio.gather(*(send(i, request) for i, request in enumerate(mix)))
+    return results, time.perf_counter() - started
+
+
+def summarize(results, elapsed):
+    """Throughput, error rate and p50/p95/p99 (ms) per endpoint and overall."""
+    by_path = defaultdict(list)
+    for path, status, seconds in results:
+        by_path[path].append((status, seconds))
+        by_path["all"].append((status, seconds))
+    summary = {}
+    for path, samples in sorted(by_path.items()):
+        latencies = [seconds * 1000 for _, seconds in samples]
+        errors = sum(1 for status, _ in samples if status is None or status >= 400)
+        summary[path] = {
+            "requests": len(samples),
+            "throughput": round(len(samples) / elapsed, 1) if elapsed else None,
+            "error_rate": round(errors / len(samples), 4),
+            **{f"p{q}": round(percentile(latencies, q), 2) for q in (50, 95, 99)},
+        }
+    return summary
+
+
+def in_process_client(mode):
+    """A client for the API app in this process with the response cache set for `mode`."""
+    import config
+    from api import server
+    from api.serialization import ResponseCache
+    ttl = (config.RESPONSE_CACHE_TTL or CACHED_MODE_TTL) if mode == "cached" else 0
+    server.response_cache = ResponseCache(ttl, config.RESPONSE_CACHE_SIZE)
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=server.app), base_url="http://loadtest")
+
+
+async def run_modes(mix, modes, qps, concurrency, url=None):
+    report = {}
+    for mode in modes:
+        if url:
+            client = httpx.AsyncClient(base_url=url, limits=httpx.Limits(max_connections=concurrency))
+        else:
+            client = in_process_client(mode)
+        async with client:
+            results, elapsed = await replay(client, mix, qps, concurrency)
+        report[mode] = summarize(results, elapsed)
+    return report
+
+
+def print_report(report):
+    print(f"{'mode':<10} {'endpoint':<18} {'reqs':>6} {'req/s':>8} {'errors':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for mode, summary in report.items():
+        for path, stats in summary.items():
+            print(f"{mode:<10} {path:<18} {stats['requests']:>6} {stats['throughput']:>8} {stats['error_rate']:>7.2%} "
+                  f"{stats['p50']:>8} {stats['p95']:>8} {stats['p99']:>8}")
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Seed a load-test database and replay request mixes against the API.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    seed = commands.add_parser("seed", help="Recreate a database, migrate it and load a synthetic catalog.")
+    seed.add_argument("--db-url", required=True, help="Database to (re)create; it is dropped first.")
+    seed.add_argument("--products", type=int, default=2000)
+    seed.add_argument("--seed", type=int, default=42)
+
+    record = commands.add_parser("record", help="Write a synthetic request mix.")
+    record.add_argument("--out", required=True)
+    record.add_argument("--requests", type=int, default=1000)
+    record.add_argument("--seed", type=int, default=7)
+
+    run = commands.add_parser("run", help="Replay a request mix.")
+    run.add_argument("--mix", required=True, help="Request mix (JSONL).")
+    run.add_argument("--qps", type=float, default=100)
+    run.add_argument("--concurrency", type=int, default=32, help="Most requests in flight at once.")
+    run.add_argument("--modes", default=",".join(MODES), help=f"Comma-separated, from: {', '.join(MODES)}.")
+    run.add_argument("--db-url", help="Serve from this database (default: DB_URL).")
+    run.add_argument("--url", help="Measure a running server instead of the in-process app.")
+    run.add_argument("--out", help="Also write the report here (JSON).")
+    args = parser.parse_args()
+
+    # Must be set before anything imports core.database
+    if getattr(args, "db_url", None):
+        os.environ["DB_URL"] = args.db_url
+        os.environ["DB_READ_URL"] = ""
+
+    if args.command == "seed":
+        from core.database import engine
+        from etl.refresh_view import refresh_view
+        from loadtest.catalog import create_database, seed_database, synthetic_catalog
+        create_database(args.db_url)
+        catalog = synthetic_catalog(args.products, args.seed)
+        seed_database(engine, catalog)
+        refresh_view()
+        print(f"Seeded {len(catalog['products'])} products and {len(catalog['offers'])} offers.")
+    elif args.command == "record":
+        save_mix(generate_mix(args.requests, args.seed), args.out)
+        print(f"Wrote {args.requests} requests to {args.out}.")
+    else:
+        modes = [mode.strip() for mode in args.modes.split(",")]
+        unknown = set(modes) - set(MODES)
+        if unknown:
+            parser.error(f"unknown modes: {', '.join(sorted(unknown))}")
+        report = asyncio.run(run_modes(load_mix(args.mix), modes, args.qps, args.concurrency, args.url))
+        print_report(report)
+        if args.out:
+            Path(args.out).write_text(json.dumps(report, indent=2))
@@ -25,22 +25,43 @@ def run_command(command, cwd):
     if return_code:
         logging.error(f"Command '{' '.join(command)}' failed with return code {return_code}")
 
+# Jobs run through the charmelle CLI, which only imports what each command needs
+CHARMELLE = [sys.executable, "-m", "charmelle"]
+SPIDERS = ("sephora", "ulta", "dermstore", "moidaus", "yesstyle")
+
 @sched.scheduled_job("cron", hour="*/3")
 def delta_crawl():
     logging.info("Starting delta crawl job...")
-    for spider in ("sephora", "ulta", "dermstore", "moidaus", "yesstyle"):
+    for spider in SPIDERS:
         logging.info(f"Running spider: {spider}")
-        run_command(["scrapy", "crawl", spider], cwd=str(BASE / "crawler"))
+        # Only product pages that changed since the last crawl are downloaded and parsed
+        run_command(CHARMELLE + ["crawl", spider, "-a", "mode=incremental"], cwd=str(BASE))
     logging.info("Delta crawl job finished.")
 
+@sched.scheduled_job("cron", day_of_week="sun", hour=4)
+def full_crawl():
+    logging.info("Starting full catalog crawl job...")
+    for spider in SPIDERS:
+        logging.info(f"Running spider: {spider}")
+        run_command(CHARMELLE + ["crawl", spider, "-a", "mode=full"], cwd=str(BASE))
+    logging.info("Full catalog crawl job finished.")
+
 @sched.scheduled_job("cron", hour="*", minute=10)
 def run_etl():
     logging.info("Starting ETL and view refresh job...")
-    python_exe = sys.executable
-    run_command([python_exe, "etl/load_to_db.py"], cwd=str(BASE))
-    run_command([python_exe, "etl/refresh_view.py"], cwd=str(BASE))
+    run_command(CHARMELLE + ["etl"], cwd=str(BASE))
+    # No-op unless CONDITION_MAP changed since the last re-tag
+    run_command(CHARMELLE + ["retag"], cwd=str(BASE))
+    # Build the next products_latest beside the live one and swap it in
+    run_command(CHARMELLE + ["refresh", "--swap"], cwd=str(BASE))
     logging.info("ETL and view refresh job finished.")
 
+@sched.scheduled_job("cron", hour=2, minute=30)
+def run_maintenance():
+    logging.info("Starting partition and retention maintenance job...")
+    run_command(CHARMELLE + ["maintenance"], cwd=str(BASE))
+    logging.info("Maintenance job finished.")
+
 if __name__ == "__main__":
     logging.info("Starting a single run of all spiders and ETL process...")
     # For demonstration, run jobs once on startup
@@ -0,0 +1,47 @@
+import sys
+import subprocess
+from pathlib import Path
+
+import pytest
+
+# Add project root to sys.path
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from charmelle.cli import importtime, parse_importtime
+
+IMPORTTIME_OUTPUT = """import time: self [us] | cumulative | imported package
+import time:       120 |        120 |   _io
+import time:       300 |        900 | io
+import time:       400 |        400 |     pandas.core
+import time:      5000 |      70000 | pandas
+"""
+
+
+def test_parse_importtime_keeps_top_level_imports():
+    assert parse_importtime(IMPORTTIME_OUTPUT) == [("io", 900), ("pandas", 70000)]
+
+
+def startup_imports(*command):
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-m", "charmelle", *command, "--help"],
+        cwd=ROOT, capture_output=True, text=True,
+    )
+    assert process.returncode == 0, process.stderr
+    return {line.split("|")[-1].strip() for line in process.stderr.splitlines() if line.startswith("import time:")}
+
+
+@pytest.mark.parametrize("command", [["refresh"], ["etl"], ["backfill", "ingredients"], ["backfill", "matches"]])
+def test_commands_do_not_import_transform_dependencies(command):
+    """Only the ETL transform needs pandas, BeautifulSoup and slugify; no command here needs Scrapy."""
+    imported = startup_imports(*command)
+    # The command's module runs as __main__; its own imports show that it was loaded
+    assert "core.database" in imported
+    assert not imported & {"pandas", "bs4", "slugify", "scrapy"}
+
+
+def test_importtime_reports_a_failing_command(capsys):
+    assert importtime(["nosuchcommand"]) == 2
+    err = capsys.readouterr().err
+    assert "unknown command: nosuchcommand" in err
+    assert "import time:" not in err
@@ -0,0 +1,146 @@
+import sys
+from pathlib import Path
+
+import pytest
+from prometheus_client import exposition
+from scrapy import Spider, signals
+from scrapy.utils.test import get_crawler
+
+# Add project root to sys.path
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import config
+from core.metrics import REGISTRY, push_to_textfile
+from crawler.skincare_spiders.extensions import AdaptiveThrottle, CrawlMetrics, DomainStats
+from crawler.skincare_spiders.profiles import CRAWL_PROFILES
+
+
+class ExampleSpider(Spider):
+    name = "example"
+
+
+class Slot:
+    def __init__(self, delay, concurrency):
+        self.delay = delay
+        self.concurrency = concurrency
+
+
+def respond(slot, stats, status, latency=0.2, profile="standard"):
+    stats.record(status, latency, 1000)
+    AdaptiveThrottle(crawler=None).adjust(slot, stats, status, CRAWL_PROFILES[profile])
+
+
+def items_scraped(spider_name):
+    return REGISTRY.get_sample_value("charmelle_items_scraped_total", {"spider": spider_name}) or 0
+
+
+@pytest.fixture
+def textfile_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "METRICS_TEXTFILE_DIR", str(tmp_path / "textfiles"))
+    return tmp_path / "textfiles"
+
+
+def test_crawl_metrics_counts_items_and_writes_textfile_on_close(textfile_dir):
+    crawler = get_crawler(ExampleSpider)
+    # Signal receivers are weak references; keep the extension alive
+    extension = CrawlMetrics.from_crawler(crawler)
+    spider = ExampleSpider()
+    before = items_scraped("example")
+
+    for _ in range(3):
+        crawler.signals.send_catch_log(signals.item_scraped, item={}, response=None, spider=spider)
+    assert items_scraped("example") == before + 3
+
+    crawler.signals.send_catch_log(signals.spider_closed, spider=spider, reason="finished")
+    text = (textfile_dir / "crawl_example.prom").read_text()
+    assert f'charmelle_items_scraped_total{{spider="example"}} {before + 3:.1f}' in text
+
+
+def test_textfile_has_the_expected_metrics(textfile_dir):
+    push_to_textfile("etl")
+    assert [path.name for path in textfile_dir.iterdir()] == ["etl.prom"]
+    text = (textfile_dir / "etl.prom").read_text()
+    for name in ("charmelle_items_scraped_total", "charmelle_pipeline_write_seconds",
+                 "charmelle_etl_rows_total", "charmelle_etl_stage_seconds"):
+        assert f"# HELP {name} " in text
+
+
+def test_failed_textfile_write_keeps_the_previous_file(textfile_dir, monkeypatch):
+    push_to_textfile("etl")
+    previous = (textfile_dir / "etl.prom").read_text()
+
+    def fail(*args, **kwargs):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(exposition, "generate_latest", fail)
+    with pytest.raises(OSError):
+        push_to_textfile("etl")
+    # node_exporter never sees a partial file, and no temporary file is left behind
+    assert (textfile_dir / "etl.prom").read_text() == previous
+    assert [path.name for path in textfile_dir.iterdir()] == ["etl.prom"]
+
+
+def test_textfile_is_skipped_when_not_configured(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "METRICS_TEXTFILE_DIR", "")
+    monkeypatch.chdir(tmp_path)
+    push_to_textfile("etl")
+    assert not list(tmp_path.iterdir())
+
+
+def test_throttling_responses_double_the_delay_and_drop_concurrency():
+    slot, stats = Slot(1.0, 4), DomainStats()
+    respond(slot, stats, 429)
+    assert (slot.delay, slot.concurrency) == (2.0, 3)
+    respond(slot, stats, 503)
+    assert (slot.delay, slot.concurrency) == (4.0, 2)
+    # A slot with no delay yet starts backing off from the profile minimum
+    slot = Slot(0.0, 1)
+    respond(slot, DomainStats(), 429)
+    assert (slot.delay, slot.concurrency) == (CRAWL_PROFILES["standard"]["min_delay"], 1)
+
+
+def test_backoff_is_clamped_to_the_profile_maximum():
+    slot, stats = Slot(1.0, 2), DomainStats()
+    for _ in range(10):
+        respond(slot, stats, 429, profile="strict")
+    assert slot.delay == CRAWL_PROFILES["strict"]["max_delay"]
+    assert slot.concurrency == 1
+
+
+def test_server_errors_back_off_gently():
+    slot, stats = Slot(1.0, 4), DomainStats()
+    respond(slot, stats, 500)
+    assert (slot.delay, slot.concurrency) == (1.25, 4)
+
+
+def test_healthy_responses_recover_delay_and_concurrency():
+    profile = CRAWL_PROFILES["standard"]
+    slot, stats = Slot(1.0, 4), DomainStats()
+    for _ in range(3):
+        respond(slot, stats, 429)
+    assert (slot.delay, slot.concurrency) == (8.0, 1)
+
+    delays, concurrencies = [], []
+    for _ in range(60):
+        respond(slot, stats, 200, latency=0.2)
+        delays.append(slot.delay)
+        concurrencies.append(slot.concurrency)
+    # While the smoothed error rate is still high the delay keeps growing
+    # (up to max_delay), then it falls steadily to the latency-based target,
+    # clamped at min_delay
+    peak = delays.index(max(delays))
+    assert delays[:peak + 1] == sorted(delays[:peak + 1])
+    assert max(delays) == profile["max_delay"]
+    assert delays[peak:] == sorted(delays[peak:], reverse=True)
+    assert slot.delay == profile["min_delay"]
+    # Concurrency only comes back after the error rate has decayed, one step at a time
+    assert concurrencies[peak] == 1
+    assert {b - a for a, b in zip(concurrencies, concurrencies[1:])} == {0, 1}
+    assert slot.concurrency == profile["concurrency"]
+
+
+def test_concurrency_is_not_raised_above_the_profile():
+    slot, stats = Slot(0.5, CRAWL_PROFILES["standard"]["concurrency"]), DomainStats()
+    for _ in range(5):
+        respond(slot, stats, 200, latency=0.2)
+    assert slot.concurrency == CRAWL_PROFILES["standard"]["concurrency"]
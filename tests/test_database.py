@@ -0,0 +1,40 @@
+import sys
+from pathlib import Path
+
+# Add project root to sys.path
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from core.database import ReplicaMonitor, connect_args
+
+
+class FixedLagMonitor(ReplicaMonitor):
+    def __init__(self, lags, **kwargs):
+        super().__init__(read_engine=None, **kwargs)
+        self.lags = list(lags)
+        self.checks = 0
+
+    def check_lag(self):
+        self.checks += 1
+        lag = self.lags.pop(0)
+        if isinstance(lag, Exception):
+            raise lag
+        return lag
+
+
+def test_stale_or_unreachable_replica_is_not_fresh():
+    monitor = FixedLagMonitor([1.0, 120.0, ConnectionError("down")], max_lag=30, interval=0)
+    assert monitor.fresh()
+    assert not monitor.fresh()
+    assert not monitor.fresh()
+
+
+def test_lag_is_rechecked_at_most_once_per_interval():
+    monitor = FixedLagMonitor([1.0, 120.0], max_lag=30, interval=60)
+    assert monitor.fresh()
+    assert monitor.fresh()
+    assert monitor.checks == 1
+
+
+def test_connect_args_bound_statements_and_connects():
+    assert connect_args(0, 0) == {}
+    assert connect_args(5000, 2) == {"options": "-c statement_timeout=5000", "connect_timeout": 2}
@@ -0,0 +1,41 @@
+import sys
+import asyncio
+from datetime import datetime
+from pathlib import Path
+
+# Add project root to sys.path
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from api import detections
+from api.detections import DetectionBuffer, DetectionEvent, DetectionFlusher
+
+
+def make_events(n):
+    return [DetectionEvent(condition="acne", area="cheek", ts=datetime(2026, 1, 1)) for _ in range(n)]
+
+
+def test_buffer_refuses_batches_that_do_not_fit():
+    buffer = DetectionBuffer(capacity=5)
+    assert buffer.add(make_events(3))
+    assert not buffer.add(make_events(3))
+    assert len(buffer) == 3
+    assert len(buffer.take(2)) == 2
+    assert len(buffer) == 1
+
+
+def test_failed_flush_requeues_what_fits(monkeypatch):
+    def fail(engine, events):
+        raise RuntimeError("database unavailable")
+    monkeypatch.setattr(detections, "write_detections", fail)
+
+    buffer = DetectionBuffer(capacity=4)
+    buffer.add(make_events(4))
+    flusher = DetectionFlusher(buffer, engine=None, batch_size=3)
+    batch = buffer.take(3)
+    buffer.add(make_events(2))
+    # The failed batch goes back ahead of newer events, as far as there is room
+    assert buffer.requeue(batch) == 2
+    assert len(buffer) == 4
+
+    asyncio.run(flusher.flush())
+    assert len(buffer) == 4
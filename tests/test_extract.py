@@ -0,0 +1,58 @@
+import sys
+from pathlib import Path
+
+# Add project root to sys.path
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from crawler.skincare_spiders import extract
+
+PAGE = b"""<html><head>
+<script src="/app.js"></script>
+<script type="application/ld+json">{"@type": "BreadcrumbList"}</script>
+<script id="__NEXT_DATA__" type="application/json">
+  {"props": {"pageProps": {"product": {"id": 42, "name": "Gel </div> {cream}"}}}}
+</script>
+<script>window.__APOLLO_STATE__ = {"Product:1": {"id": "1", "note": "a \\"quoted\\" } brace"}, "list": [1, {"x": 2}]};
+window.other = {};</script>
+</head><body><div>{not json}</div></body></html>"""
+
+
+def test_script_payload_matches_opening_tag_markers():
+    payload = extract.script_payload(PAGE, b'__NEXT_DATA__')
+    data = extract.loads(payload)
+    assert data["props"]["pageProps"]["product"]["id"] == 42
+    assert extract.script_payload(PAGE, b'ProductJson') is None
+
+
+def test_iter_script_payloads_yields_every_match():
+    payloads = list(extract.iter_script_payloads(PAGE, b'application/ld+json'))
+    assert payloads == [b'{"@type": "BreadcrumbList"}']
+
+
+def test_assigned_json_respects_strings_and_nesting():
+    raw = extract.assigned_json(PAGE, b'window.__APOLLO_STATE__')
+    state = extract.loads(raw)
+    assert state["Product:1"]["note"] == 'a "quoted" } brace'
+    assert state["list"] == [1, {"x": 2}]
+
+
+def test_assigned_json_skips_mentions_that_are_not_assignments():
+    body = b"""<script>
+    var hint = "window.__APOLLO_STATE__ is set below";
+    if (window.__APOLLO_STATE__) { init({"stale": true}); }
+    if (window.__APOLLO_STATE__ == null) {}
+    window.__APOLLO_STATE__CACHE = {"other": true};
+    window.__APOLLO_STATE__
+      = {"Product:1": {"id": "1"}};
+    </script>"""
+    raw = extract.assigned_json(body, b'window.__APOLLO_STATE__')
+    assert extract.loads(raw) == {"Product:1": {"id": "1"}}
+
+
+def test_unbalanced_json_returns_none():
+    assert extract.assigned_json(b'<script>window.s = {"a": [1, 2}</script>', b'window.s') is None
+    assert extract.assigned_json(b'<script>window.s = 5;</script>', b'window.s') is None
+
+
+def test_dumps_round_trips_compactly():
+    assert extract.dumps({"a": [1, None]}) == '{"a":[1,null]}'
@@ -0,0 +1,117 @@
+import hashlib
+import sys
+import sqlite3
+from pathlib import Path
+
+import pytest
+from scrapy.exceptions import IgnoreRequest
+from scrapy.http import HtmlResponse, Request
+
+# Add project root to sys.path
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from crawler.skincare_spiders.middlewares import CrawlStateStore, IncrementalCrawlMiddleware
+
+URL = "https://www.example.com/p/1"
+
+
+class Spider:
+    name = "example"
+    mode = "incremental"
+
+
+class Stats:
+    def __init__(self):
+        self.values = {}
+
+    def inc_value(self, key, spider=None):
+        self.values[key] = self.values.get(key, 0) + 1
+
+
+class RecordingMiddleware(IncrementalCrawlMiddleware):
+    """Collects touched offer IDs instead of writing them to the database."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.touched = []
+
+    def flush_seen(self):
+        self.touched.extend(self.seen_offer_ids)
+        self.seen_offer_ids = []
+
+
+def response(body=b"<html>v1</html>", status=200, headers=None):
+    request = Request(URL, meta={"incremental": True})
+    return request, HtmlResponse(URL, status=status, body=body, headers=headers or {}, request=request)
+
+
+@pytest.fixture
+def middleware(tmp_path):
+    middleware = RecordingMiddleware(tmp_path, Stats())
+    middleware.spider_opened(Spider())
+    yield middleware
+    middleware.spider_closed(Spider())
+
+
+def test_store_round_trips_and_upgrades_old_files(tmp_path):
+    path = tmp_path / "old.sqlite"
+    conn = sqlite3.connect(str(path))
+    conn.execute("CREATE TABLE pages (url TEXT PRIMARY KEY, etag TEXT, last_modified TEXT, fingerprint TEXT, crawled_ts TEXT)")
+    conn.execute("INSERT INTO pages VALUES (?, 'e0', NULL, 'f0', NULL)", (URL,))
+    conn.commit()
+    conn.close()
+
+    store = CrawlStateStore(path)
+    assert store.get(URL) == ("e0", None, "f0", [])
+    store.put(URL, '"e1"', "Mon, 01 Jan 2026 00:00:00 GMT", "f1", {"b", "a"})
+    assert store.get(URL) == ('"e1"', "Mon, 01 Jan 2026 00:00:00 GMT", "f1", ["a", "b"])
+    assert store.get("https://www.example.com/missing") is None
+    store.close()
+
+
+def test_changed_page_state_is_saved_only_after_its_item_is_scraped(middleware):
+    request, page = response(headers={"ETag": '"v1"'})
+    assert middleware.process_response(request, page, Spider()) is page
+    # Parsing or the write may still fail, so nothing is stored yet
+    assert middleware.store.get(URL) is None
+
+    middleware.item_scraped({"offer_id": "example-1"}, page, Spider())
+    fingerprint = hashlib.sha1(page.body).hexdigest()
+    assert middleware.store.get(URL) == ('"v1"', None, fingerprint, ["example-1"])
+
+    middleware.process_request(request, Spider())
+    assert request.headers.get("If-None-Match") == b'"v1"'
+
+
+def test_failed_page_is_fetched_again(middleware):
+    request, page = response()
+    middleware.process_response(request, page, Spider())
+    # No item_scraped: the item was dropped, so the next response is not "unchanged"
+    request, page = response()
+    assert middleware.process_response(request, page, Spider()) is page
+
+
+def test_unchanged_and_not_modified_pages_touch_their_offers(middleware):
+    request, page = response()
+    middleware.process_response(request, page, Spider())
+    middleware.item_scraped({"offer_id": "example-1"}, page, Spider())
+    middleware.touch_batch = 1
+
+    request, page = response()
+    with pytest.raises(IgnoreRequest):
+        middleware.process_response(request, page, Spider())
+    request, page = response(status=304)
+    with pytest.raises(IgnoreRequest):
+        middleware.process_response(request, page, Spider())
+
+    assert middleware.touched == ["example-1", "example-1"]
+    assert middleware.stats.values == {"incremental/changed": 1, "incremental/unchanged": 1, "incremental/not_modified": 1}
+    # Skipping an unchanged page keeps what was recorded for it
+    assert middleware.store.get(URL)[3] == ["example-1"]
+
+
+def test_non_incremental_requests_pass_through(middleware):
+    request = Request(URL)
+    page = HtmlResponse(URL, body=b"x", request=request)
+    assert middleware.process_response(request, page, Spider()) is page
+    assert "incremental_state" not in request.meta
@@ -0,0 +1,33 @@
+import sys
+from pathlib import Path
+
+# Add project root to sys.path
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from core.ingredients import expand_ingredient_query, normalize_ingredient, tokenize_ingredients
+
+
+def test_tokenize_normalizes_inci_list():
+    tokens = tokenize_ingredients("Ingredients: Water (Aqua), Niacinamide 5%, Cetyl Alcohol, Parfum*, Alcohol Denat.")
+    assert tokens == ["alcohol denat", "cetyl alcohol", "fragrance", "niacinamide", "water"]
+
+
+def test_commas_inside_parentheses_do_not_split():
+    tokens = tokenize_ingredients("Camellia Sinensis Extract (Leaf, Root), Caprylic/Capric Triglyceride")
+    assert "caprylic/capric triglyceride" in tokens
+    assert "camellia sinensis extract" in tokens
+    assert "root" not in tokens
+
+
+def test_synonym_lists_collapse_to_one_ingredient():
+    assert normalize_ingredient("Water/Aqua/Eau") == "water"
+    assert normalize_ingredient("Nicotinamide") == "niacinamide"
+
+
+def test_prose_is_not_indexed():
+    assert tokenize_ingredients("A lightweight gel that melts into skin for all day hydration and comfort") == []
+
+
+def test_alcohol_filter_excludes_fatty_alcohols():
+    assert "alcohol denat" in expand_ingredient_query("Alcohol")
+    assert "cetyl alcohol" not in expand_ingredient_query("alcohol")
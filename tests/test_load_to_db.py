@@ -0,0 +1,55 @@
+import sys
+import json
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+# Add project root to sys.path
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from etl.load_to_db import column_params, failed_offers, pair_params, transform_data
+
+
+def staging_frame():
+    blob = {
+        "name": "Hydrating Serum 30 ml", "brand": {"name": "Dermaly"}, "category": "Skin > Serums",
+        "description": "Water, Glycerin", "url": "https://www.dermstore.com/p/1",
+        "offers": [{"price": "24.50", "priceCurrency": "USD", "availability": "http://schema.org/InStock"}],
+    }
+    return pd.DataFrame([
+        {"offer_id": "dermstore-1", "retailer": "dermstore", "json_blob": json.dumps(blob),
+         "last_seen_ts": datetime(2026, 1, 1), "version": 3},
+        {"offer_id": "unknown-1", "retailer": "unknown", "json_blob": "{}",
+         "last_seen_ts": datetime(2026, 1, 1), "version": 1},
+    ])
+
+
+def test_transform_data_emits_compact_dtypes():
+    df = transform_data(staging_frame())
+    assert df["offer_id"].tolist() == ["dermstore-1"]
+    assert isinstance(df["retailer"].dtype, pd.CategoricalDtype)
+    assert isinstance(df["brand"].dtype, pd.CategoricalDtype)
+    assert isinstance(df["name"].dtype, pd.StringDtype)
+    assert df["rating"].dtype == "float32"
+    assert df["version"].dtype == "Int64"
+    assert df["product_id"].iloc[0] == "dermaly__hydrating-serum-30-ml__"
+    assert df["ingredient_tokens"].iloc[0] == ["glycerin", "water"]
+
+
+def test_column_params_send_missing_values_as_none():
+    params = column_params(transform_data(staging_frame()), ["offer_id", "price", "rating", "version"])
+    assert params == {"offer_id": ["dermstore-1"], "price": [24.5], "rating": [None], "version": [3]}
+
+
+def test_pair_params_flatten_list_columns():
+    params = pair_params(["b", "a", "b"], [["acne"], ["dryness", "acne"], ["acne"]])
+    assert params == {"product_ids": ["a", "a", "b"], "values": ["acne", "dryness", "acne"]}
+
+
+
+def test_failed_offers_are_the_claimed_rows_transform_dropped():
+    claimed = staging_frame()
+    assert failed_offers(claimed, transform_data(claimed)) == (["unknown-1"], [1])
+    assert failed_offers(claimed.iloc[1:], transform_data(claimed.iloc[1:])) == (["unknown-1"], [1])
+    assert failed_offers(claimed.iloc[:1], transform_data(claimed.iloc[:1])) == ([], [])
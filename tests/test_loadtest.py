@@ -0,0 +1,57 @@
+import sys
+import asyncio
+from pathlib import Path
+
+import httpx
+from fastapi import FastAPI, HTTPException
+
+# Add project root to sys.path
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from etl.tagging import tag_conditions
+from loadtest.catalog import synthetic_catalog
+from loadtest.harness import generate_mix, replay, summarize
+
+
+def test_synthetic_catalog_is_deterministic_and_tagged():
+    catalog = synthetic_catalog(products=50, seed=1)
+    assert catalog == synthetic_catalog(products=50, seed=1)
+    assert catalog != synthetic_catalog(products=50, seed=2)
+    assert len(catalog["products"]) == 50
+    tags = {(t["product_id"], t["condition"]) for t in catalog["condition_tags"]}
+    for product in catalog["products"]:
+        for condition in tag_conditions(product["description"]):
+            assert (product["product_id"], condition) in tags
+
+
+def test_generate_mix_repeats_popular_requests():
+    mix = generate_mix(requests=300, seed=3)
+    assert mix == generate_mix(requests=300, seed=3)
+    recommends = [str(r["json"]) for r in mix if r["path"] == "/recommend"]
+    assert len(set(recommends)) < len(recommends)
+
+
+def test_replay_reports_latency_and_errors_per_endpoint():
+    app = FastAPI()
+
+    @app.post("/recommend")
+    def recommend(request: dict):
+        return []
+
+    @app.get("/search")
+    def search(q: str):
+        raise HTTPException(status_code=500)
+
+    async def run():
+        mix = [{"method": "POST", "path": "/recommend", "json": {"conditions": ["acne"]}}] * 8
+        mix += [{"method": "GET", "path": "/search", "params": {"q": "glow"}}] * 2
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await replay(client, mix, qps=500, concurrency=4)
+
+    results, elapsed = asyncio.run(run())
+    summary = summarize(results, elapsed)
+    assert summary["all"]["requests"] == 10
+    assert summary["/recommend"]["error_rate"] == 0
+    assert summary["/search"]["error_rate"] == 1
+    assert summary["/recommend"]["p50"] <= summary["/recommend"]["p99"]
@@ -0,0 +1,70 @@
+import sys
+from pathlib import Path
+
+# Add project root to sys.path
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from etl.matching import match_record, normalize_brand, parse_size, resolve_matches, LSH_MIN_BLOCK
+
+
+def test_normalize_brand_ignores_suffixes_and_accents():
+    assert normalize_brand("CeraVe") == normalize_brand("CERAVE Skincare")
+    assert normalize_brand("Ródial") == normalize_brand("Rodial")
+
+
+def test_parse_size_converts_units():
+    assert abs(parse_size("1.7 fl oz") - parse_size("50 mL")) < 1.0
+    assert parse_size("Original") is None
+
+
+def test_same_product_across_retailers_is_merged():
+    records = [
+        match_record("cerave__moisturizing-cream__16-oz", "CeraVe", "Moisturizing Cream", "16 oz"),
+        match_record("cerave-skincare__cerave-moisturizing-cream__", "CeraVe Skincare", "CeraVe Moisturizing Cream 16oz", ""),
+        match_record("cerave__hydrating-cleanser__16-oz", "CeraVe", "Hydrating Cleanser", "16 oz"),
+    ]
+    mapping = resolve_matches(records)
+    assert mapping["cerave-skincare__cerave-moisturizing-cream__"][0] == mapping["cerave__moisturizing-cream__16-oz"][0]
+    assert mapping["cerave__hydrating-cleanser__16-oz"][0] == "cerave__hydrating-cleanser__16-oz"
+
+
+def test_different_sizes_and_shades_are_kept_apart():
+    records = [
+        match_record("a__serum__1-oz", "Brand", "Vitamin C Serum", "1 oz"),
+        match_record("b__serum__4-oz", "Brand", "Vitamin C Serum", "4 oz"),
+        match_record("a__tint__light", "Brand", "Skin Tint", "Light"),
+        match_record("b__tint__deep", "Brand", "Skin Tint", "Deep"),
+    ]
+    mapping = resolve_matches(records)
+    assert all(canonical == pid for pid, (canonical, _) in mapping.items())
+
+
+def test_different_strengths_are_kept_apart():
+    records = [
+        match_record("a__retinol-0-5-in-squalane__30ml", "The Ordinary", "Retinol 0.5% in Squalane", "30ml"),
+        match_record("a__retinol-1-in-squalane__30ml", "The Ordinary", "Retinol 1% in Squalane", "30ml"),
+        match_record("b__retinol-1-in-squalane__", "The Ordinary", "The Ordinary Retinol 1% in Squalane 30 ml", ""),
+    ]
+    mapping = resolve_matches(records)
+    assert mapping["a__retinol-0-5-in-squalane__30ml"][0] == "a__retinol-0-5-in-squalane__30ml"
+    assert mapping["b__retinol-1-in-squalane__"][0] == "a__retinol-1-in-squalane__30ml"
+
+
+def test_existing_canonical_product_is_preferred():
+    records = [
+        match_record("z__night-cream__", "Brand", "Night Cream", ""),
+        match_record("a__night-cream__", "Brand", "Night Cream", ""),
+    ]
+    mapping = resolve_matches(records, canonical_ids={"z__night-cream__"})
+    assert mapping["a__night-cream__"][0] == "z__night-cream__"
+
+
+def test_large_blocks_use_lsh_and_still_match():
+    records = [match_record(f"brand__product-{i}__", "Brand", f"Product Number {i} Gel", "") for i in range(LSH_MIN_BLOCK)]
+    records.append(match_record("other__product-7__", "Brand", "Product Number 7 Gel", ""))
+    mapping = resolve_matches(records, canonical_ids={"brand__product-7__"})
+    assert mapping["other__product-7__"][0] == "brand__product-7__"
+    # Only the duplicate pair merges; every distinct product stays its own cluster
+    merged = {pid for pid, (canonical, _) in mapping.items() if canonical != pid}
+    assert merged == {"other__product-7__"}
+    assert len({canonical for canonical, _ in mapping.values()}) == LSH_MIN_BLOCK
@@ -0,0 +1,55 @@
+import json
+import sys
+import time
+from pathlib import Path
+
+# Add project root to sys.path
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from etl.profiling import RunProfiler, compare_reports
+
+
+def busy(seconds):
+    deadline = time.perf_counter() + seconds
+    total = 0
+    while time.perf_counter() < deadline:
+        total += sum(range(100))
+    return total
+
+
+def test_profiled_run_writes_one_report(tmp_path):
+    with RunProfiler('etl', tmp_path, profile=True, trace_stages=True, sample=True, sample_interval=0.001) as profiler:
+        with profiler.stage('transform'):
+            blob = [bytearray(1024) for _ in range(100)]
+            busy(0.05)
+        with profiler.stage('load'):
+            busy(0.02)
+
+    reports = list(tmp_path.glob('etl-*.json'))
+    assert len(reports) == 1
+    report = json.loads(reports[0].read_text())
+    assert [s['stage'] for s in report['stages']] == ['transform', 'load']
+    assert report['stages'][0]['heap_peak_bytes'] >= 100 * 1024
+    assert any('busy' in f['function'] for f in report['profile']['functions'])
+    assert report['sample']['samples'] > 0
+    assert (tmp_path / report['profile']['file']).exists()
+    assert (tmp_path / report['sample']['file']).exists()
+    del blob
+
+
+def test_disabled_profiler_writes_nothing(tmp_path):
+    with RunProfiler('etl', tmp_path) as profiler:
+        with profiler.stage('transform'):
+            pass
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_compare_reports_orders_regressions_first():
+    old = {'stages': [{'stage': 'load', 'seconds': 1.0, 'heap_peak_bytes': 10}],
+           'profile': {'functions': [{'function': 'a', 'cumtime': 1.0}, {'function': 'b', 'cumtime': 1.0}]}}
+    new = {'stages': [{'stage': 'load', 'seconds': 1.5, 'heap_peak_bytes': 30}],
+           'profile': {'functions': [{'function': 'a', 'cumtime': 0.5}, {'function': 'b', 'cumtime': 2.0}]}}
+    changes = compare_reports(old, new)
+    assert changes['stages'][0]['seconds_delta'] == 0.5
+    assert changes['stages'][0]['heap_peak_delta_bytes'] == 20
+    assert [f['function'] for f in changes['functions']] == ['b', 'a']
@@ -29,4 +29,70 @@ def test_health_check():
     """Tests if the health check endpoint is working."""
     response = client.get("/healthz")
     assert response.status_code == 200
-    assert response.json() == {"status": "ok"} 
\ No newline at end of file
+    assert response.json() == {"status": "ok"}
+
+
+def test_recommend_with_ingredient_filters():
+    """Tests that ingredient include/exclude filters are accepted."""
+    response = client.post("/recommend", json={
+        "conditions": ["acne"],
+        "include_ingredients": ["niacinamide"],
+        "exclude_ingredients": ["fragrance", "alcohol"],
+        "limit": 5,
+    })
+    assert response.status_code == 200
+    assert isinstance(response.json(), list)
+
+
+def test_search_endpoint_runs():
+    """Tests that a prefix search with a budget filter returns a list."""
+    response = client.get("/search", params={"q": "cera moist", "budget_max": 50, "limit": 5})
+    assert response.status_code == 200
+    assert isinstance(response.json(), list)
+
+
+def test_price_history_endpoint_runs():
+    """Tests that the price history endpoint returns a list for any product."""
+    response = client.get("/products/unknown__product__/price-history", params={"resolution": "weekly"})
+    assert response.status_code == 200
+    assert isinstance(response.json(), list)
+
+
+def test_recommend_batch_returns_results_in_order():
+    """Tests that a batch returns one list per request, in request order."""
+    response = client.post("/recommend/batch", json=[
+        {"conditions": ["dryness"], "limit": 3},
+        {"conditions": ["acne"], "budget_max": 25, "sort": "price_low", "limit": 2},
+    ])
+    assert response.status_code == 200
+    results = response.json()
+    assert len(results) == 2
+    assert len(results[0]) <= 3 and len(results[1]) <= 2
+
+
+def test_batch_queries_use_distinct_parameters():
+    """Tests that batched requests can share one statement without parameter clashes."""
+    from api.server import RecommendationRequest, build_recommend_query
+
+    request = RecommendationRequest(conditions=["acne"], budget_max=25, include_ingredients=["niacinamide"])
+    query, params = build_recommend_query(request, batch_index=3)
+    assert set(params) == {"conditions_3", "budget_max_3", "include_0_3", "limit_3"}
+    assert "3 AS request_index" in query
+    assert all(f":{name}" in query for name in params)
+
+
+def test_recommend_sorted_by_rank_score():
+    """Tests the precomputed ranking sort mode."""
+    response = client.post("/recommend", json={"conditions": ["dryness"], "sort": "score", "limit": 5})
+    assert response.status_code == 200
+    assert isinstance(response.json(), list)
+
+def test_detections_accepts_single_events_and_batches():
+    """Detections are acknowledged once buffered; the flusher writes them later."""
+    response = client.post("/detections", json={"condition": "acne", "area": "cheek"})
+    assert response.status_code == 202
+    assert response.json() == {"accepted": 1}
+
+    response = client.post("/detections", json=[{"condition": "dryness"}, {"condition": "redness", "area": "nose"}])
+    assert response.status_code == 202
+    assert response.json() == {"accepted": 2}
@@ -0,0 +1,98 @@
+import sys
+from pathlib import Path
+
+from alembic.script import ScriptDirectory
+from sqlalchemy import create_engine, text
+
+# Add project root to sys.path
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from etl.refresh_view import PRODUCTS_LATEST_QUERY, VIEW, VIEW_INDEXES, record_rollback, record_version
+
+VERSIONS_DDL = """
+CREATE TABLE products_latest_versions (
+    version INTEGER PRIMARY KEY AUTOINCREMENT,
+    mode TEXT NOT NULL,
+    state TEXT NOT NULL,
+    row_count BIGINT,
+    build_seconds FLOAT
+)
+"""
+
+
+class RecordingOp:
+    """Stands in for alembic.op, keeping the SQL passed to op.execute and ignoring the rest."""
+
+    def __init__(self):
+        self.statements = []
+
+    def execute(self, sql):
+        self.statements.append(" ".join(str(sql).split()).rstrip(";"))
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: None
+
+
+def latest_view_migration(monkeypatch):
+    """SQL run by the newest migration that (re)creates products_latest."""
+    for revision in ScriptDirectory(str(ROOT / "alembic")).walk_revisions():
+        op = RecordingOp()
+        monkeypatch.setattr(revision.module, "op", op)
+        revision.module.upgrade()
+        if any(sql.startswith(f"CREATE MATERIALIZED VIEW {VIEW} ") for sql in op.statements):
+            return op.statements
+    raise AssertionError(f"no migration creates {VIEW}")
+
+
+def versions_engine():
+    engine = create_engine("sqlite://")
+    with engine.begin() as connection:
+        connection.execute(text(VERSIONS_DDL))
+    return engine
+
+
+def states(connection):
+    rows = connection.execute(text("SELECT version, state FROM products_latest_versions ORDER BY version"))
+    return dict(rows.all())
+
+
+def test_swaps_keep_one_previous_build():
+    with versions_engine().begin() as connection:
+        first = record_version(connection, "swap", 10, 1.0)
+        assert states(connection) == {first: "active"}
+        second = record_version(connection, "swap", 11, 1.0)
+        assert states(connection) == {first: "previous", second: "active"}
+        third = record_version(connection, "swap", 12, 1.0)
+        assert states(connection) == {first: "retired", second: "previous", third: "active"}
+
+
+def test_refresh_replaces_the_active_build_only():
+    with versions_engine().begin() as connection:
+        first = record_version(connection, "swap", 10, 1.0)
+        second = record_version(connection, "swap", 11, 1.0)
+        refreshed = record_version(connection, "refresh", 11, 0.5)
+        # The refreshed view is the same relation; the rollback target is untouched
+        assert states(connection) == {first: "previous", second: "retired", refreshed: "active"}
+
+
+def test_rollback_exchanges_active_and_previous():
+    with versions_engine().begin() as connection:
+        first = record_version(connection, "swap", 10, 1.0)
+        second = record_version(connection, "swap", 11, 1.0)
+        third = record_version(connection, "swap", 12, 1.0)
+        record_rollback(connection)
+        assert states(connection) == {first: "retired", second: "active", third: "previous"}
+        # Rolling back again restores the newer build
+        record_rollback(connection)
+        assert states(connection) == {first: "retired", second: "previous", third: "active"}
+
+
+def test_swap_builds_the_view_of_the_latest_migration(monkeypatch):
+    """A new products_latest migration must update PRODUCTS_LATEST_QUERY and VIEW_INDEXES too."""
+    statements = latest_view_migration(monkeypatch)
+    assert f"CREATE MATERIALIZED VIEW {VIEW} AS {' '.join(PRODUCTS_LATEST_QUERY.split())}" in statements
+    indexes = {sql for sql in statements if sql.startswith("CREATE INDEX")}
+    assert indexes == {
+        f"CREATE INDEX idx_{VIEW}_{suffix} ON {VIEW}{columns}" for suffix, columns in VIEW_INDEXES.items()
+    }
@@ -0,0 +1,116 @@
+import json
+import sys
+from pathlib import Path
+
+from scrapy import Request, Spider
+from scrapy.http import HtmlResponse
+from scrapy.settings import Settings
+from scrapy.utils.request import RequestFingerprinter
+from scrapy.utils.test import get_crawler
+
+# Add project root and the Scrapy project (for replay's skincare_spiders imports) to sys.path
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "crawler"))
+
+import replay
+from skincare_spiders.httpcache import ContentAddressedCacheStorage, iter_entries
+
+LISTING = "https://www.example.com/c/moisturizers"
+PRODUCT = "https://www.example.com/p/1"
+
+
+class ExampleSpider(Spider):
+    name = "example"
+
+    def parse(self, response):
+        yield Request(PRODUCT, callback=self.parse_product)
+
+    def parse_product(self, response):
+        yield {"url": response.url}
+
+
+class Crawler:
+    request_fingerprinter = RequestFingerprinter.from_crawler(
+        get_crawler(settings_dict={"REQUEST_FINGERPRINTER_IMPLEMENTATION": "2.7"})
+    )
+
+
+def open_storage(tmp_path, expiration_secs=0):
+    storage = ContentAddressedCacheStorage(Settings({
+        "HTTPCACHE_DIR": str(tmp_path),
+        "HTTPCACHE_EXPIRATION_SECS": expiration_secs,
+    }))
+    spider = ExampleSpider()
+    spider.crawler = Crawler()
+    storage.open_spider(spider)
+    return storage, spider
+
+
+def store(storage, spider, request, body):
+    response = HtmlResponse(request.url, body=body, headers={"Content-Type": "text/html"}, request=request)
+    storage.store_response(spider, request, response)
+
+
+def test_responses_round_trip_through_the_cache(tmp_path):
+    storage, spider = open_storage(tmp_path)
+    request = Request(PRODUCT, callback=spider.parse_product)
+    assert storage.retrieve_response(spider, request) is None
+
+    store(storage, spider, request, b"<html>product</html>")
+    cached = storage.retrieve_response(spider, request)
+    assert isinstance(cached, HtmlResponse)
+    assert (cached.url, cached.status, cached.body) == (PRODUCT, 200, b"<html>product</html>")
+    assert cached.headers["Content-Type"] == b"text/html"
+    assert [entry["callback"] for entry in iter_entries(storage.root)] == ["parse_product"]
+
+
+def test_identical_bodies_are_stored_once(tmp_path):
+    storage, spider = open_storage(tmp_path)
+    store(storage, spider, Request(PRODUCT), b"<html>same</html>")
+    store(storage, spider, Request(LISTING), b"<html>same</html>")
+    store(storage, spider, Request(PRODUCT), b"<html>same</html>")
+
+    assert len(list((storage.root / "entries").glob("*/*.json"))) == 2
+    assert len(list((storage.root / "objects").glob("*/*.gz"))) == 1
+    assert not list(storage.root.rglob("*.tmp"))
+
+
+def test_expired_entries_are_not_served(tmp_path):
+    storage, spider = open_storage(tmp_path, expiration_secs=60)
+    request = Request(PRODUCT)
+    store(storage, spider, request, b"<html>product</html>")
+    assert storage.retrieve_response(spider, request) is not None
+
+    entry_path = storage._entry_path(request)
+    entry = json.loads(entry_path.read_text())
+    entry["timestamp"] -= 120
+    entry_path.write_text(json.dumps(entry))
+    assert storage.retrieve_response(spider, request) is None
+
+
+def test_replay_feeds_cached_responses_to_recorded_callbacks(tmp_path, monkeypatch):
+    storage, spider = open_storage(tmp_path)
+    store(storage, spider, Request(LISTING), b"<html>listing</html>")
+    store(storage, spider, Request(PRODUCT, callback=spider.parse_product), b"<html>product</html>")
+
+    class Loader:
+        @classmethod
+        def from_settings(cls, settings):
+            return cls()
+
+        def load(self, name):
+            assert name == "example"
+            return ExampleSpider
+
+    monkeypatch.setattr(replay, "get_project_settings", Settings)
+    monkeypatch.setattr(replay, "SpiderLoader", Loader)
+    report = replay.replay("example", str(tmp_path), {}, repeat=2)
+
+    assert report["responses"] == 2
+    callbacks = report["callbacks"]
+    assert {name: (stats["pages"], stats["requests"], stats["items"]) for name, stats in callbacks.items()} == {
+        "parse": (2, 2, 0),
+        "parse_product": (2, 0, 2),
+    }
+    assert callbacks["parse_product"]["bytes"] == 2 * len(b"<html>product</html>")
@@ -0,0 +1,92 @@
+import os
+import sys
+from pathlib import Path
+
+# Add project root to sys.path
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from core.segments import SegmentWriter, iter_segment, mark_ingested, process_running, read_record, sealed_segments
+
+
+def dead_pid():
+    pid = 4194304
+    while process_running(pid):
+        pid -= 1
+    return pid
+
+
+def abandon(writer):
+    """Make the writer's open segment look like it was left by a crashed process."""
+    writer.file.flush()
+    open_path = Path(str(writer.path) + ".open")
+    orphan = open_path.with_name(open_path.name.replace(f"-{os.getpid()}-", f"-{dead_pid()}-"))
+    os.replace(open_path, orphan)
+    return orphan
+
+
+def make_record(i):
+    return {"offer_id": f"ulta-{i}", "retailer": "ulta", "json_blob": '{"id": %d}' % i, "last_seen_ts": "2026-01-01T00:00:00"}
+
+
+def test_segments_rotate_and_are_readable(tmp_path):
+    writer = SegmentWriter(tmp_path, "ulta", max_records=3)
+    for i in range(7):
+        writer.append(f"ulta-{i}", make_record(i))
+    writer.close()
+
+    segments = sealed_segments(tmp_path)
+    assert len(segments) == 3
+    records = [r for path in segments for r in iter_segment(path)]
+    assert [r["offer_id"] for r in records] == [f"ulta-{i}" for i in range(7)]
+
+
+def test_read_record_uses_index(tmp_path):
+    writer = SegmentWriter(tmp_path, "ulta")
+    for i in range(5):
+        writer.append(f"ulta-{i}", make_record(i))
+    writer.close()
+
+    (segment,) = sealed_segments(tmp_path)
+    assert read_record(segment, "ulta-3") == make_record(3)
+    assert read_record(segment, "ulta-99") is None
+
+
+def test_unsealed_segment_is_recovered_without_truncated_record(tmp_path):
+    writer = SegmentWriter(tmp_path, "ulta")
+    for i in range(3):
+        writer.append(f"ulta-{i}", make_record(i))
+    # Simulate a crash halfway through writing the last record
+    open_path = abandon(writer)
+    open_path.write_bytes(open_path.read_bytes()[:-5])
+
+    SegmentWriter(tmp_path, "ulta")
+    (segment,) = sealed_segments(tmp_path)
+    assert [r["offer_id"] for r in iter_segment(segment)] == ["ulta-0", "ulta-1"]
+    assert read_record(segment, "ulta-1") == make_record(1)
+
+
+def test_open_segments_of_running_crawls_are_left_alone(tmp_path):
+    running = SegmentWriter(tmp_path, "ulta")
+    running.append("ulta-1", make_record(1))
+    running.file.flush()
+    other = SegmentWriter(tmp_path, "sephora")
+    other.append("sephora-1", make_record(1))
+    crashed = abandon(other)
+
+    # A second ulta crawl must not seal the live ulta segment or touch sephora's
+    SegmentWriter(tmp_path, "ulta")
+    assert sealed_segments(tmp_path) == []
+    assert Path(str(running.path) + ".open").exists()
+    assert crashed.exists()
+
+    running.close()
+    assert len(sealed_segments(tmp_path)) == 1
+
+
+def test_ingested_segments_are_skipped(tmp_path):
+    writer = SegmentWriter(tmp_path, "ulta")
+    writer.append("ulta-1", make_record(1))
+    writer.close()
+
+    mark_ingested(sealed_segments(tmp_path)[0])
+    assert sealed_segments(tmp_path) == []
@@ -0,0 +1,74 @@
+import sys
+import time
+from decimal import Decimal
+from pathlib import Path
+
+import orjson
+from sqlalchemy import Numeric, create_engine, text
+
+# Add project root to sys.path
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from api.serialization import ResponseCache, cache_key, group_rows_to_json, rows_to_json
+
+
+def test_rows_serialize_by_column_with_nan_as_null():
+    engine = create_engine("sqlite://")
+    with engine.connect() as connection:
+        rows = connection.execute(
+            text("SELECT 'cerave__cream__' AS product_id, :rating AS avg_rating, NULL AS min_price"),
+            {"rating": float("nan")},
+        ).fetchall()
+    assert orjson.loads(rows_to_json(rows)) == [{"product_id": "cerave__cream__", "avg_rating": None, "min_price": None}]
+    assert rows_to_json([]) == b"[]"
+
+
+def test_uncast_decimals_fall_back_to_float():
+    engine = create_engine("sqlite://")
+    with engine.connect() as connection:
+        rows = connection.execute(text("SELECT 12.5 AS min_price").columns(min_price=Numeric(10, 2))).fetchall()
+    assert isinstance(rows[0].min_price, Decimal)
+    assert orjson.loads(rows_to_json(rows)) == [{"min_price": 12.5}]
+
+
+def test_cache_expires_and_evicts_least_recent():
+    cache = ResponseCache(ttl=0.05, max_entries=2)
+    cache.put(b"a", b"[1]")
+    cache.put(b"b", b"[2]")
+    assert cache.get(b"a") == b"[1]"
+    cache.put(b"c", b"[3]")
+    assert cache.get(b"b") is None
+    time.sleep(0.06)
+    assert cache.get(b"a") is None
+    assert ResponseCache(ttl=0).get(b"a") is None
+
+
+def test_cache_key_ignores_parameter_order():
+    assert cache_key("recommend", {"limit": 5, "conditions": ["acne"]}) == cache_key("recommend", {"conditions": ["acne"], "limit": 5})
+
+
+def test_grouped_rows_keep_request_order_and_empty_results():
+    engine = create_engine("sqlite://")
+    with engine.connect() as connection:
+        rows = connection.execute(text(
+            "SELECT 0 AS request_index, 1 AS position, 'a' AS product_id "
+            "UNION ALL SELECT 2, 1, 'b' UNION ALL SELECT 2, 2, 'c'"
+        )).fetchall()
+    groups = group_rows_to_json(rows, [0, 1, 2])
+    assert orjson.loads(groups[0]) == [{"product_id": "a"}]
+    assert groups[1] == b"[]"
+    assert orjson.loads(groups[2]) == [{"product_id": "b"}, {"product_id": "c"}]
+
+
+def test_encoded_routes_document_their_models_without_validating():
+    from api.server import app
+
+    schema = app.openapi()
+    ok = schema["paths"]["/recommend"]["post"]["responses"]["200"]["content"]
+    assert list(ok) == ["application/json"]
+    assert ok["application/json"]["schema"]["items"]["$ref"] == "#/components/schemas/ProductRecommendation"
+    batch = schema["paths"]["/recommend/batch"]["post"]["responses"]["200"]["content"]["application/json"]["schema"]
+    assert batch["items"]["items"]["$ref"] == "#/components/schemas/ProductRecommendation"
+    routes = {route.path: route for route in app.routes if hasattr(route, "response_model")}
+    for path in ("/recommend", "/recommend/batch", "/search", "/products/{product_id}/price-history"):
+        assert routes[path].response_model is None
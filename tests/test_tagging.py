@@ -0,0 +1,58 @@
+import re
+import sys
+from pathlib import Path
+
+# Add project root to sys.path
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from etl.tagging import CONDITION_MAP, TAGGER_VERSION, tag_conditions, tag_description, tag_diff
+
+
+def keyword_tags(description):
+    """The original one-regex-per-keyword tagger."""
+    lower_desc = description.lower()
+    return sorted(
+        condition for condition, keywords in CONDITION_MAP.items()
+        if any(re.search(r'\b' + keyword + r'\b', lower_desc) for keyword in keywords)
+    )
+
+
+def test_compiled_patterns_match_keyword_search():
+    descriptions = [
+        "CeraVe Moisturizing Cream for dry skin",
+        "Anti-Aging Night Serum with retinol",
+        "Gentle soothing gel, calms redness",
+        "Clarifying pore toner",
+        "Nothing relevant here",
+        "Unclear skies",
+    ]
+    for description in descriptions:
+        assert tag_conditions(description) == keyword_tags(description)
+
+
+def test_missing_description_falls_back_to_brand_and_name():
+    assert tag_description("Glow Recipe", "Watermelon Toner", None) == ["dullness"]
+    assert tag_description("Glow Recipe", "Watermelon Toner", "Hydrating toner") == ["dryness"]
+    assert tag_conditions(None) == []
+
+
+def test_tag_diff_only_touches_changed_products():
+    old = {"a": {"acne"}, "b": {"dryness", "redness"}}
+    new = {"a": {"acne"}, "b": {"dryness"}, "c": {"dullness"}}
+    inserts, deletes = tag_diff(["a", "b", "c"], old, new)
+    assert inserts == [("c", "dullness")]
+    assert deletes == [("b", "redness")]
+
+
+def test_tagger_version_is_stable():
+    assert re.fullmatch(r"[0-9a-f]{12}", TAGGER_VERSION)
+
+
+def test_merged_description_tags_are_the_union_of_each_retailers_tags():
+    # products.description joins the offers' descriptions one per line
+    sephora = "Dermaly Calm Serum Soothing relief for sensitive skin"
+    dermstore = "Calm Serum Dermaly"
+    ulta = "Dermaly Calm Serum fine\nlines"
+    merged = "\n".join(sorted([sephora, dermstore, ulta]))
+    expected = set(tag_conditions(sephora)) | set(tag_conditions(dermstore)) | set(tag_conditions(ulta))
+    assert set(tag_description("Dermaly", "Calm Serum", merged)) == expected == {"redness"}
@@ -0,0 +1,69 @@
+import logging
+import sys
+from pathlib import Path
+
+from sqlalchemy import create_engine, text
+
+# Add project root to sys.path
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from api.tracing import LatencyWindow, RequestTrace, current_trace, instrument_engine, percentile, server_timing, span
+
+
+def test_percentile_interpolates():
+    values = list(range(1, 101))
+    assert percentile(values, 50) == 50.5
+    assert percentile(values, 99) == 99.01
+    assert percentile([], 50) is None
+
+
+def test_queries_are_traced_and_slow_ones_logged(caplog):
+    engine = create_engine("sqlite://")
+    instrument_engine(engine, slow_query_ms=0, explain=True)
+
+    trace = RequestTrace()
+    token = current_trace.set(trace)
+    try:
+        with caplog.at_level(logging.WARNING, logger="api.slow_query"):
+            with engine.connect() as connection:
+                result = connection.execute(text("SELECT :value AS v"), {"value": 7})
+                with span("fetch"):
+                    assert result.fetchall() == [(7,)]
+    finally:
+        current_trace.reset(token)
+
+    timings = trace.finish()
+    assert trace.queries == 1
+    assert timings["execute"] > 0
+    assert timings["total"] >= timings["execute"] + timings["fetch"]
+    assert "Slow query" in caplog.text and "params=" in caplog.text
+    assert "EXPLAIN failed" not in caplog.text
+    assert server_timing({"execute": 0.0015}) == "execute;dur=1.50"
+
+
+def test_latency_window_summarizes_recent_requests():
+    window = LatencyWindow(size=3)
+    for seconds in (0.001, 0.002, 0.003, 0.004):
+        window.record("POST /recommend", {"execute": seconds, "total": seconds * 2})
+    summary = window.summary()["POST /recommend"]
+    assert summary["count"] == 3
+    assert summary["execute"]["p50"] == 3.0
+    assert summary["total"]["p99"] > summary["total"]["p50"]
+
+
+def test_latency_endpoint_is_off_unless_enabled(monkeypatch):
+    from fastapi.testclient import TestClient
+
+    import config
+    from api.server import app
+
+    client = TestClient(app)
+    monkeypatch.setattr(config, "DEBUG_ENDPOINTS", False)
+    assert client.get("/debug/latency").status_code == 404
+
+    monkeypatch.setattr(config, "DEBUG_ENDPOINTS", True)
+    client.get("/healthz")
+    response = client.get("/debug/latency")
+    assert response.status_code == 200
+    assert response.json()["GET /healthz"]["count"] >= 1
+    assert "serialize;dur=" in response.headers["Server-Timing"]